@@ -0,0 +1,232 @@
+"""
+Load test of the book list under WSGI and ASGI: requests per second, latency
+and server memory with many concurrent keep-alive connections.
+
+    pip install gunicorn uvicorn psutil
+    python -m benchmarks.asgi --connections 500 --duration 30
+
+Scenarios:
+
+    wsgi         gunicorn, one worker with --threads threads, /books/
+    asgi         uvicorn, one worker, /async/books/
+    asgi-sync    uvicorn, one worker, /books/ through Django's sync adapter
+
+Each server runs in its own process against a throwaway test database.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks import utils
+
+SCENARIOS = {
+    "wsgi": (
+        ["gunicorn", "bookstore.wsgi", "--workers", "1", "--threads", "{threads}"],
+        "/books/",
+    ),
+    "asgi": (
+        ["uvicorn", "bookstore.asgi:application", "--workers", "1"],
+        "/async/books/",
+    ),
+    "asgi-sync": (
+        ["uvicorn", "bookstore.asgi:application", "--workers", "1"],
+        "/books/",
+    ),
+}
+
+
+def create_catalogue(books, reviews_per_book):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from core.models import Book, Review
+    from core.serializers import TokenObtainPairSerializer
+
+    UserModel = get_user_model()
+    users = UserModel.objects.bulk_create(
+        UserModel(username=f"bench{i}") for i in range(max(1, reviews_per_book))
+    )
+    now = timezone.now()
+    created = Book.objects.bulk_create(
+        Book(
+            title=f"Book {i}",
+            author=f"Author {i % 500}",
+            description="Lorem ipsum dolor sit amet. " * 10,
+            publish_date=now - timedelta(minutes=random.randrange(10**6)),
+        )
+        for i in range(books)
+    )
+    Review.objects.bulk_create(
+        Review(book=book, user=user, review_text="Nice read.", rating=4)
+        for book in created
+        for user in users[:reviews_per_book]
+    )
+    return str(TokenObtainPairSerializer.get_token(users[0]).access_token)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(command, port, env):
+    if command[0] == "gunicorn":
+        command = command + ["--bind", f"127.0.0.1:{port}"]
+    else:
+        command = command + ["--host", "127.0.0.1", "--port", str(port)]
+    server = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{' '.join(command)} did not start")
+
+
+def server_rss(server):
+    import psutil
+
+    process = psutil.Process(server.pid)
+    processes = [process] + process.children(recursive=True)
+    return sum(p.memory_info().rss for p in processes)
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        if b":" in line:
+            name, value = line.split(b":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if b"content-length" in headers:
+        await reader.readexactly(int(headers[b"content-length"]))
+    elif headers.get(b"transfer-encoding") == b"chunked":
+        while size := int((await reader.readline()).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return status
+
+
+async def client(port, paths, token, deadline, samples, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.monotonic() < deadline:
+            request = (
+                f"GET {random.choice(paths)} HTTP/1.1\r\n"
+                f"Host: localhost\r\nAuthorization: Bearer {token}\r\n\r\n"
+            )
+            start = time.perf_counter()
+            writer.write(request.encode())
+            status = await read_response(reader)
+            samples.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        errors.append("connection")
+    finally:
+        writer.close()
+
+
+async def load(port, paths, token, connections, duration, server):
+    samples, errors, rss = [], [], []
+    deadline = time.monotonic() + duration
+    clients = asyncio.gather(
+        *(
+            client(port, paths, token, deadline, samples, errors)
+            for _ in range(connections)
+        )
+    )
+    while not clients.done():
+        rss.append(server_rss(server))
+        await asyncio.sleep(0.5)
+    await clients
+    return samples, errors, max(rss)
+
+
+def run(scenarios, connections, duration, threads, books, cached):
+    from django.db import connection
+
+    token = create_catalogue(books, reviews_per_book=3)
+    env = {
+        **os.environ,
+        "DATABASE_NAME": connection.settings_dict["NAME"],
+        "ALLOWED_HOSTS": "localhost",
+        "THROTTLE_RATE_USER": f"{10**9}/s",
+        "PYTHONPATH": os.getcwd(),
+    }
+    if not cached:
+        env["CACHE_BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+    # Different page sizes, so that requests don't all share a cache entry.
+    queries = [f"?page_size={size}" for size in range(5, 55, 5)]
+
+    rows = []
+    for name in scenarios:
+        command, path = SCENARIOS[name]
+        command = [part.format(threads=threads) for part in command]
+        port = free_port()
+        server = start_server(command, port, env)
+        try:
+            paths = [path + query for query in queries]
+            samples, errors, rss = asyncio.run(
+                load(port, paths, token, connections, duration, server)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append(
+            {
+                "server": name,
+                "requests_per_s": round(len(samples) / duration),
+                **utils.summarize(samples or [0]),
+                "errors": len(errors),
+                "peak_rss_mb": round(rss / 2**20),
+            }
+        )
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument(
+        "--no-cache", dest="cached", action="store_false", help="bypass the cache"
+    )
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        # Servers connect to the test database from other processes.
+        from django.db import connection
+
+        connection.close()
+        run(
+            args.scenarios,
+            args.connections,
+            args.duration,
+            args.threads,
+            args.books,
+            args.cached,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Requests per second on read endpoints with the default JWT authentication,
+which loads the user on every request, and with the stateless one, which
+builds it from token claims.
+
+    python -m benchmarks.authentication --requests 2000
+"""
+
+import argparse
+import time
+from unittest import mock
+
+from benchmarks import utils
+
+AUTHENTICATION_CLASSES = {
+    "jwt": "rest_framework_simplejwt.authentication.JWTAuthentication",
+    "stateless_jwt": "core.authentication.StatelessJWTAuthentication",
+}
+
+
+def run(requests, books):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from django.utils import timezone
+    from django.utils.module_loading import import_string
+    from rest_framework.test import APIClient
+    from core.models import Book
+    from core.serializers import TokenObtainPairSerializer
+    from core.views import BookViewSet
+
+    user = get_user_model().objects.create_user(username="bench", password="bench")
+    book = Book.objects.bulk_create(
+        Book(
+            title=f"Book {i}",
+            author=f"Author {i}",
+            description="Lorem ipsum dolor sit amet.",
+            publish_date=timezone.now(),
+        )
+        for i in range(books)
+    )[0]
+    client = APIClient()
+    token = TokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    endpoints = {
+        "list": reverse("books-list"),
+        "detail": reverse("books-detail", args=[book.id]),
+    }
+
+    rows = []
+    for endpoint, url in endpoints.items():
+        for name, path in AUTHENTICATION_CLASSES.items():
+            with mock.patch.object(
+                BookViewSet, "authentication_classes", [import_string(path)]
+            ):
+                assert client.get(url).status_code == 200  # warm up the cache
+                start = time.perf_counter()
+                samples = utils.measure(lambda: client.get(url), requests)
+                elapsed = time.perf_counter() - start
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "authentication": name,
+                    "requests_per_s": round(requests / elapsed),
+                    **utils.summarize(samples),
+                }
+            )
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=100)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        run(args.requests, args.books)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Latency of `/books/{id}/` through the WSGI handler with a new database
+connection per request, against persistent connections with and without
+health checks.
+
+    python -m benchmarks.connections --requests 2000
+
+Requests go through Django's full request cycle, including the
+request_started / request_finished signals that open and close connections,
+but not through the network. The response cache is bypassed so that every
+request queries the database.
+"""
+
+import argparse
+
+from benchmarks import utils
+
+SCENARIOS = {
+    "new connection": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistent": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False},
+    "persistent + health checks": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+}
+
+
+def run(requests):
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test import RequestFactory, override_settings
+    from django.urls import reverse
+    from django.utils import timezone
+    from core.models import Book
+    from core.serializers import TokenObtainPairSerializer
+
+    user = get_user_model().objects.create(username="bench")
+    token = TokenObtainPairSerializer.get_token(user).access_token
+    book = Book.objects.create(
+        title="Book",
+        author="Author",
+        description="Description",
+        publish_date=timezone.now(),
+    )
+    environ = RequestFactory()._base_environ(
+        PATH_INFO=reverse("books-detail", args=[book.pk]),
+        REQUEST_METHOD="GET",
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+    handler = WSGIHandler()
+
+    def request():
+        response = handler(dict(environ), lambda status, headers: None)
+        assert response.status_code == 200, response.status_code
+        # Sends request_finished, which closes connections past their max age.
+        response.close()
+
+    rows = []
+    dummy_cache = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+    with override_settings(CACHES=dummy_cache):
+        for name, options in SCENARIOS.items():
+            connection.close()
+            connection.settings_dict.update(options)
+            request()  # warm up
+            samples = utils.measure(request, requests)
+            rows.append({"connections": name, **utils.summarize(samples)})
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
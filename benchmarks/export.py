@@ -0,0 +1,114 @@
+"""
+Peak memory and throughput of the catalogue export as the catalogue grows,
+against serializing every book at once as a list page would.
+
+    python -m benchmarks.export --sizes 10000 100000 1000000
+
+Each export runs in a forked process whose peak RSS is measured from the
+start of the export (Linux only). The export columns should stay flat across
+sizes while the `all_at_once` one grows with the catalogue.
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks import utils
+from benchmarks.pagination import grow_catalogue
+
+
+def export(format, compress):
+    def run():
+        from core.exports import export_chunks
+
+        for _ in export_chunks(format, compress=compress):
+            pass
+
+    return run
+
+
+def all_at_once():
+    import json
+    from core.models import Book
+    from core.serializers import BookSerializer
+
+    books = Book.objects.prefetch_related("reviews")
+    json.dumps(BookSerializer(books, many=True).data)
+
+
+SCENARIOS = {
+    "ndjson": export("ndjson", compress=False),
+    "ndjson_gzip": export("ndjson", compress=True),
+    "csv": export("csv", compress=False),
+    "all_at_once": all_at_once,
+}
+
+
+def peak_rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+
+
+def measure_in_child(func):
+    """
+    Run `func` in a forked process and return its wall time in seconds and the
+    growth of the process's peak RSS in MiB.
+    """
+    from django.db import connection
+
+    connection.close()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        # Reset the peak RSS to the current RSS.
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        before = peak_rss_kb()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        os.write(write, f"{elapsed} {(peak_rss_kb() - before) / 1024}".encode())
+        os._exit(0)
+    os.close(write)
+    with os.fdopen(read) as f:
+        elapsed, peak = map(float, f.read().split())
+    os.waitpid(pid, 0)
+    return elapsed, peak
+
+
+def run(sizes, scenarios):
+    from django.contrib.auth import get_user_model
+
+    UserModel = get_user_model()
+    users = [UserModel.objects.create(username="bench")]
+
+    rows = []
+    for size in sizes:
+        grow_catalogue(size, reviews_per_book=1, users=users)
+        row = {"books": size}
+        for name in scenarios:
+            elapsed, peak = measure_in_child(SCENARIOS[name])
+            row[f"{name}_rows_per_s"] = round(size / elapsed)
+            row[f"{name}_peak_mb"] = round(peak, 1)
+        rows.append(row)
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        run(sorted(args.sizes), args.scenarios)
+
+
+if __name__ == "__main__":
+    main()
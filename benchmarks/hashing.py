@@ -0,0 +1,144 @@
+"""
+Password hashing: logins per second per core of each hasher, and how a burst
+of logins through `/user/login/` affects `/books/` requests served by the
+same process, for several sizes of the hashing pool.
+
+    python -m benchmarks.hashing --seconds 5 --login-threads 16 --workers 1 2 4
+
+The first table times check_password() on its own, in one thread. In the
+second, `--login-threads` threads log in as fast as they can while another
+one requests `/books/`; logins rejected with 503 are counted apart.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from benchmarks import utils
+
+HASHERS = {
+    "pbkdf2": "core.passwords.PBKDF2PasswordHasher",
+    "scrypt": "core.passwords.ScryptPasswordHasher",
+    "argon2": "core.passwords.Argon2PasswordHasher",
+}
+
+
+def hasher_rates(repeat):
+    from django.contrib.auth.hashers import check_password, make_password
+    from django.test import override_settings
+
+    rows = []
+    for name, hasher in HASHERS.items():
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            try:
+                encoded = make_password("passw0rd")
+            except ValueError as e:
+                # Argon2 without argon2-cffi.
+                print(f"Skipping {name}: {e}")
+                continue
+            samples = utils.measure(lambda: check_password("passw0rd", encoded), repeat)
+        rows.append(
+            {
+                "hasher": name,
+                **utils.summarize(samples),
+                "logins_per_sec_per_core": round(1 / statistics.mean(samples), 1),
+            }
+        )
+    return rows
+
+
+def burst(workers, login_threads, seconds, hasher):
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.db import connections
+    from django.test import Client, override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    UserModel = get_user_model()
+    with override_settings(PASSWORD_HASHERS=[HASHERS[hasher]]):
+        user = UserModel.objects.create_user(
+            username=f"bench-{hasher}-{workers}", password="passw0rd"
+        )
+    token = f"Bearer {AccessToken.for_user(user)}"
+    credentials = {"username": user.username, "password": "passw0rd"}
+    stop = threading.Event()
+    statuses = []
+    book_samples = []
+
+    def log_in():
+        client = Client()
+        try:
+            while not stop.is_set():
+                response = client.post("/user/login/", credentials)
+                statuses.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    def read_books():
+        client = Client(HTTP_AUTHORIZATION=token)
+
+        def request():
+            cache.clear()
+            client.get("/books/")
+
+        try:
+            while not stop.is_set():
+                book_samples.extend(utils.measure(request, 1))
+        finally:
+            connections.close_all()
+
+    with override_settings(
+        PASSWORD_HASHERS=[HASHERS[hasher]], PASSWORD_HASHING_WORKERS=workers
+    ):
+        threads = [threading.Thread(target=log_in) for _ in range(login_threads)]
+        threads.append(threading.Thread(target=read_books))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "hasher": hasher,
+        "workers": workers,
+        "logins_per_sec": round(statuses.count(200) / seconds, 1),
+        "rejected_503": statuses.count(503),
+        "books_p50_ms": utils.summarize(book_samples)["p50_ms"],
+        "books_p99_ms": utils.summarize(book_samples)["p99_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--books", type=int, default=100)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        from django.contrib.auth import get_user_model
+        from benchmarks.pagination import grow_catalogue
+
+        reviewers = [
+            get_user_model().objects.create(username=f"bench{i}") for i in range(3)
+        ]
+        grow_catalogue(args.books, 3, reviewers)
+
+        utils.print_table(hasher_rates(args.repeat))
+        print()
+        utils.print_table(
+            [
+                burst(workers, args.login_threads, args.seconds, hasher)
+                for hasher in ("pbkdf2", "scrypt")
+                for workers in args.workers
+            ]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Throughput of `manage.py import_books` with COPY and with bulk_create, against
+validating and saving one book at a time as the admin does.
+
+    python -m benchmarks.import_books --books 1000000 --batch-sizes 5000 20000
+
+Every import starts from an empty table; a second COPY import of the same file
+measures the upsert path, where every row already exists.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import utils
+
+
+def write_books(path, count):
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w") as f:
+        for i in range(count):
+            record = {
+                "title": f"Book {i}",
+                "author": f"Author {i % 5000}",
+                "description": "Lorem ipsum dolor sit amet. " * 10,
+                "publish_date": (start + timedelta(minutes=i)).isoformat(),
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def truncate():
+    from django.db import connection
+    from core.models import Book
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {Book._meta.db_table} CASCADE")
+
+
+def one_at_a_time(path, count):
+    from core.imports import read_rows
+    from core.models import Book
+
+    start = time.perf_counter()
+    with open(path) as f:
+        for _, (_, record) in zip(range(count), read_rows(f, "ndjson")):
+            book = Book(**record)
+            book.full_clean()
+            book.save()
+    return time.perf_counter() - start
+
+
+def import_books(path, method, batch_size):
+    from django.core.management import call_command
+
+    start = time.perf_counter()
+    call_command(
+        "import_books",
+        path,
+        method=method,
+        batch_size=batch_size,
+        verbosity=0,
+        stdout=open(os.devnull, "w"),
+    )
+    return time.perf_counter() - start
+
+
+def run(count, batch_sizes, sample):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "books.ndjson")
+        write_books(path, count)
+
+        truncate()
+        sample = min(sample, count)
+        elapsed = one_at_a_time(path, sample)
+        rows.append(
+            {
+                "method": "one at a time",
+                "batch_size": 1,
+                "books_per_s": round(sample / elapsed),
+                "total_s": f"~{count * elapsed / sample:.0f}",
+            }
+        )
+        for batch_size in batch_sizes:
+            for method in ("bulk", "copy", "copy upsert"):
+                if method != "copy upsert":
+                    truncate()
+                elapsed = import_books(path, method.split()[0], batch_size)
+                rows.append(
+                    {
+                        "method": method,
+                        "batch_size": batch_size,
+                        "books_per_s": round(count / elapsed),
+                        "total_s": f"{elapsed:.0f}",
+                    }
+                )
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10000])
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=2000,
+        help="Books saved one at a time to estimate the baseline.",
+    )
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        run(args.books, args.batch_sizes, args.sample)
+
+
+if __name__ == "__main__":
+    main()
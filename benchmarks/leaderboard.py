@@ -0,0 +1,140 @@
+"""
+Latency of the top-rated leaderboard as reviews grow, against ranking books
+by aggregating the reviews table on every request.
+
+    python -m benchmarks.leaderboard --reviews 100000 1000000 10000000
+
+Each book is reviewed by every one of `--reviewers` users with a random
+rating. Reviews are generated in SQL and the rating stats are rebuilt with
+`manage.py rebuild_book_ratings`. `/books/top/` goes through the test client
+with the response cache disabled; the scan column runs the equivalent
+aggregate over `core_review`, only up to `--max-scan-reviews`. The plan of
+the leaderboard query is printed at the end.
+"""
+
+import argparse
+import io
+
+from benchmarks import utils
+
+
+def grow_reviews(target, reviewers):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from core.models import Book, Review
+
+    users = get_user_model().objects.filter(username__startswith="bench")
+    existing = Book.objects.count()
+    books = max(0, -(-target // reviewers) - existing)
+    if not books:
+        return Review.objects.count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO core_book (title, author, description, publish_date, "
+            "created_at, review_count, rating_sum, file, file_sha256) "
+            "SELECT 'Book ' || i, 'Author', '', now(), now(), 0, 0, '', '' "
+            "FROM generate_series(%s, %s) i",
+            [existing, existing + books - 1],
+        )
+        cursor.execute(
+            "INSERT INTO core_review (user_id, book_id, review_text, rating, "
+            "created_at) SELECT u.id, b.id, '', floor(random() * 6)::int, now() "
+            "FROM core_book b CROSS JOIN auth_user u "
+            "WHERE u.username LIKE 'bench%%' "
+            "AND NOT EXISTS (SELECT FROM core_review r WHERE r.book_id = b.id)",
+        )
+        cursor.execute("ANALYZE")
+    assert users.count() == reviewers
+    call_command("rebuild_book_ratings", stdout=io.StringIO())
+    return Review.objects.count()
+
+
+def scan_top(limit):
+    from django.conf import settings
+    from django.db.models import Count, FloatField, Sum
+    from django.db.models.functions import Cast
+    from core.models import Review
+
+    prior_weight = settings.BOOK_RATING_PRIOR_WEIGHT
+    prior_sum = prior_weight * settings.BOOK_RATING_PRIOR_MEAN
+    return [
+        *Review.objects.order_by()
+        .values("book")
+        .annotate(
+            score=(prior_sum + Cast(Sum("rating"), FloatField()))
+            / (prior_weight + Count("pk"))
+        )
+        .order_by("-score", "book")[:limit]
+    ]
+
+
+def run(sizes, reviewers, repeat, limit, max_scan_reviews):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from core import ratings
+    from core.models import Book
+
+    UserModel = get_user_model()
+    users = [UserModel.objects.create(username=f"bench{i}") for i in range(reviewers)]
+    client = APIClient()
+    client.force_authenticate(user=users[0])
+    url = reverse("books-top") + f"?limit={limit}"
+
+    def top():
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+
+    rows = []
+    dummy_cache = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+    with override_settings(CACHES=dummy_cache):
+        for size in sizes:
+            reviews = grow_reviews(size, reviewers)
+            top()  # warm up
+            row = {"reviews": reviews}
+            for name, value in utils.summarize(utils.measure(top, repeat)).items():
+                row[f"top_{name}"] = value
+            if reviews <= max_scan_reviews:
+                samples = utils.measure(lambda: scan_top(limit), max(1, repeat // 10))
+                row["scan_p50_ms"] = utils.summarize(samples)["p50_ms"]
+            else:
+                row["scan_p50_ms"] = "-"
+            rows.append(row)
+    utils.print_table(rows)
+
+    queryset = ratings.leaderboard(Book.objects.all())[:limit]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        print("\n" + "\n".join(line for (line,) in cursor.fetchall()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--reviews", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    parser.add_argument("--reviewers", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--max-scan-reviews", type=int, default=10000000)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        run(
+            sorted(args.reviews),
+            args.reviewers,
+            args.repeat,
+            args.limit,
+            args.max_scan_reviews,
+        )
+
+
+if __name__ == "__main__":
+    main()
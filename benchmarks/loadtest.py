@@ -0,0 +1,304 @@
+"""
+End-to-end load test of `/books/`, `/books/{id}/`, `add_review` and
+`/user/login/`, reporting each endpoint's throughput, latency percentiles
+and SQL query counts as JSON, to compare versions of the app.
+
+    python -m benchmarks.loadtest --books 100000 --concurrency 8 --output new.json
+    python -m benchmarks.loadtest --books 100000 --concurrency 8 --compare old.json
+
+The dataset is generated by `manage.py seed_bookstore` with a fixed --seed,
+and every client picks its books with its own seeded random generator, so
+runs of the same version send the same requests. Clients are threads using
+Django's test client against this process, with throttling disabled; each
+endpoint is loaded on its own, by `--concurrency` clients at once. The list
+clients page through `/books/` in several orderings, following `next` links
+for up to `--pages` pages.
+"""
+
+import argparse
+import contextlib
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import utils
+
+ORDERINGS = ["-publish_date", "-created_at", "-average_rating", "-review_count"]
+
+
+class Client:
+    """
+    One simulated user, with their own test client and random generator.
+    """
+
+    def __init__(self, index, user, book_ids, password, pages, seed):
+        from django.test import Client as TestClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.user = user
+        self.password = password
+        self.book_ids = book_ids
+        self.pages = pages
+        self.random = random.Random(seed * 1000 + index)
+        self.client = TestClient(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        self.next_url = None
+        self.page = 0
+        # Books this user hasn't reviewed yet, for add_review.
+        self.unreviewed = self.random.sample(book_ids, len(book_ids))
+
+    def book_list(self):
+        if self.next_url is None or self.page >= self.pages:
+            self.next_url = f"/books/?ordering={self.random.choice(ORDERINGS)}"
+            self.page = 0
+        response = self.client.get(self.next_url)
+        self.next_url = (
+            response.json().get("next") if response.status_code == 200 else None
+        )
+        self.page += 1
+        return response
+
+    def book_detail(self):
+        return self.client.get(f"/books/{self.random.choice(self.book_ids)}/")
+
+    def add_review(self):
+        return self.client.post(
+            f"/books/{self.unreviewed.pop()}/add_review/",
+            {
+                "review_text": "Read it in one sitting.",
+                "rating": self.random.randint(0, 5),
+            },
+            content_type="application/json",
+        )
+
+    def login(self):
+        return self.client.post(
+            "/user/login/",
+            {"username": self.user.username, "password": self.password},
+            content_type="application/json",
+        )
+
+
+def run_endpoint(clients, name, requests):
+    """
+    Send `requests` requests to the endpoint `name`, spread over `clients`
+    running at once, and return the endpoint's results.
+    """
+    from django.db import connection, connections
+    from django.test.utils import CaptureQueriesContext
+
+    samples = []
+    barrier = threading.Barrier(len(clients) + 1)
+
+    def work(client, count):
+        send = getattr(client, name)
+        results = []
+        barrier.wait()
+        try:
+            for _ in range(count):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = send()
+                    elapsed = time.perf_counter() - start
+                results.append((elapsed, response.status_code, len(queries)))
+        finally:
+            connections.close_all()
+            samples.extend(results)
+
+    threads = [
+        threading.Thread(target=work, args=(client, count))
+        for client, count in zip(clients, split(requests, len(clients)))
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [sample[0] for sample in samples]
+    statuses = [sample[1] for sample in samples]
+    queries = [sample[2] for sample in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for status in statuses),
+        "status_codes": {
+            str(status): statuses.count(status) for status in sorted(set(statuses))
+        },
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 3),
+            "p50": round(utils.percentile(latencies, 50) * 1000, 3),
+            "p95": round(utils.percentile(latencies, 95) * 1000, 3),
+            "p99": round(utils.percentile(latencies, 99) * 1000, 3),
+        },
+        "queries": {
+            "mean": round(statistics.mean(queries), 2),
+            "max": max(queries),
+        },
+    }
+
+
+def split(total, parts):
+    return [total // parts + (i < total % parts) for i in range(parts)]
+
+
+def run(args):
+    from django.core.management import call_command
+    from core import factories
+    from core.models import Book
+
+    call_command(
+        "seed_bookstore",
+        books=args.books,
+        users=args.users,
+        reviews_per_book=args.reviews_per_book,
+        seed=args.seed,
+        password=args.password,
+        verbosity=0,
+    )
+    # Users of their own, who haven't reviewed any book yet.
+    users = [
+        factories.UserFactory(username=f"loadtest{i}", password=args.password)
+        for i in range(args.concurrency)
+    ]
+    book_ids = list(Book.objects.order_by("pk").values_list("pk", flat=True))
+    requests = {
+        "book_list": args.requests,
+        "book_detail": args.requests,
+        "add_review": min(args.requests, args.books),
+        "login": args.login_requests,
+    }
+
+    endpoints = {}
+    with utils.without_throttling():
+        for name, count in requests.items():
+            clients = [
+                Client(i, user, book_ids, args.password, args.pages, args.seed)
+                for i, user in enumerate(users)
+            ]
+            # Warm up connections, caches and the URL resolver.
+            run_endpoint(clients, "book_detail", len(clients))
+            endpoints[name] = run_endpoint(clients, name, count)
+            print(f"{name}: {endpoints[name]['throughput_rps']} req/s", file=sys.stderr)
+
+    return {
+        "version": version(),
+        "config": {
+            name: getattr(args, name)
+            for name in (
+                "books",
+                "users",
+                "reviews_per_book",
+                "concurrency",
+                "requests",
+                "login_requests",
+                "pages",
+                "seed",
+            )
+        },
+        "endpoints": endpoints,
+    }
+
+
+def version():
+    import django
+
+    def git(*args):
+        try:
+            result = subprocess.run(["git", *args], capture_output=True, text=True)
+        except OSError:
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "git": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+    }
+
+
+def compare(baseline, results):
+    """
+    Rows comparing each endpoint of `results` with `baseline`.
+    """
+    rows = []
+    for name, new in results["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is None:
+            continue
+        rows.append(
+            {
+                "endpoint": name,
+                "rps": change(old["throughput_rps"], new["throughput_rps"]),
+                "p50_ms": change(old["latency_ms"]["p50"], new["latency_ms"]["p50"]),
+                "p99_ms": change(old["latency_ms"]["p99"], new["latency_ms"]["p99"]),
+                "queries": change(old["queries"]["mean"], new["queries"]["mean"]),
+            }
+        )
+    return rows
+
+
+def change(old, new):
+    if not old:
+        return f"{old} -> {new}"
+    return f"{old} -> {new} ({(new / old - 1) * 100:+.1f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--reviews-per-book", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="Requests to each endpoint."
+    )
+    parser.add_argument(
+        "--login-requests",
+        type=int,
+        default=100,
+        help="Requests to /user/login/, which hashes a password each time.",
+    )
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="passw0rd")
+    parser.add_argument(
+        "--output", default="-", help="File to write the JSON results to."
+    )
+    parser.add_argument(
+        "--compare", metavar="JSON", help="Results of a previous run to compare with."
+    )
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        results = run(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(file=sys.stderr)
+        with contextlib.redirect_stdout(sys.stderr):
+            utils.print_table(compare(baseline, results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Overhead of MetricsMiddleware on `/books/` requests, without metrics, and
+with metrics at several sample rates.
+
+    python -m benchmarks.metrics --requests 2000 --sample-rates 0,0.1,1
+
+Requests go through the test client, with the response cache cleared before
+each one so that every request runs its queries. The baseline runs first,
+before the instrumentation is installed, since it can't be removed again.
+As the difference is within the noise of whole requests, the cost of the
+middleware's own bookkeeping is also measured on its own.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks import utils
+from benchmarks.pagination import grow_catalogue
+
+
+def run(books, requests, sample_rates):
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core import metrics
+
+    UserModel = get_user_model()
+    users = [UserModel.objects.create(username=f"bench{i}") for i in range(3)]
+    grow_catalogue(books, 3, users)
+    token = f"Bearer {AccessToken.for_user(users[0])}"
+
+    def measure():
+        client = Client(HTTP_AUTHORIZATION=token)
+
+        def request():
+            cache.clear()
+            client.get("/books/")
+
+        # Warm up connections, caches and the URL resolver.
+        utils.measure(request, 50)
+        return utils.measure(request, requests)
+
+    results = []
+    with utils.without_throttling(), override_settings(METRICS_ENABLED=False):
+        baseline = measure()
+    results.append(row("off", baseline, baseline))
+
+    metrics.install()
+    for rate in sample_rates:
+        with utils.without_throttling(), override_settings(
+            METRICS_ENABLED=True, METRICS_SAMPLE_RATE=rate, METRICS_SERVER_TIMING=True
+        ):
+            results.append(row(f"sample rate {rate}", measure(), baseline))
+    utils.print_table(results)
+    print()
+    utils.print_table(
+        [bookkeeping(rate, statistics.mean(baseline)) for rate in sample_rates]
+    )
+
+
+def bookkeeping(rate, request_time):
+    """
+    The time MetricsMiddleware adds to a request of `request_time` seconds,
+    leaving out the timed phases.
+    """
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.urls import resolve
+    from core import metrics
+
+    request = RequestFactory().get("/books/")
+    request.resolver_match = resolve("/books/")
+    response = HttpResponse(b"{}" * 1000)
+    repeat = 100000
+    with override_settings(METRICS_SAMPLE_RATE=rate, METRICS_SERVER_TIMING=True):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            token = metrics.start_request()
+            metrics.finish_request(token, request, response, 0.005)
+        per_request = (time.perf_counter() - start) / repeat
+    return {
+        "sample_rate": rate,
+        "bookkeeping_us": round(per_request * 1e6, 2),
+        "share_of_request": f"{per_request / request_time * 100:.3f}%",
+    }
+
+
+def row(name, samples, baseline):
+    mean = statistics.mean(samples)
+    return {
+        "metrics": name,
+        **utils.summarize(samples),
+        "mean_ms": round(mean * 1000, 3),
+        "overhead": f"{(mean / statistics.mean(baseline) - 1) * 100:+.2f}%",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sample-rates", default="0,0.01,0.1,1")
+    args = parser.parse_args()
+
+    # Installed later, after measuring the baseline.
+    os.environ["METRICS_ENABLED"] = "false"
+    utils.setup()
+    with utils.test_database():
+        run(
+            args.books,
+            args.requests,
+            [float(rate) for rate in args.sample_rates.split(",")],
+        )
+
+
+if __name__ == "__main__":
+    main()
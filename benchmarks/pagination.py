@@ -0,0 +1,99 @@
+"""
+Latency of the book list endpoint for the first page and for a deep page as
+the catalogue grows.
+
+    python -m benchmarks.pagination --sizes 1000 10000 100000 1000000
+
+With keyset pagination both columns should stay flat across sizes.
+"""
+
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks import utils
+
+
+def grow_catalogue(target, reviews_per_book, users, batch_size=10000):
+    from django.utils import timezone
+    from core.models import Book, Review
+
+    existing = Book.objects.count()
+    now = timezone.now()
+    while existing < target:
+        count = min(batch_size, target - existing)
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Book {existing + i}",
+                author=f"Author {(existing + i) % 5000}",
+                description="Lorem ipsum dolor sit amet. " * 10,
+                publish_date=now - timedelta(minutes=random.randrange(10**7)),
+            )
+            for i in range(count)
+        )
+        Review.objects.bulk_create(
+            Review(book=book, user=user, review_text="Nice read.", rating=4)
+            for book in books
+            for user in users[:reviews_per_book]
+        )
+        existing += count
+
+
+def run(sizes, repeat, page_size, reviews_per_book):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from core.models import Book
+    from core.pagination import KeysetCursorPagination
+
+    UserModel = get_user_model()
+    users = [
+        UserModel.objects.create(username=f"bench{i}")
+        for i in range(max(1, reviews_per_book))
+    ]
+    client = APIClient()
+    client.force_authenticate(user=users[0])
+    url = reverse("books-list") + f"?page_size={page_size}"
+
+    rows = []
+    for size in sizes:
+        grow_catalogue(size, reviews_per_book, users)
+        last = Book.objects.order_by("-publish_date", "-id")[size - page_size - 1]
+        paginator = KeysetCursorPagination()
+        paginator.base_url = "http://testserver" + url
+        deep_url = paginator.encode_position(
+            paginator._get_position_from_instance(last, ("publish_date", "id")),
+            reverse=False,
+        )
+        client.get(url)  # warm up connections and caches
+        first = utils.summarize(utils.measure(lambda: client.get(url), repeat))
+        deep = utils.summarize(utils.measure(lambda: client.get(deep_url), repeat))
+        rows.append(
+            {
+                "books": size,
+                "first_p50_ms": first["p50_ms"],
+                "first_p99_ms": first["p99_ms"],
+                "deep_p50_ms": deep["p50_ms"],
+                "deep_p99_ms": deep["p99_ms"],
+            }
+        )
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--reviews-per-book", type=int, default=2)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        run(sorted(args.sizes), args.repeat, args.page_size, args.reviews_per_book)
+
+
+if __name__ == "__main__":
+    main()
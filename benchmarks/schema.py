@@ -0,0 +1,58 @@
+"""
+Latency of `/swagger.json` served from the precomputed schema, against
+generating the schema on every request as drf_yasg's schema view does.
+
+    python -m benchmarks.schema --requests 200
+
+Requests go through Django's test client, so the numbers include the full
+middleware stack but not the network.
+"""
+
+import argparse
+
+from benchmarks import utils
+
+
+def run(requests):
+    from django.test import Client
+    from core import schema
+
+    client = Client()
+    scenarios = {
+        "generated per request": "/swagger/?format=openapi",
+        "precomputed": "/swagger.json",
+    }
+    rows = []
+    for name, url in scenarios.items():
+
+        def request():
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+
+        request()  # warm up
+        samples = utils.measure(request, requests)
+        rows.append({"schema": name, **utils.summarize(samples)})
+
+    etag = schema.get_schema("json")[1]
+
+    def revalidate():
+        response = client.get("/swagger.json", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, response.status_code
+
+    samples = utils.measure(revalidate, requests)
+    rows.append({"schema": "precomputed, 304", **utils.summarize(samples)})
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database(), utils.without_throttling():
+        run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare the admin's former ILIKE search with the full-text search used by
+`/books/?q=` and the admin, on a generated catalogue.
+
+    python -m benchmarks.search --books 1000000
+"""
+
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks import utils
+
+SYLLABLES = "ka lo mi ra ten vor shi dun pel gar ith mon bel qua ros zen tor".split()
+
+
+def vocabulary(size, seed=7):
+    """
+    A deterministic vocabulary of pronounceable words. It has to be large for
+    the benchmark to be realistic: most search terms match few books.
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+WORDS = vocabulary(20000)
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def create_books(count, batch_size=10000):
+    from django.utils import timezone
+    from core.models import Book
+
+    rng = random.Random(42)
+    now = timezone.now()
+    for start in range(0, count, batch_size):
+        Book.objects.bulk_create(
+            Book(
+                title=sentence(rng, 3).title(),
+                author=f"{rng.choice(WORDS).title()} {start + i}",
+                description=sentence(rng, 40),
+                publish_date=now - timedelta(days=rng.randrange(20000)),
+            )
+            for i in range(min(batch_size, count - start))
+        )
+
+
+def run(books, repeat, terms, page_size):
+    from django.db import connection
+    from django.db.models import Q
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from core.filters import BookSearchFilter
+    from core.models import Book
+
+    factory = APIRequestFactory()
+    create_books(books)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_book")
+
+    def ilike(term):
+        query = (
+            Q(title__icontains=term)
+            | Q(author__icontains=term)
+            | Q(description__icontains=term)
+        )
+        return lambda: list(Book.objects.filter(query).order_by("-pk")[:page_size])
+
+    def full_text(term):
+        request = Request(factory.get("/books/", {BookSearchFilter.search_param: term}))
+        queryset = BookSearchFilter().filter_queryset(request, Book.objects.all(), None)
+        queryset = queryset.order_by("-search_rank", "-id").defer("search_vector")
+        return lambda: list(queryset[:page_size])
+
+    rows = []
+    for term in terms:
+        for name, build in (("ilike", ilike), ("full_text", full_text)):
+            summary = utils.summarize(utils.measure(build(term), repeat))
+            rows.append({"term": term, "method": name, **summary})
+    utils.print_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--terms", nargs="+", default=WORDS[::5000])
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        run(args.books, args.repeat, args.terms, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
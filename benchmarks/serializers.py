@@ -0,0 +1,108 @@
+"""
+Serialization throughput of a book list page, in rows per second, for the
+ModelSerializer against the read serializer the endpoints use, rendered with
+DRF's JSONRenderer and with orjson.
+
+    python -m benchmarks.serializers --rows 1000 --fields id,title,author
+
+Books are loaded once, with the list endpoint's queryset, so that only
+serialization and rendering are measured.
+"""
+
+import argparse
+
+from benchmarks import utils
+from benchmarks.pagination import grow_catalogue
+
+
+def run(rows, repeat, reviews_per_book, fields):
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from core.serializers import BookListReadSerializer, BookListSerializer
+    from core.views import BookViewSet
+
+    try:
+        from core.renderers import ORJSONRenderer
+    except ImportError:
+        ORJSONRenderer = None
+
+    UserModel = get_user_model()
+    users = [
+        UserModel.objects.create(username=f"bench{i}")
+        for i in range(max(1, reviews_per_book))
+    ]
+    grow_catalogue(rows, reviews_per_book, users)
+
+    query = {"fields": fields} if fields else None
+    request = Request(APIRequestFactory().get("/books/", query))
+    request.user = users[0]
+    view = BookViewSet(
+        request=request, action="list", args=(), kwargs={}, format_kwarg=None
+    )
+    books = [*view.get_queryset()]
+    context = view.get_serializer_context()
+
+    serializers = {
+        "ModelSerializer": BookListSerializer,
+        "read serializer": BookListReadSerializer,
+    }
+    renderers = {"JSONRenderer": JSONRenderer}
+    if ORJSONRenderer is not None:
+        renderers["ORJSONRenderer"] = ORJSONRenderer
+    if fields:
+        # ModelSerializers don't support sparse fieldsets.
+        del serializers["ModelSerializer"]
+
+    results = []
+    for serializer_name, serializer_class in serializers.items():
+
+        def serialize():
+            return serializer_class(books, many=True, context=context).data
+
+        samples = utils.measure(serialize, repeat)
+        results.append(row(serializer_name, "-", rows, samples))
+        data = serialize()
+        for renderer_name, renderer_class in renderers.items():
+            renderer = renderer_class()
+            samples = utils.measure(lambda: renderer.render(data), repeat)
+            results.append(row(serializer_name, renderer_name, rows, samples))
+
+            def both():
+                renderer.render(serialize())
+
+            samples = utils.measure(both, repeat)
+            results.append(
+                row(serializer_name, f"{renderer_name} + data", rows, samples)
+            )
+    utils.print_table(results)
+
+
+def row(serializer, renderer, rows, samples):
+    summary = utils.summarize(samples)
+    return {
+        "serializer": serializer,
+        "rendering": renderer,
+        "rows_per_s": int(rows / (summary["p50_ms"] / 1000)),
+        **summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reviews-per-book", type=int, default=3)
+    parser.add_argument(
+        "--fields", help="Comma-separated sparse fieldset, as in ?fields="
+    )
+    args = parser.parse_args()
+
+    utils.setup()
+    with utils.test_database():
+        run(args.rows, args.repeat, args.reviews_per_book, args.fields)
+
+
+if __name__ == "__main__":
+    main()
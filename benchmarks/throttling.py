@@ -0,0 +1,87 @@
+"""
+Per-request overhead of a throttle check: DRF's timestamp-history throttle
+against the sliding window counters, with cache and SQLite counter stores.
+
+    python -m benchmarks.throttling --history 0 1000 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import utils
+
+
+def throttle_check(throttle_class, rate, history=0):
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIRequestFactory
+
+    request = APIRequestFactory().get("/books/")
+    request.user = get_user_model()(pk=1, username="bench")
+
+    throttle = throttle_class()
+    throttle.rate = rate
+    throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+    if history:
+        key = throttle.get_cache_key(request, None)
+        throttle.cache.set(key, [time.time()] * history, throttle.duration)
+
+    def check():
+        assert throttle.allow_request(request, None)
+
+    return check
+
+
+def run(history_sizes, repeat):
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from rest_framework import throttling
+    from core import throttling as sliding
+
+    rate = f"{max(history_sizes) + repeat + 1}/day"
+    rows = []
+    for history in history_sizes:
+        cache.clear()
+        samples = utils.measure(
+            throttle_check(throttling.UserRateThrottle, rate, history), repeat
+        )
+        rows.append({"throttle": f"drf (history={history})", **_summary(samples)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "sliding window (cache)": {"THROTTLE_STORE": "cache"},
+            "sliding window (sqlite)": {
+                "THROTTLE_STORE": "sqlite",
+                "THROTTLE_SQLITE_PATH": os.path.join(tmp, "throttle.db"),
+            },
+        }
+        for name, store_settings in stores.items():
+            cache.clear()
+            with override_settings(**store_settings):
+                check = throttle_check(sliding.UserRateThrottle, rate)
+                rows.append(
+                    {"throttle": name, **_summary(utils.measure(check, repeat))}
+                )
+    utils.print_table(rows)
+
+
+def _summary(samples):
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 10**6, 1),
+        "p99_us": round(utils.percentile(samples, 99) * 10**6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    utils.setup()
+    run(args.history, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
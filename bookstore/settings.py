@@ -1,6 +1,8 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,24 +14,44 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv("DEBUG")
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
+# Build request.user from access token claims instead of loading it from the
+# database on every request. Views that need the user row load it through a
+# small in-process cache (JWT_USER_CACHE_*).
+JWT_STATELESS_AUTH = os.getenv("JWT_STATELESS_AUTH", "").lower() in ("1", "true")
+
+# Render JSON with orjson, an optional dependency; see core.renderers.
+ORJSON_RENDERER = os.getenv("ORJSON_RENDERER", "").lower() in ("1", "true")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        (
+            "core.authentication.StatelessJWTAuthentication"
+            if JWT_STATELESS_AUTH
+            else "rest_framework_simplejwt.authentication.JWTAuthentication"
+        ),
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        (
+            "core.renderers.ORJSONRenderer"
+            if ORJSON_RENDERER
+            else "rest_framework.renderers.JSONRenderer"
+        ),
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_THROTTLE_CLASSES": (
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "core.throttling.AnonRateThrottle",
+        "core.throttling.UserRateThrottle",
     ),
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "100/day",
-        "user": "1000/day",
+        "anon": os.getenv("THROTTLE_RATE_ANON", "100/day"),
+        "user": os.getenv("THROTTLE_RATE_USER", "1000/day"),
     },
+    "EXCEPTION_HANDLER": "core.passwords.exception_handler",
 }
 
 SIMPLE_JWT = {
@@ -52,8 +74,13 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(days=1),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
+    "TOKEN_OBTAIN_SERIALIZER": "core.serializers.TokenObtainPairSerializer",
+    "TOKEN_USER_CLASS": "core.authentication.TokenUser",
 }
 
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", "1024"))
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "60"))
+
 # Application definition
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -62,12 +89,14 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework_simplejwt",
     "core",
     "drf_yasg",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -75,8 +104,21 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.RateLimitHeadersMiddleware",
+    "core.middleware.ReplicaReadsMiddleware",
 ]
 
+# Request metrics served at /metrics; see core.metrics. Only a share of
+# requests time their queries and phases, to keep the overhead low. Unless
+# DEBUG is on, /metrics is only served to scrapers holding METRICS_TOKEN.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true")
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0.1"))
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", str(DEBUG)).lower() in (
+    "1",
+    "true",
+)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 ROOT_URLCONF = "bookstore.urls"
 
 TEMPLATES = [
@@ -99,6 +141,11 @@ WSGI_APPLICATION = "bookstore.wsgi.application"
 
 
 # Database
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds ("none" for no limit,
+# 0 to close them after every request) and checked before a request reuses them.
+# Behind PgBouncer in transaction pooling mode, also set
+# DATABASE_DISABLE_SERVER_SIDE_CURSORS=True.
+DATABASE_CONN_MAX_AGE = os.getenv("DATABASE_CONN_MAX_AGE", "60")
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -107,8 +154,80 @@ DATABASES = {
         "NAME": os.getenv("DATABASE_NAME", ""),
         "USER": os.getenv("DATABASE_USER", ""),
         "PASSWORD": os.getenv("DATABASE_PASSWORD", ""),
+        "CONN_MAX_AGE": (
+            None
+            if DATABASE_CONN_MAX_AGE.lower() == "none"
+            else int(DATABASE_CONN_MAX_AGE)
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv("DATABASE_CONN_HEALTH_CHECKS", "true").lower()
+        in ("1", "true"),
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv(
+            "DATABASE_DISABLE_SERVER_SIDE_CURSORS", ""
+        ).lower()
+        in ("1", "true"),
+    }
+}
+
+# Read replicas, as comma-separated host[:port][/name] with the primary's
+# credentials; a database name lets another database on the same server stand in
+# for a replica locally. Safe requests to views with `replica_reads = True` read
+# from them; see core.routers.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(","))
+):
+    address, _, name = replica.partition("/")
+    host, _, port = address.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+# Users read from the primary for at least this long after writing, to see
+# their writes despite replication lag.
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "5"))
+# Replicas that refuse connections are skipped for this long.
+DATABASE_REPLICA_RETRY_SECONDS = int(
+    os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30")
+)
+
+
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several workers.
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),
     }
 }
+if CACHE_BACKEND.rsplit(".", 1)[-1] in ("LocMemCache", "FileBasedCache", "DatabaseCache"):
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "1000")),
+    }
+
+
+# Throttling counters live in THROTTLE_CACHE_ALIAS when that cache is shared
+# between workers, and otherwise in a SQLite file shared by the workers of a host.
+THROTTLE_CACHE_ALIAS = "default"
+THROTTLE_STORE = os.getenv(
+    "THROTTLE_STORE", "sqlite" if CACHE_BACKEND.endswith("LocMemCache") else "cache"
+)
+THROTTLE_SQLITE_PATH = os.getenv(
+    "THROTTLE_SQLITE_PATH",
+    os.path.join(tempfile.gettempdir(), "bookstore-throttle.sqlite3"),
+)
+
+TEST_RUNNER = "core.tests.runner.TestRunner"
 
 
 # Password validation
@@ -127,6 +246,38 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing; see core.passwords. New passwords are hashed with
+# PASSWORD_HASHER ("pbkdf2", "scrypt", or "argon2" after `pip install
+# argon2-cffi`), and existing ones again with it on the user's next login. At
+# most PASSWORD_HASHING_WORKERS hashes run at a time per process, with up to
+# PASSWORD_HASHING_QUEUE_SIZE more waiting; further logins and registrations
+# through the API get 503 with Retry-After: PASSWORD_HASHING_RETRY_AFTER.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+_PASSWORD_HASHERS = {
+    "pbkdf2": "core.passwords.PBKDF2PasswordHasher",
+    "scrypt": "core.passwords.ScryptPasswordHasher",
+    "argon2": "core.passwords.Argon2PasswordHasher",
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER must be one of {', '.join(_PASSWORD_HASHERS)}, "
+        f"not {PASSWORD_HASHER!r}."
+    )
+# The first one hashes new passwords; the others still check existing ones,
+# along with the rest of Django's default hashers. PBKDF2 with SHA1 is too weak
+# to hash new passwords, so it can't be chosen, only upgraded from.
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "core.passwords.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+# Django loads every upper case name, underscored or not, as a setting.
+del _PASSWORD_HASHERS
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "2"))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.getenv("PASSWORD_HASHING_QUEUE_SIZE", "8"))
+PASSWORD_HASHING_RETRY_AFTER = int(os.getenv("PASSWORD_HASHING_RETRY_AFTER", "1"))
+
 
 # Internationalization
 LANGUAGE_CODE = os.getenv("LANGUAGE_CODE", "en-us")
@@ -147,18 +298,91 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    # Book files, stored once per distinct content; see core.storage.
+    "books": {"BACKEND": "core.storage.ContentAddressedStorage"},
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 # Swagger auth
 SWAGGER_SETTINGS = {
+    "DEFAULT_INFO": "bookstore.urls.api_info",
+    "SPEC_URL": "schema-json",
     "SECURITY_DEFINITIONS": {
         "Bearer": {"type": "apiKey", "name": "Authorization", "in": "header"}
-    }
+    },
+}
+REDOC_SETTINGS = {
+    "SPEC_URL": "schema-json",
 }
 
+# The OpenAPI schema is generated once per code version: `SCHEMA_VERSION` if set
+# (e.g. to the release), otherwise a hash of the sources. `manage.py
+# generate_schema` writes it to SCHEMA_DIR at build time so that servers load it
+# instead of generating it.
+SCHEMA_VERSION = os.getenv("SCHEMA_VERSION", "")
+SCHEMA_DIR = Path(os.getenv("SCHEMA_DIR") or BASE_DIR / "openapi")
+
+
+# Book downloads are streamed by /books/{id}/download/, unless handed over to the
+# web server: "x-accel-redirect" (nginx) serves BOOK_DOWNLOAD_ACCEL_PREFIX followed
+# by the file name from an internal location, "x-sendfile" (Apache, lighttpd) the
+# file's absolute path.
+BOOK_DOWNLOAD_SENDFILE = os.getenv("BOOK_DOWNLOAD_SENDFILE", "")
+BOOK_DOWNLOAD_ACCEL_PREFIX = os.getenv(
+    "BOOK_DOWNLOAD_ACCEL_PREFIX", "/protected-media/"
+)
+
+# Chunks of book uploads in progress (/uploads/) are kept in this directory
+# until the upload is finalized.
+BOOK_UPLOAD_TEMP_DIR = os.getenv(
+    "BOOK_UPLOAD_TEMP_DIR", os.path.join(tempfile.gettempdir(), "bookstore-uploads")
+)
+
+# Rows fetched per round trip by the server-side cursor of catalogue exports
+# (/books/export/ and `manage.py export_books`).
+BOOK_EXPORT_CHUNK_SIZE = int(os.getenv("BOOK_EXPORT_CHUNK_SIZE", "2000"))
 
 # Book file validation rules
 BOOK_FILE_SIZE_LIMIT_MB = 5.0  # Size limit in megabytes
 BOOK_FILE_VALID_EXTENSIONS = [".pdf", ".doc"]
+
+# Page count, text and preview extraction of book files by `manage.py
+# process_books`. A failed job is retried BOOK_PROCESSING_RETRY_DELAY seconds
+# later, doubling with every attempt, up to BOOK_PROCESSING_MAX_ATTEMPTS
+# attempts; a job whose worker stopped responding is claimed again after
+# BOOK_PROCESSING_LEASE seconds.
+BOOK_PROCESSING_MAX_ATTEMPTS = int(os.getenv("BOOK_PROCESSING_MAX_ATTEMPTS", "3"))
+BOOK_PROCESSING_RETRY_DELAY = int(os.getenv("BOOK_PROCESSING_RETRY_DELAY", "60"))
+BOOK_PROCESSING_LEASE = int(os.getenv("BOOK_PROCESSING_LEASE", "600"))
+BOOK_PROCESSING_MAX_PAGES = 1000  # Pages whose text is extracted
+BOOK_PROCESSING_MAX_TEXT = 1_000_000  # Characters of text kept
+BOOK_PREVIEW_WIDTH = 400  # Pixels
+
+
+# Book listing
+BOOK_LIST_REVIEWS_LIMIT = 3  # Latest reviews embedded per book on list pages
+
+# Bayesian average ranking /books/top/: each book's ratings are averaged
+# together with BOOK_RATING_PRIOR_WEIGHT (> 0) virtual reviews rating
+# BOOK_RATING_PRIOR_MEAN. Run `manage.py rebuild_book_ratings` after changing
+# them.
+BOOK_RATING_PRIOR_MEAN = float(os.getenv("BOOK_RATING_PRIOR_MEAN", "2.5"))
+BOOK_RATING_PRIOR_WEIGHT = float(os.getenv("BOOK_RATING_PRIOR_WEIGHT", "10"))
+BOOK_TOP_LIMIT = 10  # Default number of books on /books/top/
+BOOK_TOP_MAX_LIMIT = 100
+
+# Reviews accepted in one /reviews/batch/ request
+REVIEW_BATCH_MAX_ITEMS = 100
+
+# Book response cache, invalidated whenever a book or one of its reviews changes
+BOOK_CACHE_ALIAS = "default"
+BOOK_CACHE_LIST_TIMEOUT = int(os.getenv("BOOK_CACHE_LIST_TIMEOUT", "60"))
+BOOK_CACHE_DETAIL_TIMEOUT = int(os.getenv("BOOK_CACHE_DETAIL_TIMEOUT", "300"))
@@ -1,6 +1,14 @@
 from django.urls import path, include
-from core.views import RegisterView, BookViewSet
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from core import async_views, metrics, schema
+from core.views import (
+    RegisterView,
+    BookViewSet,
+    BookUploadViewSet,
+    ReviewBatchView,
+    TokenObtainPairView,
+    TokenRefreshView,
+    UserReviewListView,
+)
 from rest_framework.routers import DefaultRouter
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
@@ -11,16 +19,21 @@ from django.conf.urls.static import static
 
 router = DefaultRouter()
 router.register("books", BookViewSet, basename="books")
+router.register("uploads", BookUploadViewSet, basename="uploads")
+
+api_info = openapi.Info(
+    title="BookStore API",
+    default_version="v1",
+    description="API documentation for the BookStore application",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="mohammedabdelawaldeveloper@gmail.com"),
+    license=openapi.License(name="BSD License"),
+)
 
+# Only serves the UI pages; they load the schema from /swagger.json, which is
+# generated once per code version by core.schema.
 schema_view = get_schema_view(
-    openapi.Info(
-        title="BookStore API",
-        default_version="v1",
-        description="API documentation for the BookStore application",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="mohammedabdelawaldeveloper@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
+    api_info,
     public=True,
     permission_classes=(permissions.AllowAny,),
     authentication_classes=[],  # Ensure no basic auth
@@ -31,12 +44,23 @@ urlpatterns = [
     # core system views
     path("", include(router.urls)),
     path("admin/", admin.site.urls),
+    path("reviews/batch/", ReviewBatchView.as_view(), name="reviews-batch"),
+    # ASGI-native book endpoints
+    path("async/books/", async_views.book_list, name="async-books-list"),
+    path("async/books/<int:pk>/", async_views.book_detail, name="async-books-detail"),
+    path(
+        "async/books/<int:pk>/add_review/",
+        async_views.add_review,
+        name="async-books-add-review",
+    ),
     path("user/register/", RegisterView.as_view(), name="register"),
     path("user/login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("user/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("user/reviews/", UserReviewListView.as_view(), name="user-reviews"),
+    path("metrics", metrics.metrics_view, name="metrics"),
     # swagger urls
-    path("swagger.json", schema_view.without_ui(cache_timeout=0), name="schema-json"),
-    path("swagger.yaml", schema_view.without_ui(cache_timeout=0), name="schema-yaml"),
+    path("swagger.json", schema.schema_view, {"format": "json"}, name="schema-json"),
+    path("swagger.yaml", schema.schema_view, {"format": "yaml"}, name="schema-yaml"),
     path(
         "swagger/",
         schema_view.with_ui("swagger", cache_timeout=0),
@@ -46,5 +70,7 @@ urlpatterns = [
 ]
 
 
-if settings.DEBUG:  # TODO handle production storage
+# Book files are served by /books/{id}/download/; this only serves direct media
+# links during development.
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
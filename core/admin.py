@@ -1,26 +1,70 @@
 from django.contrib import admin
-from .models import Book, Review
+from .filters import book_search_query
+from .models import Book, BookProcessingJob, BookUpload, Review
 
 
 class ReviewInline(admin.TabularInline):
     model = Review
     extra = 0
+    raw_id_fields = ("user",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("book", "user")
 
 
 class BookAdmin(admin.ModelAdmin):
     list_display = ("title", "author", "publish_date", "created_at")
     list_filter = ("author", "publish_date")
     search_fields = ("title", "author", "description")
+    show_full_result_count = False
     date_hierarchy = "publish_date"
+    readonly_fields = ("page_count", "preview")
     inlines = [ReviewInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the GIN-indexed search vector instead of ILIKE on each field.
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_vector=book_search_query(search_term)), False
+
 
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ("book", "user", "rating", "created_at")
+    list_select_related = ("book", "user")
+    raw_id_fields = ("book", "user")
     list_filter = ("rating", "created_at")
     search_fields = ("book__title", "user__username", "review_text")
+    show_full_result_count = False
     date_hierarchy = "created_at"
 
 
+class BookUploadAdmin(admin.ModelAdmin):
+    list_display = (
+        "filename",
+        "book",
+        "user",
+        "status",
+        "offset",
+        "size",
+        "updated_at",
+    )
+    list_select_related = ("book", "user")
+    raw_id_fields = ("book", "user")
+    list_filter = ("status",)
+    readonly_fields = ("offset", "status")
+    show_full_result_count = False
+
+
+class BookProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ("book", "file", "status", "attempts", "run_after", "updated_at")
+    list_select_related = ("book",)
+    raw_id_fields = ("book",)
+    list_filter = ("status",)
+    readonly_fields = ("attempts", "locked_until", "error")
+    show_full_result_count = False
+
+
 admin.site.register(Book, BookAdmin)
 admin.site.register(Review, ReviewAdmin)
+admin.site.register(BookUpload, BookUploadAdmin)
+admin.site.register(BookProcessingJob, BookProcessingJobAdmin)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.conf import settings
+        from . import metrics, signals  # noqa: F401
+
+        if settings.METRICS_ENABLED:
+            # Before any connection is opened, so that all of them time queries.
+            metrics.install()
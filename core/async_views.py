@@ -0,0 +1,274 @@
+"""
+ASGI-native versions of the book endpoints, served under /async/.
+
+They share querysets, serializers, pagination, caching and throttling with
+BookViewSet, but authenticate and query the database without holding a
+thread for the whole request, and stream list pages as rows arrive.
+
+DRF's APIView dispatches synchronously, so under ASGI Django runs every DRF
+view in a worker thread; these endpoints are plain async Django views for
+that reason, doing what APIView would for authentication, throttling and
+errors. Cache and throttle counter calls block, so they run in threads too.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from . import metrics
+from .authentication import StatelessJWTAuthentication, afull_user
+from .cache import (
+    cache_etag,
+    detail_cache_key,
+    etag_matches,
+    get_cache,
+    list_cache_key,
+)
+from .models import Book, Review
+from .pagination import KeysetCursorPagination
+from .reviews import ALREADY_REVIEWED
+from .serializers import ReviewSerializer
+from .views import BookViewSet
+
+UserModel = get_user_model()
+
+
+async def authenticate(request):
+    """
+    Set `request.user` from the request's access token, as the configured
+    JWT authentication class would.
+    """
+    request.user = AnonymousUser()
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if raw_token is None:
+        return
+    token = authentication.get_validated_token(raw_token)
+
+    if settings.JWT_STATELESS_AUTH:
+        request.user = StatelessJWTAuthentication().get_user(token)
+        return
+    try:
+        user = await UserModel.objects.aget(
+            **{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]}
+        )
+    except (KeyError, UserModel.DoesNotExist):
+        raise exceptions.AuthenticationFailed("User not found", code="user_not_found")
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise exceptions.AuthenticationFailed("User is inactive", code="user_inactive")
+    request.user = user
+
+
+@sync_to_async
+def check_throttles(request):
+    waits = []
+    for throttle in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle()
+        if not throttle.allow_request(request, None):
+            waits.append(throttle.wait())
+    if waits:
+        raise exceptions.Throttled(
+            max((w for w in waits if w is not None), default=None)
+        )
+
+
+def json_renderer():
+    # The JSON renderer BookViewSet uses; see ORJSON_RENDERER.
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def render(response):
+    response.accepted_renderer = json_renderer()
+    response.accepted_media_type = response.accepted_renderer.media_type
+    response.renderer_context = {}
+    return response.render()
+
+
+def api_endpoint(*methods, replica_reads=False):
+    """
+    Turn an async view into an authenticated, throttled API endpoint that
+    handles errors like DRF's APIView. With `replica_reads`, GET requests may
+    read from the replicas like BookViewSet's.
+    """
+
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                with metrics.phase("auth"):
+                    await authenticate(request)
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                with metrics.phase("throttle"):
+                    await check_throttles(request)
+                return await view(request, *args, **kwargs)
+            except Exception as exc:
+                if isinstance(
+                    exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+                ):
+                    exc.auth_header = JWTAuthentication().authenticate_header(request)
+                response = exception_handler(exc, {"request": request})
+                if response is None:
+                    raise
+                return render(response)
+
+        wrapper.replica_reads = replica_reads
+        return wrapper
+
+    return decorator
+
+
+def book_view(request, action, **kwargs):
+    """
+    A BookViewSet set up for `action`, to build querysets and serializers.
+    """
+    drf_request = Request(request, authenticators=())
+    drf_request.user = request.user
+    return BookViewSet(
+        request=drf_request, action=action, args=(), kwargs=kwargs, format_kwarg=None
+    )
+
+
+def not_modified(etag):
+    response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    response["ETag"] = etag
+    return response
+
+
+@api_endpoint("GET", "HEAD", replica_reads=True)
+async def book_list(request):
+    """
+    Page through books like `/books/`, streaming the page as it is read.
+    """
+    key = await sync_to_async(list_cache_key)(request)
+    etag = cache_etag(key)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = await get_cache().aget(key)
+    if body is None:
+        view = book_view(request, "list")
+        paginator = KeysetCursorPagination()
+        queryset = view.filter_queryset(view.get_queryset())
+        # Decoding the cursor may fail, so do it before the response starts.
+        queryset = paginator.get_page_queryset(queryset, view.request, view)
+        content = stream_page(view, paginator, queryset, key)
+        response = StreamingHttpResponse(content, content_type="application/json")
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    return response
+
+
+async def stream_page(view, paginator, queryset, cache_key):
+    renderer = json_renderer()
+    serializer = view.get_serializer()
+    chunks = []
+
+    def emit(chunk):
+        chunks.append(chunk)
+        return chunk
+
+    def render_book(book, first):
+        data = serializer.to_representation(book)
+        return (b"" if first else b",") + renderer.render(data)
+
+    yield emit(b'{"results":[')
+    results = []
+    async for book in queryset.aiterator(chunk_size=paginator.page_size + 1):
+        results.append(book)
+        # Pages read backwards are sent once complete, in order.
+        if not paginator.reverse and len(results) <= paginator.page_size:
+            yield emit(render_book(book, first=len(results) == 1))
+    page = paginator.set_page(results)
+    if paginator.reverse:
+        for index, book in enumerate(page):
+            yield emit(render_book(book, first=index == 0))
+    links = {
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+    }
+    yield emit(b"]," + renderer.render(links)[1:])
+
+    await get_cache().aset(
+        cache_key, b"".join(chunks), settings.BOOK_CACHE_LIST_TIMEOUT
+    )
+
+
+@api_endpoint("GET", "HEAD", replica_reads=True)
+async def book_detail(request, pk):
+    """
+    Retrieve a book like `/books/{id}/`.
+    """
+    key = await sync_to_async(detail_cache_key)(request, pk)
+    etag = cache_etag(key)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    cache = get_cache()
+    data = await cache.aget(key)
+    if data is None:
+        view = book_view(request, "retrieve", pk=pk)
+        try:
+            book = await view.get_queryset().aget(pk=pk)
+        except Book.DoesNotExist:
+            raise exceptions.NotFound()
+        data = view.get_serializer(book).data
+        await cache.aset(key, data, settings.BOOK_CACHE_DETAIL_TIMEOUT)
+    response = render(Response(data))
+    response["ETag"] = etag
+    return response
+
+
+@sync_to_async
+@transaction.atomic
+def create_review(**fields):
+    # The insert and the rating totals update done by its post_save signal
+    # commit together, as in BookViewSet.add_review.
+    return Review.objects.create(**fields)
+
+
+@api_endpoint("POST")
+async def add_review(request, pk):
+    """
+    Add a review to a book like `/books/{id}/add_review/`.
+    """
+    try:
+        book = await Book.objects.only("pk").aget(pk=pk)
+    except Book.DoesNotExist:
+        raise exceptions.NotFound()
+    data = Request(
+        request, parsers=[p() for p in api_settings.DEFAULT_PARSER_CLASSES]
+    ).data
+    serializer = ReviewSerializer(data=data)
+    if not serializer.is_valid():
+        return render(Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST))
+    user = await afull_user(request.user)
+    try:
+        review = await create_review(user=user, book=book, **serializer.validated_data)
+    except IntegrityError:
+        return render(
+            Response(
+                {"non_field_errors": [ALREADY_REVIEWED]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        )
+    return render(
+        Response(ReviewSerializer(review).data, status=status.HTTP_201_CREATED)
+    )
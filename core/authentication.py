@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import authentication, models
+from rest_framework_simplejwt.settings import api_settings
+
+UserModel = get_user_model()
+
+
+class UserCache:
+    """
+    A small in-process LRU cache of user rows. Entries expire after `ttl`
+    seconds, so that changes made through other workers are picked up.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                return entry[0]
+
+        user = UserModel.objects.filter(pk=user_id).first()
+        with self.lock:
+            self.entries[user_id] = (user, now + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return user
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+
+_user_cache = None
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(
+            settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL
+        )
+    return _user_cache
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    global _user_cache
+    if setting.startswith("JWT_USER_CACHE_"):
+        _user_cache = None
+
+
+class TokenUser(models.TokenUser):
+    """
+    A user built from access token claims, see TokenObtainPairSerializer.
+    """
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", True)
+
+    def get_user(self):
+        return get_user_cache().get(self.id)
+
+
+class StatelessJWTAuthentication(authentication.JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the token's claims instead of loading the
+    user on every request. Views that need the user row get it through
+    `full_user()`.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+def full_user(user):
+    """
+    Return the model instance behind `request.user`. Token users are loaded
+    through the user cache and checked again, since their account may have
+    changed since the token was issued.
+    """
+    if not isinstance(user, models.TokenUser):
+        return user
+    instance = user.get_user()
+    if instance is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if api_settings.CHECK_USER_IS_ACTIVE and not instance.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return instance
+
+
+async def afull_user(user):
+    """
+    Async version of `full_user()`.
+    """
+    if not isinstance(user, models.TokenUser):
+        return user
+    return await sync_to_async(full_user)(user)
@@ -0,0 +1,117 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from .routers import replica_reads
+
+BOOKS_VERSION_KEY = "books:version"
+BOOKS_GENERATION_KEY = "books:generation"
+
+
+def get_cache():
+    return caches[settings.BOOK_CACHE_ALIAS]
+
+
+def book_version_key(book_id):
+    return f"{BOOKS_VERSION_KEY}:{book_id}"
+
+
+def get_versions(*keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock rather than 1, so that a version evicted
+            # from the cache never comes back to match older entries.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_after_commit(*keys):
+    """
+    Bump versions right away, so that this transaction's own reads miss, and
+    again once it commits, so that nothing concurrent requests cached from the
+    old rows in between survives.
+    """
+    bump_versions(*keys)
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def invalidate_book(*book_ids):
+    """
+    Expire every cached list page and the cached detail of the given books.
+    """
+    bump_after_commit(BOOKS_VERSION_KEY, *map(book_version_key, book_ids))
+
+
+def invalidate_books():
+    """
+    Expire every cached book response, e.g. after a bulk update.
+    """
+    bump_after_commit(BOOKS_VERSION_KEY, BOOKS_GENERATION_KEY)
+
+
+def list_cache_key(request):
+    (version,) = get_versions(BOOKS_VERSION_KEY)
+    return _cache_key("list", version, request)
+
+
+def detail_cache_key(request, book_id):
+    versions = get_versions(BOOKS_GENERATION_KEY, book_version_key(book_id))
+    return _cache_key(f"detail:{book_id}", ".".join(map(str, versions)), request)
+
+
+def _cache_key(prefix, version, request):
+    # Responses embed absolute links, so the whole URL is part of the key.
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    # A replica that lags behind may cache rows older than `version`, so
+    # responses read from the replicas are kept apart from the primary's,
+    # which are all that requests pinned to the primary are served.
+    source = "replica" if settings.DATABASE_REPLICAS and replica_reads.get() else ""
+    return f"books:{prefix}:{version}:{source}{url}"
+
+
+def cache_etag(key):
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    return etag in parse_etags(request.headers.get("If-None-Match", ""))
+
+
+def cached_response(request, key, timeout, get_response):
+    """
+    Serve the data cached under `key`, or call `get_response` and cache the
+    data of a successful response. Requests whose `If-None-Match` matches the
+    current ETag get an empty 304 without touching the cache at all.
+    """
+    etag = cache_etag(key)
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    cache = get_cache()
+    data = cache.get(key)
+    if data is None:
+        response = get_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        cache.set(key, response.data, timeout)
+    else:
+        response = Response(data)
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,170 @@
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework.negotiation import DefaultContentNegotiation
+from . import storage
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Bytes read per chunk when the file is streamed from Python.
+CHUNK_SIZE = 64 * 1024
+
+
+class FileRange:
+    """
+    File-like view of `length` bytes of `file`, starting at `start`.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets a wsgi.file_wrapper use sendfile(): it starts at the current
+        # offset of the file and stops after Content-Length bytes.
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class IgnoreClientContentNegotiation(DefaultContentNegotiation):
+    """
+    Use the view's first renderer whatever the Accept header says, so that a
+    client asking for e.g. `application/pdf` doesn't get a 406 on downloads.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive `(start, end)` of a single byte range, or None when
+    the whole file should be sent. Multiple ranges are not supported and get
+    the whole file, as RFC 9110 allows. Raise ValueError when the range
+    can't be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if last and int(last) < start:
+            # Syntactically invalid, so ignored.
+            return None
+        raise ValueError(header)
+    return start, end
+
+
+def file_validators(fieldfile):
+    try:
+        modified = fieldfile.storage.get_modified_time(fieldfile.name)
+        # HTTP dates have a resolution of one second.
+        modified = int(modified.timestamp())
+    except (NotImplementedError, OSError):
+        modified = None
+    # Content-addressed files are tagged with their digest, which is the same
+    # on every server and for every book sharing the file.
+    version = storage.digest(fieldfile.name)
+    if version is None:
+        version = f"{fieldfile.name}:{fieldfile.size}:{modified}"
+        version = hashlib.md5(version.encode()).hexdigest()
+    return quote_etag(version), modified
+
+
+def if_range_passes(request, etag, modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        # Only strong validators may be compared, so a weak one never matches.
+        return parse_etags(if_range) == [etag] and not if_range.startswith("W/")
+    return modified is not None and parse_http_date_safe(if_range) == modified
+
+
+def serve_file(request, fieldfile, filename=None):
+    """
+    Respond with the content of `fieldfile`, in constant memory whatever its
+    size, named `filename`, by default the file's name. Supports conditional
+    requests and single byte ranges, or hands the file over to the web server
+    as configured by BOOK_DOWNLOAD_SENDFILE.
+    """
+    etag, modified = file_validators(fieldfile)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    if modified is not None:
+        headers["Last-Modified"] = http_date(modified)
+
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        response = _file_response(request, fieldfile, filename, etag, modified)
+    for header, value in headers.items():
+        response.headers.setdefault(header, value)
+    return response
+
+
+def _file_response(request, fieldfile, filename, etag, modified):
+    filename = filename or os.path.basename(fieldfile.name)
+    if settings.BOOK_DOWNLOAD_SENDFILE:
+        # The web server takes care of ranges and of the transfer itself.
+        content_type, _ = mimetypes.guess_type(filename)
+        response = HttpResponse(content_type=content_type or "application/octet-stream")
+        response.headers["Content-Disposition"] = content_disposition_header(
+            False, filename
+        )
+        if settings.BOOK_DOWNLOAD_SENDFILE == "x-accel-redirect":
+            location = settings.BOOK_DOWNLOAD_ACCEL_PREFIX + fieldfile.name
+            response.headers["X-Accel-Redirect"] = location
+        else:
+            response.headers["X-Sendfile"] = fieldfile.path
+        return response
+
+    size = fieldfile.size
+    byte_range = None
+    if "Range" in request.headers and if_range_passes(request, etag, modified):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+    fieldfile.open("rb")
+    if byte_range is None:
+        response = FileResponse(fieldfile.file, filename=filename)
+    else:
+        start, end = byte_range
+        content = FileRange(fieldfile.file, start, end - start + 1)
+        response = FileResponse(content, status=206, filename=filename)
+        response.headers["Content-Length"] = end - start + 1
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.block_size = CHUNK_SIZE
+    return response
@@ -0,0 +1,107 @@
+"""
+Extraction of the page count, plain text and first-page preview of book
+files.
+
+This runs in the worker processes of `manage.py process_books`, so it only
+works on paths and returns plain values, without touching Django. The tools
+are optional: PDFs are read with pypdf (`pip install pypdf`) and previewed
+with poppler's `pdftoppm`, DOC text is read with `antiword`. A missing tool
+fails the job, which is retried and can be run again once it is installed;
+a missing previewer only leaves out the preview.
+"""
+
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Seconds an external tool may run on a single file.
+TOOL_TIMEOUT = 120
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def extract(path, max_pages, max_text, preview_width):
+    """
+    Return the `page_count`, `text` (from the first `max_pages` pages, at
+    most `max_text` characters) and PNG `preview` bytes of the file at
+    `path`. Any of them may be None when the file type doesn't have it.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ExtractionError(f"No extractor for {extension} files.")
+    result = extractor(path, max_pages, max_text, preview_width)
+    if result["text"] is not None:
+        # PostgreSQL text can't hold NUL characters.
+        result["text"] = result["text"].replace("\x00", "")[:max_text]
+    return result
+
+
+def extract_pdf(path, max_pages, max_text, preview_width):
+    try:
+        import pypdf
+    except ImportError:
+        raise ExtractionError("pypdf is not installed.")
+    try:
+        reader = pypdf.PdfReader(path)
+        texts = []
+        length = 0
+        for page in itertools.islice(reader.pages, max_pages):
+            text = page.extract_text() or ""
+            texts.append(text)
+            length += len(text)
+            if length >= max_text:
+                break
+        page_count = len(reader.pages)
+    except pypdf.errors.PyPdfError as e:
+        raise ExtractionError(f"Unreadable PDF: {e}")
+    return {
+        "page_count": page_count,
+        "text": "\n\n".join(texts),
+        "preview": render_pdf_preview(path, preview_width),
+    }
+
+
+def render_pdf_preview(path, width):
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "preview")
+        run_tool(
+            [pdftoppm, "-f", "1", "-l", "1", "-singlefile", "-png"]
+            + ["-scale-to-x", str(width), "-scale-to-y", "-1", path, output]
+        )
+        with open(f"{output}.png", "rb") as f:
+            return f.read()
+
+
+def extract_doc(path, max_pages, max_text, preview_width):
+    antiword = shutil.which("antiword")
+    if antiword is None:
+        raise ExtractionError("antiword is not installed.")
+    text = run_tool([antiword, path]).decode("utf-8", "replace")
+    return {"page_count": None, "text": text, "preview": None}
+
+
+def run_tool(command):
+    try:
+        result = subprocess.run(
+            command, capture_output=True, check=True, timeout=TOOL_TIMEOUT
+        )
+    except subprocess.CalledProcessError as e:
+        error = e.stderr.decode("utf-8", "replace").strip()
+        raise ExtractionError(f"{os.path.basename(command[0])} failed: {error}")
+    except subprocess.TimeoutExpired:
+        raise ExtractionError(f"{os.path.basename(command[0])} timed out.")
+    return result.stdout
+
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".doc": extract_doc,
+}
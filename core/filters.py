@@ -0,0 +1,46 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework.filters import BaseFilterBackend
+
+
+def book_search_query(terms):
+    """
+    Parse user input with web search syntax ("quoted phrases", or, -exclude)
+    against the configuration of `Book.search_vector`.
+    """
+    return SearchQuery(terms, search_type="websearch", config="english")
+
+
+class BookSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over title, author and description, annotating each match
+    with its `search_rank`.
+    """
+
+    search_param = "q"
+
+    @classmethod
+    def get_search_terms(cls, request):
+        return request.query_params.get(cls.search_param, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        query = book_search_query(terms)
+        # ts_rank() returns a real; widen it so that rank values round-trip
+        # exactly through pagination cursors.
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(search_rank=rank)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search over title, author and description.",
+                "schema": {"type": "string"},
+            },
+        ]
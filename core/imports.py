@@ -0,0 +1,138 @@
+"""
+Bulk book imports for `manage.py import_books`.
+
+Rows are read from CSV or NDJSON one batch at a time, validated with the
+model fields' own validators but without the per-row queries of
+`full_clean`, and upserted on the books' natural key (title, author,
+publish_date), each batch in its own transaction.
+"""
+
+import csv
+import io
+import itertools
+import json
+import operator
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+from .models import Book
+
+IMPORT_FIELDS = ["title", "author", "description", "publish_date"]
+NATURAL_KEY = ["title", "author", "publish_date"]
+# Columns an imported row overwrites on an existing book.
+UPDATE_FIELDS = ["description"]
+
+FORMATS = ["csv", "ndjson"]
+
+
+def read_rows(f, format):
+    """
+    Yield `(line number, record)` for each row of the text stream `f`.
+    `record` is None for NDJSON lines that are not valid JSON.
+    """
+    if format == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def clean_record(record):
+    if not isinstance(record, dict):
+        raise ValidationError({"row": "Not a JSON object."})
+    values, errors = {}, {}
+    for name in IMPORT_FIELDS:
+        value = record.get(name)
+        if value in (None, ""):
+            errors[name] = ["This field is required."]
+            continue
+        try:
+            values[name] = Book._meta.get_field(name).clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    if timezone.is_naive(values["publish_date"]):
+        values["publish_date"] = timezone.make_aware(values["publish_date"])
+    return values
+
+
+def validate_batch(rows):
+    """
+    Clean a batch of `(line number, record)` rows. Return the field values of
+    the valid ones, the last row winning among rows with the same natural key,
+    and the `(line number, message dict)` of the invalid ones.
+    """
+    books, errors = {}, []
+    for number, record in rows:
+        try:
+            values = clean_record(record)
+        except ValidationError as e:
+            errors.append((number, e.message_dict))
+            continue
+        key = tuple(values[name] for name in NATURAL_KEY)
+        books[key] = values
+    return list(books.values()), errors
+
+
+def bulk_upsert(books):
+    Book.objects.bulk_create(
+        [Book(**values) for values in books],
+        update_conflicts=True,
+        unique_fields=NATURAL_KEY,
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def copy_upsert(books):
+    """
+    Upsert `books` with PostgreSQL's COPY into a temporary table, then a
+    single INSERT ... ON CONFLICT from it. Must run in a transaction.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(map(operator.itemgetter(*IMPORT_FIELDS), books))
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(map(quote, IMPORT_FIELDS))
+    key = ", ".join(map(quote, NATURAL_KEY))
+    updates = ", ".join(f"{quote(f)} = EXCLUDED.{quote(f)}" for f in UPDATE_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE book_import (title varchar(255), "
+            "author varchar(255), description text, publish_date timestamptz) "
+            "ON COMMIT DROP"
+        )
+        cursor.copy_expert(
+            f"COPY book_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        cursor.execute(
+            f"INSERT INTO {quote(Book._meta.db_table)} "
+            f"({columns}, created_at, review_count, rating_sum, file, file_sha256) "
+            f"SELECT {columns}, %s, 0, 0, '', '' FROM book_import "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}",
+            [timezone.now()],
+        )
+        # Dropped now in case the caller's transaction goes on.
+        cursor.execute("DROP TABLE book_import")
+
+
+METHODS = {
+    "bulk": bulk_upsert,
+    "copy": copy_upsert,
+}
@@ -0,0 +1,63 @@
+import codecs
+
+from django.core.management.base import BaseCommand, CommandError
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Stream the book catalogue as NDJSON or CSV, like /books/export/."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=list(exports.CONTENT_TYPES), default="ndjson"
+        )
+        parser.add_argument(
+            "--since",
+            help="Only export books created at or after this ISO 8601 date.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write the export to; standard output by default.",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the export with gzip."
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since is not None:
+            try:
+                since = exports.parse_since(since)
+            except ValueError as e:
+                raise CommandError(e)
+
+        chunks = exports.export_chunks(options["format"], since, options["gzip"])
+        if options["output"] == "-":
+            buffer = getattr(self.stdout, "buffer", None)
+            if buffer is not None:
+                self.write(buffer, chunks)
+            elif options["gzip"]:
+                raise CommandError("Write compressed exports to a file with --output.")
+            else:
+                # A text stream, e.g. call_command(stdout=StringIO()).
+                self.write_text(chunks)
+            return
+        with open(options["output"], "wb") as f:
+            self.write(f, chunks)
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported the catalogue to {options['output']}")
+        )
+
+    def write(self, f, chunks):
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+
+    def write_text(self, chunks):
+        # Chunks may end in the middle of a character.
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in chunks:
+            self.stdout.write(decoder.decode(chunk), ending="")
+        self.stdout.write(decoder.decode(b"", final=True), ending="")
+        self.stdout.flush()
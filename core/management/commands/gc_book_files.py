@@ -0,0 +1,81 @@
+import itertools
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core import storage
+from core.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored book files and previews that no book references any "
+        "more, along with temporary files left by interrupted saves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of files whose references are checked per query.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help=(
+                "Keep files modified less than this many seconds ago, which "
+                "may belong to books being saved."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the files that would be deleted without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = freed = 0
+        for field_name in ("file", "preview"):
+            for name, size in self.collect(field_name, options):
+                deleted += 1
+                freed += size
+
+        action = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {deleted} files ({freed} bytes)")
+        )
+
+    def collect(self, field_name, options):
+        """
+        Delete the unreferenced files of the Book field `field_name`, and yield
+        their names and sizes.
+        """
+        field = Book._meta.get_field(field_name)
+        files = field.storage
+        directory = field.upload_to.rstrip("/")
+        if not files.exists(directory):
+            return
+
+        names = storage.walk(files, directory)
+        while batch := [*itertools.islice(names, options["batch_size"])]:
+            referenced = set(
+                Book.objects.filter(**{f"{field_name}__in": batch}).values_list(
+                    field_name, flat=True
+                )
+            )
+            for name in batch:
+                if name in referenced:
+                    continue
+                # Checked last: saving content that is already stored
+                # refreshes the file's modification time.
+                cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+                if files.get_modified_time(name) > cutoff:
+                    continue
+                size = files.size(name)
+                if options["verbosity"] > 1 or options["dry_run"]:
+                    self.stdout.write(name)
+                if not options["dry_run"]:
+                    files.delete(name)
+                yield name, size
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into SCHEMA_DIR, so that servers of the same "
+        "code version serve it without introspecting the API."
+    )
+
+    def handle(self, *args, **options):
+        for path in schema.write_artifacts():
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
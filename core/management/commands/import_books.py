@@ -0,0 +1,94 @@
+import gzip
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import imports
+from core.cache import invalidate_books
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from CSV or NDJSON, updating the description of books "
+        "that already exist with the same title, author and publish date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="File to import, optionally gzipped; - for standard input."
+        )
+        parser.add_argument(
+            "--format",
+            choices=imports.FORMATS,
+            help="Format of the file; guessed from its extension by default.",
+        )
+        parser.add_argument(
+            "--method",
+            choices=list(imports.METHODS),
+            default="copy",
+            help="Insert with COPY (default) or with bulk_create.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of rows validated and inserted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or self.guess_format(path)
+        upsert = imports.METHODS[options["method"]]
+
+        imported = invalid = 0
+        start = time.perf_counter()
+        with self.open(path) as f:
+            rows = imports.read_rows(f, format)
+            for number, batch in enumerate(
+                imports.batched(rows, options["batch_size"]), 1
+            ):
+                batch_start = time.perf_counter()
+                books, errors = imports.validate_batch(batch)
+                with transaction.atomic():
+                    upsert(books)
+                elapsed = time.perf_counter() - batch_start
+
+                imported += len(books)
+                invalid += len(errors)
+                for line, messages in errors:
+                    for field, field_errors in messages.items():
+                        self.stderr.write(
+                            f"Line {line}: {field}: {' '.join(field_errors)}"
+                        )
+                if options["verbosity"] > 0:
+                    self.stdout.write(
+                        f"Batch {number}: {len(batch)} rows in {elapsed:.2f}s "
+                        f"({len(batch) / elapsed:.0f} rows/s)"
+                    )
+
+        invalidate_books()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} books in {elapsed:.1f}s "
+                f"({imported / elapsed:.0f} books/s), skipped {invalid} invalid rows"
+            )
+        )
+
+    def guess_format(self, path):
+        name = path.removesuffix(".gz")
+        extension = os.path.splitext(name)[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".ndjson", ".jsonl", ".json"):
+            return "ndjson"
+        raise CommandError(f"Cannot tell the format of {path}, use --format.")
+
+    def open(self, path):
+        if path == "-":
+            return open(sys.stdin.fileno(), encoding="utf-8", newline="", closefd=False)
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", newline="")
+        return open(path, encoding="utf-8", newline="")
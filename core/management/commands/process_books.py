@@ -0,0 +1,66 @@
+import os
+
+from django.core.management.base import BaseCommand
+from core import processing
+from core.models import BookProcessingJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract the page count, text and preview of queued book files, in a "
+        "pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help=(
+                "Number of files processed at a time, each in its own process; "
+                "0 processes them one at a time in this process."
+            ),
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First queue every book file that was never queued.",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep waiting for new jobs instead of exiting once none is due.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds between checks for new jobs.",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            queued = processing.enqueue_unprocessed()
+            self.stdout.write(f"Queued {queued} books")
+
+        counts = {BookProcessingJob.Status.DONE: 0, BookProcessingJob.Status.FAILED: 0}
+
+        def on_job(job):
+            if job.status in counts:
+                counts[job.status] += 1
+            if job.error and options["verbosity"] > 0:
+                self.stderr.write(f"{job}: {job.error}")
+            elif options["verbosity"] > 1:
+                self.stdout.write(f"{job}: {job.status}")
+
+        processing.process(
+            options["workers"],
+            watch=options["watch"],
+            poll_interval=options["poll_interval"],
+            on_job=on_job,
+        )
+        done = counts[BookProcessingJob.Status.DONE]
+        failed = counts[BookProcessingJob.Status.FAILED]
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {done} books, {failed} failed")
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from core import ratings
+from core.cache import invalidate_books
+from core.models import Book, Review
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized review count and rating sum of every book, "
+        "and the rating histograms and Bayesian averages of the leaderboard."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of book ids updated per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+        review_count = Subquery(reviews.annotate(total=Count("pk")).values("total"))
+        rating_sum = Subquery(reviews.annotate(total=Sum("rating")).values("total"))
+
+        last_id = Book.objects.aggregate(last=Max("pk"))["last"] or 0
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            books = Book.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+            with transaction.atomic():
+                updated += books.update(
+                    review_count=Coalesce(review_count, 0),
+                    rating_sum=Coalesce(rating_sum, 0),
+                )
+                ratings.rebuild_rating_stats(books)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Rebuilt books up to id {start + batch_size - 1}")
+
+        invalidate_books()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rating totals of {updated} books")
+        )
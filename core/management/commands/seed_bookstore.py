@@ -0,0 +1,89 @@
+import time
+
+import factory
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import factories, seeding
+from core.cache import invalidate_books
+from core.models import Book
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Add generated users, and books reviewed by them, for load tests and "
+        "benchmarks. From the same starting data, the same --seed generates the "
+        "same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--reviews-per-book",
+            type=int,
+            default=5,
+            help="Number of users reviewing each book, at most --users.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of users, or books, inserted per transaction.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--password",
+            default=factories.PASSWORD,
+            help="Password of every generated user.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reviews_per_book"] > options["users"]:
+            raise CommandError("--reviews-per-book can't be more than --users.")
+        # Seeded from what's already there too, so that seeding again adds
+        # different books and users rather than conflicting with the first.
+        existing = (Book.objects.count(), UserModel.objects.count())
+        factory.random.reseed_random(f"{options['seed']}:{existing}")
+        # Usernames carry on from the last generated one.
+        factories.UserFactory.reset_sequence(seeding.next_username_number())
+        start = time.perf_counter()
+
+        user_ids = []
+        for count in batches(options["users"], options["batch_size"]):
+            with transaction.atomic():
+                user_ids += seeding.create_users(count, options["password"])
+        self.progress(options, f"Created {len(user_ids)} users", start)
+
+        reviews = books = 0
+        for count in batches(options["books"], options["batch_size"]):
+            with transaction.atomic():
+                reviews += seeding.create_books(
+                    count, user_ids, options["reviews_per_book"]
+                )
+            books += count
+            self.progress(options, f"Created {books} books", start)
+        invalidate_books()
+
+        elapsed = time.perf_counter() - start
+        rows = len(user_ids) + books + reviews
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(user_ids)} users, {books} books and {reviews} "
+                f"reviews in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)"
+            )
+        )
+
+    def progress(self, options, message, start):
+        if options["verbosity"] > 1:
+            self.stdout.write(f"{message} ({time.perf_counter() - start:.1f}s)")
+
+
+def batches(total, size):
+    """
+    The sizes of the batches `total` rows are inserted in.
+    """
+    for start in range(0, total, size):
+        yield min(size, total - start)
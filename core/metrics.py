@@ -0,0 +1,305 @@
+"""
+In-process request metrics, exposed in the Prometheus text format at
+`/metrics`.
+
+MetricsMiddleware records the wall time, status and response size of every
+request. A `METRICS_SAMPLE_RATE` share of requests are sampled: they also
+count and time their SQL queries, and time authentication, throttling,
+serialization and rendering, in views using MetricsMixin and serializers
+using TimedSerializerMixin. Phases may overlap, e.g. queries run by a
+serializer count towards both `db` and `serialize`.
+
+Each process keeps its own metrics, so scrape every worker, or run one worker
+per metrics port.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.response import Response
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)  # fmt: skip
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The Sample of the current request, or None when it isn't sampled.
+current = contextvars.ContextVar("metrics_sample", default=None)
+
+
+def escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Label values -> [count per bucket..., count above the last, sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self.lock:
+            series = sorted(
+                (labels, [*values]) for labels, values in self.series.items()
+            )
+        names = [*self.labels, "le"]
+        for labels, values in series:
+            count = 0
+            for bound, value in zip([*self.buckets, "+Inf"], values):
+                count += value
+                le = format_labels(names, [*labels, bound])
+                yield f"{self.name}_bucket{le} {count}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {values[-1]}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {count}"
+
+
+responses = Counter(
+    "bookstore_responses_total",
+    "Responses by view, method and status code.",
+    ("view", "method", "status"),
+)
+request_duration = Histogram(
+    "bookstore_request_duration_seconds",
+    "Wall time of requests, until the response headers are ready.",
+    ("view", "method"),
+    DURATION_BUCKETS,
+)
+response_size = Histogram(
+    "bookstore_response_size_bytes",
+    "Size of response bodies, leaving out streaming responses.",
+    ("view",),
+    SIZE_BUCKETS,
+)
+phase_duration = Histogram(
+    "bookstore_request_phase_seconds",
+    "Time sampled requests spent in each phase: db, auth, throttle, "
+    "serialize and render.",
+    ("view", "phase"),
+    DURATION_BUCKETS,
+)
+request_queries = Histogram(
+    "bookstore_request_queries",
+    "SQL queries run by sampled requests.",
+    ("view",),
+    QUERY_BUCKETS,
+)
+REGISTRY = [responses, request_duration, response_size, phase_duration, request_queries]
+
+
+class Sample:
+    """
+    The phase timings of a sampled request.
+    """
+
+    __slots__ = ("durations", "queries", "active")
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+        # Phases being timed, so that nested calls are only timed once.
+        self.active = set()
+
+    def add(self, phase, duration):
+        self.durations[phase] = self.durations.get(phase, 0.0) + duration
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Time the enclosed block as the `name` phase of a sampled request.
+    """
+    sample = current.get()
+    if sample is None or name in sample.active:
+        yield
+        return
+    sample.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.active.discard(name)
+        sample.add(name, time.perf_counter() - start)
+
+
+def time_queries(execute, sql, params, many, context):
+    sample = current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.add("db", time.perf_counter() - start)
+
+
+def instrument_connection(connection, **kwargs):
+    # Persistent connections send connection_created on every reconnection.
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+class MetricsMixin:
+    """
+    APIView mixin timing authentication, throttling and rendering as phases
+    of sampled requests.
+    """
+
+    def perform_authentication(self, request):
+        with phase("auth"):
+            super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        with phase("throttle"):
+            super().check_throttles(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if current.get() is not None and isinstance(response, Response):
+            # Rendered here rather than by the handler, to be timed.
+            with phase("render"):
+                response.render()
+        return response
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin timing `.data` as the `serialize` phase of sampled
+    requests.
+    """
+
+    @property
+    def data(self):
+        with phase("serialize"):
+            return super().data
+
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def install():
+    """
+    Time the queries of every connection. Called when the app is ready if
+    METRICS_ENABLED.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(instrument_connection)
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+        _installed = True
+
+
+def start_request():
+    """
+    Start sampling the current request, or not. Pass the returned token to
+    `finish_request()`.
+    """
+    sample = Sample() if random.random() < settings.METRICS_SAMPLE_RATE else None
+    return current.set(sample)
+
+
+def finish_request(token, request, response, duration):
+    """
+    Record the current request, then add its Server-Timing header if enabled.
+    """
+    sample = current.get()
+    current.reset(token)
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match is not None else "unmatched"
+
+    responses.inc(view, request.method, response.status_code)
+    request_duration.observe(duration, view, request.method)
+    if not response.streaming:
+        response_size.observe(len(response.content), view)
+    if sample is not None:
+        request_queries.observe(sample.queries, view)
+        for name, value in sample.durations.items():
+            phase_duration.observe(value, view, name)
+
+    if settings.METRICS_SERVER_TIMING:
+        timings = [f"app;dur={duration * 1000:.3f}"]
+        if sample is not None:
+            for name, value in sample.durations.items():
+                timings.append(f"{name};dur={value * 1000:.3f}")
+            timings.append(f'queries;desc="{sample.queries}"')
+        response["Server-Timing"] = ", ".join(timings)
+    return response
+
+
+def render():
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+def metrics_view(request):
+    """
+    Serve the metrics of this process to scrapers holding `METRICS_TOKEN` as
+    a bearer token. Without a token, they are only served when DEBUG is on.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,118 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from . import metrics, routers
+from .routers import replica_reads
+
+
+class MetricsMiddleware:
+    """
+    Record request metrics and add a Server-Timing header (see core.metrics).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        token = metrics.start_request()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+        return metrics.finish_request(token, request, response, duration)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        token = metrics.start_request()
+        response = await self.get_response(request)
+        duration = time.perf_counter() - start
+        return metrics.finish_request(token, request, response, duration)
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Add X-RateLimit-* headers from the throttle that applied to the request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    def add_headers(self, request, response):
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = rate_limit["limit"]
+            response["X-RateLimit-Remaining"] = rate_limit["remaining"]
+            response["X-RateLimit-Reset"] = rate_limit["reset"]
+        return response
+
+
+class ReplicaReadsMiddleware:
+    """
+    Let GET and HEAD requests to views with `replica_reads = True` read from
+    the replicas, unless the user recently wrote, and pin users who write to
+    the primary (see core.routers).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Every request starts on the primary, whatever a previous request
+        # served by the same thread did.
+        replica_reads.set(False)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin_writer(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin_writer(request, await self.get_response(request))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "cls", view_func)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in ("GET", "HEAD")
+            and getattr(view, "replica_reads", False)
+            and not routers.is_pinned(request)
+        ):
+            replica_reads.set(True)
+
+    def pin_writer(self, request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+        ):
+            # Views authenticating with tokens set the user on the request.
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                routers.pin(user.pk)
+        return response
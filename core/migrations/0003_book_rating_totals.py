@@ -0,0 +1,62 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:59
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_totals(apps, schema_editor):
+    Book = apps.get_model("core", "Book")
+    Review = apps.get_model("core", "Review")
+    reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    Book.objects.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count("pk")).values("total")), 0
+        ),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_alter_book_options_alter_book_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="average_rating",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(review_count=0, then=models.Value(0.0)),
+                    default=django.db.models.expressions.CombinedExpression(
+                        django.db.models.functions.comparison.Cast(
+                            models.F("rating_sum"), models.FloatField()
+                        ),
+                        "/",
+                        django.db.models.functions.comparison.Cast(
+                            models.F("review_count"), models.FloatField()
+                        ),
+                    ),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
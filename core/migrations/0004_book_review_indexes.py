@@ -0,0 +1,61 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:01
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps the
+    # tables writable while the indexes are built.
+    atomic = False
+
+    dependencies = [
+        ("core", "0003_book_rating_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(
+                fields=["-publish_date", "-id"], name="book_publish_date_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="book_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(
+                fields=["-average_rating", "-id"], name="book_avg_rating_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(
+                fields=["-review_count", "-id"], name="book_review_count_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(fields=["author"], name="book_author_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="review",
+            index=models.Index(
+                fields=["book", "-created_at", "-id"], name="review_book_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="review",
+            index=models.Index(fields=["rating"], name="review_rating_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="review",
+            index=models.Index(fields=["created_at"], name="review_created_at_idx"),
+        ),
+    ]
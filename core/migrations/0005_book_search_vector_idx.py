@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps the
+    # books table writable while the index is built. It is the only operation
+    # here, so a failed build can be retried once the invalid index is dropped.
+    atomic = False
+
+    dependencies = [
+        ("core", "0005_book_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="book_search_vector_idx"
+            ),
+        ),
+    ]
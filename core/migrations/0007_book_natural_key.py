@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The unique index is built with CREATE INDEX CONCURRENTLY, which cannot
+    # run inside a transaction and keeps the books table writable, and then
+    # becomes the constraint. If a duplicate book is created while the index
+    # is built, the build fails: drop the invalid index and migrate again.
+    atomic = False
+
+    dependencies = [
+        ("core", "0007_merge_duplicate_books"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "book_natural_key" '
+                    'ON "core_book" ("title", "author", "publish_date")',
+                    'DROP INDEX CONCURRENTLY IF EXISTS "book_natural_key"',
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "core_book" ADD CONSTRAINT "book_natural_key" '
+                    'UNIQUE USING INDEX "book_natural_key"',
+                    'ALTER TABLE "core_book" DROP CONSTRAINT "book_natural_key"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="book",
+                    constraint=models.UniqueConstraint(
+                        fields=("title", "author", "publish_date"),
+                        name="book_natural_key",
+                    ),
+                ),
+            ],
+        ),
+    ]
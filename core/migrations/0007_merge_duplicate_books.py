@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-18 13:41
+
+from django.db import migrations
+from django.db.models import Count, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_books(apps, schema_editor):
+    """
+    Merge books sharing a title, author and publish date into the oldest of
+    them, before book_natural_key makes them unique.
+    """
+    Book = apps.get_model("core", "Book")
+    BookUpload = apps.get_model("core", "BookUpload")
+    Review = apps.get_model("core", "Review")
+
+    duplicates = (
+        Book.objects.order_by()
+        .values("title", "author", "publish_date")
+        .annotate(keep=Min("pk"), books=Count("pk"))
+        .filter(books__gt=1)
+    )
+    kept = []
+    for group in duplicates.iterator():
+        book = Book.objects.get(pk=group["keep"])
+        others = Book.objects.filter(
+            title=group["title"],
+            author=group["author"],
+            publish_date=group["publish_date"],
+        ).exclude(pk=book.pk)
+        for other in others.order_by("pk"):
+            # A user keeps the review they wrote of the oldest book.
+            Review.objects.filter(book=other).exclude(
+                user__in=Review.objects.filter(book=book).values("user")
+            ).update(book=book)
+            BookUpload.objects.filter(book=other).update(book=book)
+            if not book.file and other.file:
+                book.file = other.file
+                book.file_sha256 = other.file_sha256
+                book.save(update_fields=["file", "file_sha256"])
+        others.delete()
+        kept.append(book.pk)
+
+    reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    Book.objects.filter(pk__in=kept).update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count("pk")).values("total")), 0
+        ),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_book_uploads"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_books, migrations.RunPython.noop),
+    ]
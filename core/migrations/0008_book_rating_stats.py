@@ -0,0 +1,82 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    BookRatingStats = apps.get_model("core", "BookRatingStats")
+    Review = apps.get_model("core", "Review")
+    prior_weight = settings.BOOK_RATING_PRIOR_WEIGHT
+    prior_sum = prior_weight * settings.BOOK_RATING_PRIOR_MEAN
+    reviews = (
+        Review.objects.order_by()
+        .values("book_id")
+        .annotate(
+            **{
+                f"rating_{rating}": Count("pk", filter=Q(rating=rating))
+                for rating in range(0, 6)
+            },
+            review_count=Count("pk"),
+            rating_sum=Sum("rating"),
+        )
+    )
+    BookRatingStats.objects.bulk_create(
+        (
+            BookRatingStats(
+                **row,
+                bayesian_average=(prior_sum + row["rating_sum"])
+                / (prior_weight + row["review_count"]),
+            )
+            for row in reviews.iterator()
+        ),
+        batch_size=10000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_book_natural_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRatingStats",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_stats",
+                        serialize=False,
+                        to="core.book",
+                    ),
+                ),
+                ("rating_0", models.IntegerField(default=0)),
+                ("rating_1", models.IntegerField(default=0)),
+                ("rating_2", models.IntegerField(default=0)),
+                ("rating_3", models.IntegerField(default=0)),
+                ("rating_4", models.IntegerField(default=0)),
+                ("rating_5", models.IntegerField(default=0)),
+                ("review_count", models.IntegerField(default=0)),
+                ("rating_sum", models.IntegerField(default=0)),
+                ("bayesian_average", models.FloatField(default=0)),
+            ],
+            options={
+                "verbose_name": "Book rating stats",
+                "verbose_name_plural": "Book rating stats",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("review_count__gt", 0)),
+                        fields=["-bayesian_average", "-review_count", "book"],
+                        name="book_rating_stats_top_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
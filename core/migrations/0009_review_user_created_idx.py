@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:29
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps the
+    # reviews table writable while the index is built.
+    atomic = False
+
+    dependencies = [
+        ("core", "0008_book_rating_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="review",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="review_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:40
+
+import core.storage
+import core.validators
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps the
+    # books table writable while the index is built.
+    atomic = False
+
+    dependencies = [
+        ("core", "0009_review_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="book",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=core.storage.book_storage,
+                upload_to="books/",
+                validators=[
+                    core.validators.validate_file_extension,
+                    core.validators.validate_file_size,
+                    core.validators.validate_file_content,
+                ],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(
+                condition=models.Q(("file", ""), _negated=True),
+                fields=["file"],
+                name="book_file_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:44
+
+import core.storage
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_book_file_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookProcessingJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file", models.CharField(max_length=100)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Book processing job",
+                "verbose_name_plural": "Book processing jobs",
+            },
+        ),
+        migrations.CreateModel(
+            name="BookText",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="text",
+                        serialize=False,
+                        to="core.book",
+                    ),
+                ),
+                ("text", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Book text",
+                "verbose_name_plural": "Book texts",
+            },
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="page_count",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="preview",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                null=True,
+                storage=core.storage.book_storage,
+                upload_to="previews/",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                condition=models.Q(("preview__isnull", False)),
+                fields=["preview"],
+                name="book_preview_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookprocessingjob",
+            name="book",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="processing_jobs",
+                to="core.book",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookprocessingjob",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "running"])),
+                fields=["run_after"],
+                name="book_processing_queue_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="bookprocessingjob",
+            constraint=models.UniqueConstraint(
+                fields=("book", "file"), name="book_processing_job_file"
+            ),
+        ),
+    ]
@@ -1,23 +1,74 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from core.validators import validate_file_extension, validate_file_size
+from django.utils import timezone
+from core.storage import book_storage
+from core.validators import (
+    validate_file_content,
+    validate_file_extension,
+    validate_file_size,
+)
 
 UserModel = get_user_model()
 
+# The ratings a review can give.
+RATINGS = range(0, 6)
+
 
 class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     description = models.TextField()
+    # Named after the SHA-256 of their content and shared by books with the
+    # same file; see core.storage.
     file = models.FileField(
         upload_to="books/",
+        storage=book_storage,
         null=True,
         blank=True,
-        validators=[validate_file_extension, validate_file_size],
+        validators=[validate_file_extension, validate_file_size, validate_file_content],
+    )
+    # SHA-256 of the file, set when it is uploaded through a BookUpload.
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Extracted from the file in the background by `manage.py process_books`,
+    # along with its BookText; see core.processing.
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    preview = models.FileField(
+        upload_to="previews/",
+        storage=book_storage,
+        null=True,
+        blank=True,
+        editable=False,
     )
     publish_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Rating totals are maintained by the review signals in core.signals and
+    # can be recomputed with `manage.py rebuild_book_ratings`.
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    average_rating = models.GeneratedField(
+        expression=Case(
+            When(review_count=0, then=Value(0.0)),
+            default=Cast(F("rating_sum"), FloatField())
+            / Cast(F("review_count"), FloatField()),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+    # Weighted full-text document used by `?q=` searches and the admin search.
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", weight="A", config="english")
+        + SearchVector("author", weight="B", config="english")
+        + SearchVector("description", weight="C", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     def __str__(self):
         return self.title
@@ -25,6 +76,31 @@ class Book(models.Model):
     class Meta:
         verbose_name = "Book"
         verbose_name_plural = "Books"
+        indexes = [
+            # Keyset pagination orderings of BookViewSet.list
+            models.Index(fields=["-publish_date", "-id"], name="book_publish_date_idx"),
+            models.Index(fields=["-created_at", "-id"], name="book_created_at_idx"),
+            models.Index(fields=["-average_rating", "-id"], name="book_avg_rating_idx"),
+            models.Index(fields=["-review_count", "-id"], name="book_review_count_idx"),
+            # Admin list_filter
+            models.Index(fields=["author"], name="book_author_idx"),
+            # References to stored files, checked by `manage.py gc_book_files`
+            models.Index(
+                fields=["file"], name="book_file_idx", condition=~models.Q(file="")
+            ),
+            models.Index(
+                fields=["preview"],
+                name="book_preview_idx",
+                condition=models.Q(preview__isnull=False),
+            ),
+            GinIndex(fields=["search_vector"], name="book_search_vector_idx"),
+        ]
+        constraints = [
+            # Natural key `manage.py import_books` upserts on
+            models.UniqueConstraint(
+                fields=["title", "author", "publish_date"], name="book_natural_key"
+            ),
+        ]
 
 
 class Review(models.Model):
@@ -32,10 +108,20 @@ class Review(models.Model):
     book = models.ForeignKey(Book, related_name="reviews", on_delete=models.CASCADE)
     review_text = models.TextField()
     rating = models.IntegerField(
-        validators=[MaxValueValidator(5), MinValueValidator(0)]
+        validators=[MaxValueValidator(RATINGS[-1]), MinValueValidator(RATINGS[0])]
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
     def __str__(self):
         return f"Review of {self.book.title} by {self.user.username}"
 
@@ -45,3 +131,164 @@ class Review(models.Model):
         unique_together = [
             ["user", "book"],
         ]
+        indexes = [
+            # Latest reviews of a book, nested in book pages and /reviews/
+            models.Index(
+                fields=["book", "-created_at", "-id"], name="review_book_created_idx"
+            ),
+            # Latest reviews of a user, on /user/reviews/
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="review_user_created_idx"
+            ),
+            # Admin list_filter and date_hierarchy
+            models.Index(fields=["rating"], name="review_rating_idx"),
+            models.Index(fields=["created_at"], name="review_created_at_idx"),
+        ]
+
+
+class BookRatingStats(models.Model):
+    """
+    A book's rating histogram and Bayesian average, maintained by core.ratings
+    as its reviews change. Books get a row with their first review.
+    """
+
+    book = models.OneToOneField(
+        Book, primary_key=True, related_name="rating_stats", on_delete=models.CASCADE
+    )
+    # Number of reviews with each rating. Signed so that core.ratings can
+    # upsert changes, which may be negative, in a single statement.
+    rating_0 = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    # The average rating with BOOK_RATING_PRIOR_WEIGHT extra reviews rating
+    # BOOK_RATING_PRIOR_MEAN, so that few reviews can't top the leaderboard.
+    bayesian_average = models.FloatField(default=0)
+
+    @property
+    def histogram(self):
+        return [getattr(self, f"rating_{rating}") for rating in RATINGS]
+
+    def __str__(self):
+        return f"Rating stats of {self.book}"
+
+    class Meta:
+        verbose_name = "Book rating stats"
+        verbose_name_plural = "Book rating stats"
+        indexes = [
+            # Top-rated leaderboard, /books/top/
+            models.Index(
+                fields=["-bayesian_average", "-review_count", "book"],
+                name="book_rating_stats_top_idx",
+                condition=models.Q(review_count__gt=0),
+            ),
+        ]
+
+
+class BookUpload(models.Model):
+    """
+    A resumable upload of a book's file, received in chunks into a temporary
+    file and moved to `Book.file` once complete. See core.uploads.
+    """
+
+    class Status(models.TextChoices):
+        UPLOADING = "uploading"
+        COMPLETE = "complete"
+        ABORTED = "aborted"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    book = models.ForeignKey(Book, related_name="uploads", on_delete=models.CASCADE)
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255, validators=[validate_file_extension])
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    offset = models.PositiveBigIntegerField(default=0, editable=False)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.UPLOADING,
+        editable=False,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} for book {self.book_id}"
+
+    class Meta:
+        verbose_name = "Book upload"
+        verbose_name_plural = "Book uploads"
+
+
+class BookText(models.Model):
+    """
+    The plain text of a book's file, kept apart from Book so that book
+    queries don't load it.
+    """
+
+    book = models.OneToOneField(
+        Book, primary_key=True, related_name="text", on_delete=models.CASCADE
+    )
+    text = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Text of {self.book}"
+
+    class Meta:
+        verbose_name = "Book text"
+        verbose_name_plural = "Book texts"
+
+
+class BookProcessingJob(models.Model):
+    """
+    A queued extraction of the page count, text and preview of a book's
+    file. Jobs are claimed and run by `manage.py process_books`; see
+    core.processing.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    book = models.ForeignKey(
+        Book, related_name="processing_jobs", on_delete=models.CASCADE
+    )
+    # The name of the file to process, which the book may have replaced since.
+    file = models.CharField(max_length=100)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose worker hasn't finished by then is run again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Processing of {self.file} for book {self.book_id}"
+
+    class Meta:
+        verbose_name = "Book processing job"
+        verbose_name_plural = "Book processing jobs"
+        constraints = [
+            # A file is processed once per book, however often it is saved.
+            models.UniqueConstraint(
+                fields=["book", "file"], name="book_processing_job_file"
+            ),
+        ]
+        indexes = [
+            # Jobs left to claim, in order
+            models.Index(
+                fields=["run_after"],
+                name="book_processing_queue_idx",
+                condition=models.Q(status__in=["pending", "running"]),
+            ),
+        ]
@@ -0,0 +1,172 @@
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the full ordering tuple, e.g.
+    (publish_date, id), instead of a position plus an offset. Every page is
+    a single index range scan, so deep pages cost the same as the first one.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the requested page of `queryset` with one extra item, which
+        tells whether there is a following page, for `set_page()`.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse, self.current_position = (False, None)
+        else:
+            _, self.reverse, self.current_position = self.cursor
+
+        ordering = _reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.current_position is not None:
+            queryset = queryset.filter(
+                self.seek(ordering, self.current_position, queryset)
+            )
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Set the current page from the items of `get_page_queryset()`.
+        """
+        self.page = list(results[: self.page_size])
+        has_following_page = len(results) > len(self.page)
+
+        if self.reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = True
+            self.has_previous = has_following_page
+        else:
+            self.has_next = has_following_page
+            self.has_previous = self.current_position is not None
+
+        if self.page:
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+        else:
+            self.previous_position = self.next_position = self.current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def seek(self, ordering, position, queryset):
+        """
+        Build the row-value comparison `(a, b) < (x, y)` for the given ordering.
+
+        The leading `a <= x` bound is redundant, but it lets the database turn
+        the comparison into an index range condition instead of a filter.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                self.get_field(queryset, field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = None
+        for field, value in reversed(list(zip(ordering, values))):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{f"{name}__{lookup}": value})
+            if condition is not None:
+                step |= Q(**{name: value}) & condition
+            condition = step
+
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+    def get_field(self, queryset, name):
+        """
+        The model field or annotation `name` is ordered by, to convert cursor
+        values with.
+        """
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return queryset.query.annotations[name].output_field
+        # GeneratedField converts values with the field it is stored as.
+        return getattr(field, "output_field", field)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_position(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_position(self.previous_position, reverse=True)
+
+    def encode_position(self, position, reverse):
+        cursor = Cursor(offset=0, reverse=reverse, position=position)
+        return self.encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            values.append(value if isinstance(value, int) else str(value))
+        return json.dumps(values)
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """
+    Ordering filter that keeps a single client-chosen field and always appends
+    the primary key as a tie-breaker, as required by KeysetCursorPagination.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        field = ordering[0]
+        if field.lstrip("-") in ("id", "pk"):
+            return [field]
+        return [field, "-id" if field.startswith("-") else "id"]
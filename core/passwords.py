@@ -0,0 +1,183 @@
+"""
+Password hashing on a bounded pool of threads.
+
+Hashing a password takes a few hundred milliseconds of CPU by design. The
+hashers in PASSWORD_HASHERS are the ones Django ships, except that their work
+runs on a pool of `PASSWORD_HASHING_WORKERS` threads, so that a burst of
+logins and registrations can occupy no more than that many cores of a worker
+process, however many requests it serves at once. PBKDF2, scrypt and Argon2
+all release the GIL while hashing, so the threads hash in parallel.
+
+At most `PASSWORD_HASHING_QUEUE_SIZE` more hashes wait for a thread. Past
+that, the API views using RejectWhenBusyMixin, registration and login, get
+HashingUnavailable, which `exception_handler` returns as `503 Service
+Unavailable` with a `Retry-After` header, instead of queueing requests for
+longer than clients wait for them. Other callers, like the admin's login,
+wait for their turn.
+
+`PASSWORD_HASHER` picks the hasher new passwords are hashed with. Django
+hashes a user's password again with it on their next successful login.
+"""
+
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import exceptions, status, views
+from . import metrics
+
+
+class HashingUnavailable(Exception):
+    """
+    Raised instead of waiting for the hashing pool when its queue is full,
+    within `rejecting()`.
+    """
+
+    def __init__(self, wait):
+        super().__init__("The password hashing queue is full.")
+        self.wait = wait
+
+
+class ServiceUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, try again shortly."
+    default_code = "hashing_unavailable"
+
+    def __init__(self, wait):
+        super().__init__()
+        # Sent as Retry-After by DRF's exception handler.
+        self.wait = wait
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, which also returns HashingUnavailable as 503.
+    """
+    if isinstance(exc, HashingUnavailable):
+        exc = ServiceUnavailable(exc.wait)
+    return views.exception_handler(exc, context)
+
+
+# Whether a full queue raises HashingUnavailable rather than waiting.
+_rejecting = contextvars.ContextVar("password_hashing_rejecting", default=False)
+
+
+@contextlib.contextmanager
+def rejecting():
+    """
+    Raise HashingUnavailable from hashing in the enclosed block, instead of
+    waiting, when the queue is full.
+    """
+    token = _rejecting.set(True)
+    try:
+        yield
+    finally:
+        _rejecting.reset(token)
+
+
+class RejectWhenBusyMixin:
+    """
+    APIView mixin answering 503 when the hashing queue is full.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with rejecting():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class HashingPool:
+    """
+    A thread pool running at most `workers` hashes at a time, with at most
+    `queue_size` more waiting.
+    """
+
+    def __init__(self, workers, queue_size):
+        self.local = threading.local()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            workers,
+            thread_name_prefix="password-hashing",
+            initializer=self.initialize_worker,
+        )
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def initialize_worker(self):
+        self.local.worker = True
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call `func` on the pool and return its result. If the queue is full,
+        raise HashingUnavailable within `rejecting()`, or else wait for room.
+        """
+        if getattr(self.local, "worker", False):
+            # Hashers call one another, e.g. verify() calls encode().
+            return func(*args, **kwargs)
+        if not self.slots.acquire(blocking=not _rejecting.get()):
+            raise HashingUnavailable(settings.PASSWORD_HASHING_RETRY_AFTER)
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        with metrics.phase("hashing"):
+            return future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    settings.PASSWORD_HASHING_WORKERS,
+                    settings.PASSWORD_HASHING_QUEUE_SIZE,
+                )
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith("PASSWORD_HASHING_") and _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+class PooledHasherMixin:
+    """
+    Runs a hasher's work on the hashing pool.
+    """
+
+    def encode(self, *args, **kwargs):
+        return get_pool().run(super().encode, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class PBKDF2SHA1PasswordHasher(PooledHasherMixin, hashers.PBKDF2SHA1PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    pass
@@ -0,0 +1,237 @@
+"""
+Background processing of book files: page count, plain text and preview.
+
+Saving a book with a new file queues a BookProcessingJob in the same
+transaction, which costs the request a single INSERT. `manage.py
+process_books` claims queued jobs with `SELECT ... FOR UPDATE SKIP LOCKED`,
+so that any number of workers can share the queue, and hands the files to a
+pool of processes running core.extractors. Failed jobs are retried with
+exponential backoff up to `BOOK_PROCESSING_MAX_ATTEMPTS` times, and jobs
+whose worker died are claimed again once their lease expires.
+"""
+
+import concurrent.futures
+import multiprocessing
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from . import extractors
+from .models import Book, BookProcessingJob, BookText
+
+Status = BookProcessingJob.Status
+
+
+def enqueue(books):
+    """
+    Queue the processing of the current file of each of `books`, unless it
+    was already queued. Return the number of jobs queued.
+    """
+    queued = set(
+        BookProcessingJob.objects.filter(
+            book__in=[book.pk for book in books]
+        ).values_list("book_id", "file")
+    )
+    jobs = [
+        BookProcessingJob(book=book, file=book.file.name)
+        for book in books
+        if (book.pk, book.file.name) not in queued
+    ]
+    if not jobs:
+        return 0
+    # Conflicts are still possible with jobs queued meanwhile by others.
+    BookProcessingJob.objects.bulk_create(jobs, ignore_conflicts=True)
+    return len(jobs)
+
+
+def enqueue_unprocessed(batch_size=1000):
+    """
+    Queue every book whose current file has no job yet. Return the number of
+    jobs queued.
+    """
+    books = (
+        Book.objects.exclude(Q(file="") | Q(file__isnull=True))
+        .exclude(processing_jobs__file=F("file"))
+        .only("pk", "file")
+        .order_by("pk")
+    )
+    queued = 0
+    last_pk = 0
+    while batch := [*books.filter(pk__gt=last_pk)[:batch_size]]:
+        queued += enqueue(batch)
+        last_pk = batch[-1].pk
+    return queued
+
+
+def claim(limit):
+    """
+    Lock up to `limit` due jobs for this worker, for `BOOK_PROCESSING_LEASE`
+    seconds, and return them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Jobs whose last attempt died with its worker.
+        BookProcessingJob.objects.filter(
+            status=Status.RUNNING,
+            locked_until__lte=now,
+            attempts__gte=settings.BOOK_PROCESSING_MAX_ATTEMPTS,
+        ).update(status=Status.FAILED, error="The worker stopped responding.")
+        jobs = [
+            *BookProcessingJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Status.PENDING, run_after__lte=now)
+                | Q(status=Status.RUNNING, locked_until__lte=now)
+            )
+            .order_by("run_after")[:limit]
+        ]
+        if not jobs:
+            return []
+        locked_until = now + timedelta(seconds=settings.BOOK_PROCESSING_LEASE)
+        BookProcessingJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Status.RUNNING,
+            locked_until=locked_until,
+            attempts=F("attempts") + 1,
+        )
+    for job in jobs:
+        job.status = Status.RUNNING
+        job.attempts += 1
+        job.locked_until = locked_until
+    return jobs
+
+
+def extract_arguments(job):
+    """
+    The arguments of extractors.extract() for `job`.
+    """
+    path = Book._meta.get_field("file").storage.path(job.file)
+    return (
+        path,
+        settings.BOOK_PROCESSING_MAX_PAGES,
+        settings.BOOK_PROCESSING_MAX_TEXT,
+        settings.BOOK_PREVIEW_WIDTH,
+    )
+
+
+def complete(job, result):
+    """
+    Store the result of `job` on its book, unless the book's file has been
+    replaced since the job was queued.
+    """
+    with transaction.atomic():
+        book = (
+            Book.objects.select_for_update()
+            .filter(pk=job.book_id, file=job.file)
+            .only("pk")
+            .first()
+        )
+        if book is not None:
+            book.page_count = result["page_count"]
+            book.preview = save_preview(job, result["preview"])
+            book.save(update_fields=["page_count", "preview"])
+            BookText.objects.update_or_create(
+                book=book, defaults={"text": result["text"] or ""}
+            )
+        finish(job, Status.DONE)
+
+
+def save_preview(job, content):
+    if content is None:
+        return None
+    field = Book._meta.get_field("preview")
+    name = field.generate_filename(None, f"{job.book_id}.png")
+    return field.storage.save(name, ContentFile(content))
+
+
+def fail(job, error):
+    """
+    Schedule `job` again after a delay that doubles with every attempt, or
+    give up on it after `BOOK_PROCESSING_MAX_ATTEMPTS`.
+    """
+    if job.attempts >= settings.BOOK_PROCESSING_MAX_ATTEMPTS:
+        finish(job, Status.FAILED, error)
+        return
+    delay = settings.BOOK_PROCESSING_RETRY_DELAY * 2 ** (job.attempts - 1)
+    job.run_after = timezone.now() + timedelta(seconds=delay)
+    finish(job, Status.PENDING, error, update_fields=["run_after"])
+
+
+def finish(job, status, error="", update_fields=()):
+    job.status = status
+    job.error = str(error)
+    job.locked_until = None
+    job.save(
+        update_fields=["status", "error", "locked_until", "updated_at", *update_fields]
+    )
+
+
+def run_job(job, result=None, exception=None):
+    if exception is None:
+        complete(job, result)
+    else:
+        fail(job, exception)
+
+
+def process(workers, watch=False, poll_interval=5, on_job=None):
+    """
+    Run queued jobs, at most `workers` at a time in as many processes, or
+    one at a time in this process if `workers` is 0. Return once the queue is
+    empty, or keep polling it every `poll_interval` seconds with `watch`.
+    `on_job` is called with each job once it is done or failed.
+    """
+    if workers == 0:
+        return _process_inline(watch, poll_interval, on_job)
+    # Spawned rather than forked: a forked child would share this process's
+    # database connections.
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+        running = {}
+        while True:
+            if len(running) < workers:
+                for job in claim(workers - len(running)):
+                    future = pool.submit(extractors.extract, *extract_arguments(job))
+                    running[future] = job
+            if not running:
+                if not watch:
+                    return
+                time.sleep(poll_interval)
+                continue
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=poll_interval,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                job = running.pop(future)
+                run_job(job, *_outcome(future))
+                if on_job is not None:
+                    on_job(job)
+
+
+def _outcome(future):
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+
+def _process_inline(watch, poll_interval, on_job):
+    while True:
+        jobs = claim(1)
+        if not jobs:
+            if not watch:
+                return
+            time.sleep(poll_interval)
+            continue
+        job = jobs[0]
+        try:
+            result = extractors.extract(*extract_arguments(job))
+        except Exception as e:
+            run_job(job, exception=e)
+        else:
+            run_job(job, result)
+        if on_job is not None:
+            on_job(job)
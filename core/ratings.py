@@ -0,0 +1,147 @@
+"""
+Rating statistics, maintained incrementally as reviews change.
+
+Changes are given as `{book_id: {rating: delta}}`: how many reviews with each
+rating a book gained, or lost if negative. They shift the review count and
+rating sum on Book, and the histogram and Bayesian average in
+BookRatingStats, which the top-rated leaderboard reads from a partial index
+in the same time however many reviews there are.
+"""
+
+import itertools
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from .models import Book, BookRatingStats, RATINGS, Review
+
+COUNTERS = [f"rating_{rating}" for rating in RATINGS] + ["review_count", "rating_sum"]
+
+
+def bayesian_average(review_count, rating_sum):
+    prior_weight = settings.BOOK_RATING_PRIOR_WEIGHT
+    prior_sum = prior_weight * settings.BOOK_RATING_PRIOR_MEAN
+    return (prior_sum + rating_sum) / (prior_weight + review_count)
+
+
+def record(changes):
+    """
+    Apply the review changes `{book_id: {rating: delta}}`.
+    """
+    changes = {
+        book_id: deltas for book_id, deltas in changes.items() if any(deltas.values())
+    }
+    if changes:
+        shift_rating_totals(changes)
+        shift_rating_stats(changes)
+
+
+def totals(deltas):
+    """
+    The review count and rating sum deltas of a book's rating deltas.
+    """
+    return (
+        sum(deltas.values()),
+        sum(rating * delta for rating, delta in deltas.items()),
+    )
+
+
+def shift_rating_totals(changes):
+    """
+    Shift the review count and rating sum of the changed books at once.
+    """
+    deltas = {book_id: totals(ratings) for book_id, ratings in changes.items()}
+
+    def delta(index):
+        return Case(
+            *(When(pk=pk, then=Value(d[index])) for pk, d in deltas.items()),
+            default=Value(0),
+        )
+
+    Book.objects.filter(pk__in=deltas).update(
+        review_count=F("review_count") + delta(0),
+        rating_sum=F("rating_sum") + delta(1),
+    )
+
+
+def shift_rating_stats(changes):
+    """
+    Shift the rating stats of the changed books with a single upsert, which
+    also creates the stats of books reviewed for the first time.
+    """
+    rows = []
+    # In key order, so that concurrent upserts lock rows in the same order.
+    for book_id, deltas in sorted(changes.items()):
+        review_count, rating_sum = totals(deltas)
+        rows.append(
+            [
+                book_id,
+                *(deltas.get(rating, 0) for rating in RATINGS),
+                review_count,
+                rating_sum,
+                bayesian_average(review_count, rating_sum),
+            ]
+        )
+
+    quote = connection.ops.quote_name
+    table = quote(BookRatingStats._meta.db_table)
+    columns = ", ".join(map(quote, ["book_id", *COUNTERS, "bayesian_average"]))
+    values = ", ".join(["(" + ", ".join(["%s"] * len(rows[0])) + ")"] * len(rows))
+    updates = [
+        f"{column} = {table}.{column} + EXCLUDED.{column}"
+        for column in map(quote, COUNTERS)
+    ]
+    rating_sum, review_count = quote("rating_sum"), quote("review_count")
+    updates.append(
+        f"{quote('bayesian_average')} = "
+        f"(%s + {table}.{rating_sum} + EXCLUDED.{rating_sum}) "
+        f"/ (%s + {table}.{review_count} + EXCLUDED.{review_count})"
+    )
+    prior_weight = float(settings.BOOK_RATING_PRIOR_WEIGHT)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) VALUES {values} "
+            f"ON CONFLICT (book_id) DO UPDATE SET {', '.join(updates)}",
+            [
+                *itertools.chain.from_iterable(rows),
+                prior_weight * settings.BOOK_RATING_PRIOR_MEAN,
+                prior_weight,
+            ],
+        )
+
+
+def rebuild_rating_stats(books):
+    """
+    Recompute the rating stats of `books`, a Book queryset, from their reviews.
+    """
+    reviews = (
+        Review.objects.filter(book__in=books)
+        .order_by()
+        .values("book_id")
+        .annotate(
+            **{
+                f"rating_{rating}": Count("pk", filter=Q(rating=rating))
+                for rating in RATINGS
+            },
+            review_count=Count("pk"),
+            rating_sum=Sum("rating"),
+        )
+    )
+    BookRatingStats.objects.filter(book__in=books).delete()
+    BookRatingStats.objects.bulk_create(
+        BookRatingStats(
+            **row,
+            bayesian_average=bayesian_average(row["review_count"], row["rating_sum"]),
+        )
+        for row in reviews
+    )
+
+
+def leaderboard(books):
+    """
+    Order `books`, a Book queryset, from the highest Bayesian average, leaving
+    out books without reviews.
+    """
+    return books.filter(rating_stats__review_count__gt=0).order_by(
+        "-rating_stats__bayesian_average", "-rating_stats__review_count", "pk"
+    )
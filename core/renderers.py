@@ -0,0 +1,40 @@
+"""
+An optional JSON renderer backed by orjson (`pip install orjson`), enabled
+with the ORJSON_RENDERER setting.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Render the same JSON as JSONRenderer with orjson. Floats that need an
+    exponent are written without its `+` sign and leading zeros (`1e16` rather
+    than `1e+16`), and NaN and infinity become `null` instead of failing.
+
+    Indented output, non-compact or ASCII-only settings, and data orjson can't
+    encode, such as dicts with non-string keys, fall back to JSONRenderer.
+    """
+
+    # Dates and times go through DRF's encoder, whose format differs from
+    # orjson's.
+    options = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact and not self.ensure_ascii:
+            try:
+                content = orjson.dumps(
+                    data, default=self.encoder_class().default, option=self.options
+                )
+            except orjson.JSONEncodeError:
+                pass
+            else:
+                # As JSONRenderer, keep the output a subset of JavaScript.
+                return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+        return super().render(data, accepted_media_type, renderer_context)
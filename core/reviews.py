@@ -0,0 +1,94 @@
+"""
+Batch review submission for `/reviews/batch/`.
+
+A batch is checked against the database with one query for its books and
+one for the user's existing reviews of them, then saved with a single
+bulk insert, one rating totals update and one rating stats upsert, all in
+one transaction.
+"""
+
+import collections
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from . import ratings
+from .cache import invalidate_book
+from .models import Book, Review
+
+CREATED = "created"
+UPDATED = "updated"
+INVALID = "invalid"
+
+ALREADY_REVIEWED = "You have already reviewed this book."
+
+
+class ReviewConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A review of the same book was submitted at the same time."
+    default_code = "review_conflict"
+
+
+def submit_reviews(user, items, upsert=False):
+    """
+    Save `user`'s reviews from the validated `items` of a batch. An item for a
+    book the user already reviewed is invalid, or replaces that review if
+    `upsert`. Return a `(status, review or error dict)` pair for each item.
+    """
+    try:
+        with transaction.atomic():
+            return _save_reviews(user, items, upsert)
+    except IntegrityError:
+        # Another request inserted one of the reviews after the lookup.
+        raise ReviewConflict()
+
+
+def _save_reviews(user, items, upsert):
+    book_ids = {item["book_id"] for item in items}
+    books = set(Book.objects.filter(pk__in=book_ids).values_list("pk", flat=True))
+    existing = {
+        review.book_id: review
+        for review in Review.objects.select_for_update()
+        .filter(user=user, book_id__in=books)
+        .only("pk", "book_id", "rating", "created_at")
+    }
+
+    results, reviews = [], {}
+    for item in items:
+        book_id = item["book_id"]
+        if book_id not in books:
+            error = {"book": [f'Invalid pk "{book_id}" - object does not exist.']}
+        elif book_id in reviews:
+            error = {"book": ["This book is reviewed more than once in the batch."]}
+        elif book_id in existing and not upsert:
+            error = {"non_field_errors": [ALREADY_REVIEWED]}
+        else:
+            review = Review(user=user, **item)
+            reviews[book_id] = review
+            results.append((UPDATED if book_id in existing else CREATED, review))
+            continue
+        results.append((INVALID, error))
+    if not reviews:
+        return results
+
+    if upsert:
+        Review.objects.bulk_create(
+            reviews.values(),
+            update_conflicts=True,
+            unique_fields=["user", "book"],
+            update_fields=["review_text", "rating"],
+        )
+    else:
+        Review.objects.bulk_create(reviews.values())
+
+    # bulk_create doesn't send post_save, which maintains the rating stats.
+    changes = {}
+    for book_id, review in reviews.items():
+        changes[book_id] = collections.Counter({review.rating: 1})
+        previous = existing.get(book_id)
+        if previous is not None:
+            review.created_at = previous.created_at
+            changes[book_id][previous.rating] -= 1
+    ratings.record(changes)
+    invalidate_book(*reviews)
+    return results
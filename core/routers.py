@@ -0,0 +1,128 @@
+"""
+Read replica routing.
+
+Reads go to a random replica from `DATABASE_REPLICAS` only while
+`replica_reads` is set, which ReplicaReadsMiddleware does for safe requests
+to views with `replica_reads = True`. Everything else, including reads in
+write requests, management commands and transactions, uses the primary.
+
+A user who just wrote is pinned to the primary for
+`DATABASE_REPLICA_PIN_SECONDS`, so that they read their own writes however
+far behind the replicas are. Pins are kept in the throttling counter store
+(see core.throttling), which the workers of a host share even without a
+shared cache. A replica that can't be connected to is skipped for
+`DATABASE_REPLICA_RETRY_SECONDS`.
+"""
+
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .throttling import get_counter_store
+
+logger = logging.getLogger(__name__)
+
+replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+# Replica alias -> time.monotonic() until which it is skipped.
+unavailable = {}
+
+
+def pin_key(user_id, window):
+    return f"replicas:pin:{user_id}:{window}"
+
+
+def current_window():
+    return int(time.time() // settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def pin(user_id):
+    """
+    Send `user_id`'s reads to the primary for a while.
+    """
+    if settings.DATABASE_REPLICA_PIN_SECONDS <= 0:
+        return
+    # Counters can't be extended, so pin the rest of the current window and
+    # all of the next one: between one and two DATABASE_REPLICA_PIN_SECONDS.
+    store = get_counter_store()
+    window = current_window()
+    for pinned in (window, window + 1):
+        store.incr(
+            pin_key(user_id, pinned), 2 * settings.DATABASE_REPLICA_PIN_SECONDS
+        )
+
+
+def token_user_id(request):
+    """
+    The user id of the request's access token, before the view authenticates
+    it, or None.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+        return token[jwt_settings.USER_ID_CLAIM]
+    except Exception:
+        # The view rejects the token; its reads don't matter.
+        return None
+
+
+def is_pinned(request):
+    if settings.DATABASE_REPLICA_PIN_SECONDS <= 0:
+        return False
+    user_id = token_user_id(request)
+    if user_id is None:
+        return False
+    return get_counter_store().get(pin_key(user_id, current_window())) > 0
+
+
+def available_replica():
+    """
+    A random replica that accepts connections, or None.
+    """
+    now = time.monotonic()
+    replicas = [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if unavailable.get(alias, 0) <= now
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            # Already connected, unless this thread hasn't used the replica
+            # yet or its connection was closed at the end of a request.
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning("Database replica %s is unavailable", alias, exc_info=True)
+            unavailable[alias] = now + settings.DATABASE_REPLICA_RETRY_SECONDS
+            continue
+        return alias
+    return None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Read what the transaction itself wrote.
+            return DEFAULT_DB_ALIAS
+        return available_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,130 @@
+"""
+The OpenAPI schema, generated once per code version and served from memory.
+
+`manage.py generate_schema` writes the schema to `SCHEMA_DIR` as a build
+step. A process that finds no files for its code version generates the
+schema on its first request instead, without writing them.
+"""
+
+import functools
+import hashlib
+import threading
+
+import django
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from rest_framework import status
+from .cache import etag_matches
+
+FORMATS = {
+    "json": (OpenAPICodecJson, "application/json"),
+    "yaml": (OpenAPICodecYaml, "application/yaml"),
+}
+
+# Project packages whose source makes up the code version.
+SOURCE_PACKAGES = ["bookstore", "core"]
+
+_schemas = {}
+_lock = threading.Lock()
+
+
+@functools.cache
+def source_hash():
+    digest = hashlib.sha256()
+    for library in (django, rest_framework, drf_yasg):
+        digest.update(f"{library.__name__}={library.__version__}\n".encode())
+    for package in SOURCE_PACKAGES:
+        for path in sorted((settings.BASE_DIR / package).rglob("*.py")):
+            digest.update(path.relative_to(settings.BASE_DIR).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def code_version():
+    """
+    `SCHEMA_VERSION` if set, e.g. to a release tag, otherwise a hash of the
+    project's sources and of the versions of the libraries that describe it.
+    """
+    return settings.SCHEMA_VERSION or source_hash()
+
+
+def artifact_path(version, format):
+    return settings.SCHEMA_DIR / f"schema-{version}.{format}"
+
+
+def generate():
+    """
+    Introspect the API and return its schema encoded in every format.
+    """
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(swagger_settings.DEFAULT_INFO)
+    # Without a request, the schema has no host and clients use their own.
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        format: codec(validators=[]).encode(schema)
+        for format, (codec, _) in FORMATS.items()
+    }
+
+
+def write_artifacts():
+    """
+    Generate the schema and write it to `SCHEMA_DIR`. Return the paths written.
+    """
+    version = code_version()
+    settings.SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for format, content in generate().items():
+        path = artifact_path(version, format)
+        path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+
+def load():
+    version = code_version()
+    paths = {format: artifact_path(version, format) for format in FORMATS}
+    if all(path.exists() for path in paths.values()):
+        documents = {format: path.read_bytes() for format, path in paths.items()}
+    else:
+        documents = generate()
+    return {
+        format: (content, f'"{hashlib.md5(content).hexdigest()}"')
+        for format, content in documents.items()
+    }
+
+
+def get_schema(format):
+    """
+    The encoded schema in `format` and its ETag.
+    """
+    version = code_version()
+    if version not in _schemas:
+        with _lock:
+            if version not in _schemas:
+                _schemas[version] = load()
+    return _schemas[version][format]
+
+
+@receiver(setting_changed)
+def reset_schemas(setting, **kwargs):
+    if setting in ("SCHEMA_VERSION", "SCHEMA_DIR", "SWAGGER_SETTINGS"):
+        _schemas.clear()
+
+
+def schema_view(request, format):
+    """
+    Serve the schema, letting clients revalidate their copy with its ETag.
+    """
+    content, etag = get_schema(format)
+    if etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(content, content_type=FORMATS[format][1])
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,139 @@
+"""
+Generated datasets for `manage.py seed_bookstore`.
+
+Users are built by UserFactory and inserted with bulk_create. Books and
+their reviews, the bulk of the rows, are built from BookFactory and
+ReviewFactory's declarations and written with PostgreSQL's COPY, the books
+with ids reserved from their sequence beforehand, which is several times
+faster than the INSERTs of bulk_create. The signals that maintain the books'
+review counts and rating stats don't run, so they are computed from the
+generated reviews and written along with them.
+"""
+
+import collections
+import csv
+import io
+
+import factory
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+from . import factories, ratings
+from .models import RATINGS, Book, BookRatingStats, Review
+
+UserModel = get_user_model()
+
+BOOK_COLUMNS = [
+    "id",
+    "title",
+    "author",
+    "description",
+    "publish_date",
+    "created_at",
+    "file",
+    "file_sha256",
+    "review_count",
+    "rating_sum",
+]
+REVIEW_COLUMNS = ["user_id", "book_id", "review_text", "rating", "created_at"]
+RATING_STATS_COLUMNS = ["book_id", *ratings.COUNTERS, "bayesian_average"]
+
+
+def next_username_number():
+    """
+    The sequence number following that of the last generated username.
+    """
+    prefix = factories.USERNAME_PREFIX
+    last = (
+        UserModel.objects.filter(username__regex=rf"^{prefix}[0-9]{{1,18}}$")
+        .annotate(number=Cast(Substr("username", len(prefix) + 1), BigIntegerField()))
+        .aggregate(Max("number"))["number__max"]
+    )
+    return 0 if last is None else last + 1
+
+
+def create_users(count, password):
+    """
+    Create `count` users with the password `password`, and return their ids.
+    """
+    # Hashed once: hashing it for each user would take hours.
+    password = factory.Transformer.Force(make_password(password))
+    users = factories.UserFactory.build_batch(count, password=password)
+    UserModel.objects.bulk_create(users)
+    return [user.pk for user in users]
+
+
+def create_books(count, user_ids, reviews_per_book):
+    """
+    Create `count` books, each reviewed by `reviews_per_book` of the users
+    `user_ids`. Must run in a transaction. Return the number of reviews.
+    """
+    now = timezone.now()
+    books = factories.BookFactory.build_batch(count)
+    book_rows, review_rows, stats_rows = [], [], []
+    for book, book_id in zip(books, reserve_ids(Book, count)):
+        histogram = collections.Counter()
+        # ReviewFactory's values, without building a Review for each.
+        for user_id in factory.random.randgen.sample(user_ids, reviews_per_book):
+            rating = factories.random_rating()
+            histogram[rating] += 1
+            review_rows.append([user_id, book_id, factories.review_text(), rating, now])
+        review_count, rating_sum = ratings.totals(histogram)
+        book_rows.append(
+            [
+                book_id,
+                book.title,
+                book.author,
+                book.description,
+                book.publish_date,
+                now,
+                "",
+                "",
+                review_count,
+                rating_sum,
+            ]
+        )
+        if review_count:
+            stats_rows.append(
+                [
+                    book_id,
+                    *(histogram[rating] for rating in RATINGS),
+                    review_count,
+                    rating_sum,
+                    ratings.bayesian_average(review_count, rating_sum),
+                ]
+            )
+    copy_rows(Book, BOOK_COLUMNS, book_rows)
+    copy_rows(Review, REVIEW_COLUMNS, review_rows)
+    copy_rows(BookRatingStats, RATING_STATS_COLUMNS, stats_rows)
+    return len(review_rows)
+
+
+def reserve_ids(model, count):
+    """
+    Take `count` ids from the sequence of `model`'s primary key.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_rows(model, columns, rows):
+    buffer = io.StringIO()
+    # Quoted, so that empty strings aren't read as NULL.
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
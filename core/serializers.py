@@ -1,6 +1,15 @@
+import functools
+import operator
+
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 from django.contrib.auth import get_user_model
-from .models import Book, Review
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from .metrics import TimedSerializerMixin
+from .models import Book, BookRatingStats, BookUpload, Review
 
 UserModel = get_user_model()
 
@@ -21,12 +30,73 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    Tokens also carry the claims StatelessJWTAuthentication builds users from.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        token["is_active"] = user.is_active
+        return token
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
+        list_serializer_class = TimedListSerializer
         exclude = [
             "book",
         ]
+        read_only_fields = ["user"]
+
+
+class UserReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    A review in the listing of the user's own reviews, which names the book
+    instead of the user.
+    """
+
+    class Meta:
+        model = Review
+        list_serializer_class = TimedListSerializer
+        fields = ["id", "book", "review_text", "rating", "created_at"]
+
+
+class ReviewBatchItemSerializer(serializers.ModelSerializer):
+    """
+    A review of a batch. Whether its book exists and whether the user already
+    reviewed it are checked by core.reviews for the whole batch at once.
+    """
+
+    book = serializers.IntegerField(source="book_id")
+
+    class Meta:
+        model = Review
+        fields = ["id", "book", "user", "review_text", "rating", "created_at"]
+        read_only_fields = ["id", "user", "created_at"]
+        validators = []
+
+
+class ReviewBatchSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+    upsert = serializers.BooleanField(
+        default=False,
+        help_text="Replace the user's existing reviews of the same books.",
+    )
+
+    def validate_items(self, items):
+        limit = settings.REVIEW_BATCH_MAX_ITEMS
+        if len(items) > limit:
+            raise serializers.ValidationError(f"Send at most {limit} reviews.")
+        return items
 
 
 class BookSerializer(serializers.ModelSerializer):
@@ -34,4 +104,197 @@ class BookSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Book
-        fields = "__all__"
+        exclude = ["search_vector"]
+
+
+class BookListSerializer(serializers.ModelSerializer):
+    """
+    Book representation for list pages: only the latest reviews are embedded,
+    the rest can be paged through `reviews_url`.
+    """
+
+    reviews = ReviewSerializer(source="latest_reviews", many=True, read_only=True)
+    reviews_url = serializers.HyperlinkedIdentityField(view_name="books-reviews")
+
+    class Meta:
+        model = Book
+        exclude = ["search_vector"]
+
+
+class BookRatingStatsSerializer(serializers.ModelSerializer):
+    histogram = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True,
+        help_text="Number of reviews rating the book 0, 1, 2, 3, 4 and 5.",
+    )
+
+    class Meta:
+        model = BookRatingStats
+        fields = ["histogram", "review_count", "bayesian_average"]
+
+
+class TopBookSerializer(BookListSerializer):
+    """
+    Book representation for the top-rated leaderboard.
+    """
+
+    rating_stats = BookRatingStatsSerializer(read_only=True)
+
+    class Meta(BookListSerializer.Meta):
+        pass
+
+
+class BookUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookUpload
+        fields = [
+            "id",
+            "book",
+            "filename",
+            "size",
+            "sha256",
+            "offset",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+
+    def validate_size(self, value):
+        megabyte_limit = settings.BOOK_FILE_SIZE_LIMIT_MB
+        if value > megabyte_limit * 1024 * 1024:
+            raise serializers.ValidationError(f"Max file size is {megabyte_limit}MB")
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def serializer_sources(serializer_class):
+    """
+    The source of each of a serializer's fields, by name, in output order.
+    """
+    return {name: field.source for name, field in serializer_class().fields.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def serializer_columns(serializer_class, fields=None):
+    """
+    Names of the concrete model fields a ModelSerializer reads, suitable for
+    `QuerySet.only()`. With `fields`, only those the named fields read.
+    """
+    sources = {
+        source
+        for name, source in serializer_sources(serializer_class).items()
+        if fields is None or name in fields
+    }
+    return tuple(
+        field.name
+        for field in serializer_class.Meta.model._meta.concrete_fields
+        if field.name in sources
+    )
+
+
+class BookReadSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only BookSerializer for the hot read endpoints. It produces the same
+    representation, but reads values straight off the book instead of going
+    through a serializer field for each of them. `context["fields"]` limits
+    the representation to the named fields.
+    """
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    # The ModelSerializer whose fields, and field order, this one reproduces.
+    # Fields without a `represent_<name>` method are plain attributes.
+    reference = BookSerializer
+
+    @functools.cached_property
+    def representers(self):
+        fields = self.context.get("fields")
+        return [
+            (name, getattr(self, f"represent_{name}", operator.attrgetter(source)))
+            for name, source in serializer_sources(self.reference).items()
+            if fields is None or name in fields
+        ]
+
+    @functools.cached_property
+    def represent_datetime(self):
+        # DRF's representation, with the current time zone looked up once
+        # rather than for every value.
+        field = serializers.DateTimeField(
+            default_timezone=timezone.get_current_timezone()
+        )
+        return field.to_representation
+
+    def to_representation(self, book):
+        return {name: represent(book) for name, represent in self.representers}
+
+    def represent_review(self, review):
+        # As ReviewSerializer.
+        return {
+            "id": review.id,
+            "review_text": review.review_text,
+            "rating": review.rating,
+            "created_at": self.represent_datetime(review.created_at),
+            "user": review.user_id,
+        }
+
+    def represent_reviews(self, book):
+        reviews = getattr(book, serializer_sources(self.reference)["reviews"])
+        if isinstance(reviews, models.Manager):
+            reviews = reviews.all()
+        return [self.represent_review(review) for review in reviews]
+
+    def represent_file(self, book):
+        return self.represent_fieldfile(book.file)
+
+    def represent_preview(self, book):
+        return self.represent_fieldfile(book.preview)
+
+    def represent_fieldfile(self, fieldfile):
+        # As FileField.
+        if not fieldfile:
+            return None
+        request = self.context.get("request")
+        if request is None:
+            return fieldfile.url
+        return request.build_absolute_uri(fieldfile.url)
+
+    def represent_publish_date(self, book):
+        return self.represent_datetime(book.publish_date)
+
+    def represent_created_at(self, book):
+        return self.represent_datetime(book.created_at)
+
+
+class BookListReadSerializer(BookReadSerializer):
+    """
+    Read-only BookListSerializer.
+    """
+
+    reference = BookListSerializer
+
+    @functools.cached_property
+    def reviews_url_parts(self):
+        # Reverse the URL once, around a placeholder for the book's key.
+        url = reverse(
+            "books-reviews",
+            kwargs={"pk": "pk"},
+            request=self.context["request"],
+            format=self.context.get("format"),
+        )
+        return url.rsplit("pk", 1)
+
+    def represent_reviews_url(self, book):
+        prefix, suffix = self.reviews_url_parts
+        return f"{prefix}{book.pk}{suffix}"
+
+
+class TopBookReadSerializer(BookListReadSerializer):
+    """
+    Read-only TopBookSerializer.
+    """
+
+    reference = TopBookSerializer
+
+    def represent_rating_stats(self, book):
+        return BookRatingStatsSerializer(book.rating_stats).data
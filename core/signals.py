@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import processing, ratings
+from .authentication import get_user_cache
+from .cache import invalidate_book
+from .models import Book, Review
+
+UserModel = get_user_model()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    if created:
+        ratings.record({instance.book_id: {instance.rating: 1}})
+    elif "book_id" in loaded and "rating" in loaded:
+        if loaded["book_id"] != instance.book_id:
+            ratings.record(
+                {
+                    loaded["book_id"]: {loaded["rating"]: -1},
+                    instance.book_id: {instance.rating: 1},
+                }
+            )
+            invalidate_book(loaded["book_id"])
+        elif loaded["rating"] != instance.rating:
+            ratings.record(
+                {instance.book_id: {loaded["rating"]: -1, instance.rating: 1}}
+            )
+    instance._loaded_values = {
+        "book_id": instance.book_id,
+        "rating": instance.rating,
+    }
+    invalidate_book(instance.book_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Book) or getattr(origin, "model", None) is Book:
+        # The book is being deleted along with its reviews.
+        return
+    loaded = getattr(instance, "_loaded_values", {})
+    book_id = loaded.get("book_id", instance.book_id)
+    ratings.record({book_id: {loaded.get("rating", instance.rating): -1}})
+    invalidate_book(book_id)
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, update_fields=None, **kwargs):
+    if instance.file and (
+        created or update_fields is None or "file" in update_fields
+    ):
+        # A no-op if this file was already queued for the book.
+        processing.enqueue([instance])
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def book_changed(sender, instance, **kwargs):
+    invalidate_book(instance.pk)
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def user_changed(sender, instance, **kwargs):
+    get_user_cache().discard(instance.pk)
@@ -0,0 +1,110 @@
+"""
+Content-addressed storage for book files.
+
+A file is named after the SHA-256 of its content, e.g.
+`books/3a/3a7bd3e2360a3d29eea436fcfb7e44c735d117c42d1c1835420b6b9942dd4f1b.pdf`,
+computed while it is written in `CHUNK_SIZE` chunks. Saving content that is
+already stored reuses the existing file, so every Book with the same file
+shares one copy, and the name of a file never changes its content.
+
+Files are never deleted when a book lets go of them: books may share them.
+`manage.py gc_book_files` deletes those no book references any more.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+
+CHUNK_SIZE = 64 * 1024
+
+DIGEST_RE = re.compile(r"([0-9a-f]{64})(\.\w+)?")
+
+
+class DigestMismatch(Exception):
+    """
+    The content's SHA-256 isn't the one it was expected to have.
+    """
+
+    def __init__(self, digest):
+        super().__init__(f"The content's SHA-256 is {digest}.")
+        self.digest = digest
+
+
+def digest(name):
+    """
+    The SHA-256 that names the file `name`, or None if it isn't content
+    addressed, like files stored before this storage was used.
+    """
+    match = DIGEST_RE.fullmatch(os.path.basename(name))
+    return match and match[1]
+
+
+def content_name(directory, sha256, extension):
+    return os.path.join(directory, sha256[:2], f"{sha256}{extension.lower()}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that stores files under the SHA-256 of their content,
+    keeping the directory and the extension of the name they are saved with.
+    A `sha256` attribute on the saved content is checked against its digest,
+    and nothing is stored if they differ.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen by _save(), and equal content shares a name.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+        # In the target directory, so that it can be renamed into place.
+        fd, temporary = tempfile.mkstemp(prefix=".", suffix=".part", dir=full_directory)
+        try:
+            sha256 = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    sha256.update(chunk)
+                    f.write(chunk)
+            sha256 = sha256.hexdigest()
+            expected = getattr(content, "sha256", None)
+            if expected and expected.lower() != sha256:
+                raise DigestMismatch(sha256)
+
+            name = content_name(directory, sha256, os.path.splitext(filename)[1])
+            path = self.path(name)
+            if os.path.exists(path):
+                # Already stored. Refresh its age, so that gc_book_files
+                # doesn't collect it before the new reference is committed.
+                os.utime(path)
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary, self.file_permissions_mode)
+                os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+
+def book_storage():
+    # A callable, so that the storage can be configured in STORAGES["books"].
+    return storages["books"]
+
+
+def walk(storage, directory):
+    """
+    Yield the names of all files below `directory` in `storage`.
+    """
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield os.path.join(directory, filename)
+    for subdirectory in directories:
+        yield from walk(storage, os.path.join(directory, subdirectory))
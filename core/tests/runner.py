@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Keep throttle counters of test runs apart from the server's, and from
+    previous runs, in a temporary SQLite file.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.throttle_dir = tempfile.TemporaryDirectory()
+        self.throttle_settings = override_settings(
+            THROTTLE_SQLITE_PATH=os.path.join(self.throttle_dir.name, "throttle.db")
+        )
+        self.throttle_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.throttle_settings.disable()
+        self.throttle_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
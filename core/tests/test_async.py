@@ -0,0 +1,193 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core import throttling
+from core.cache import get_cache
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+class AsyncBookViewTests(APITestCase):
+    """
+    The /async/ endpoints must answer exactly like their BookViewSet
+    counterparts.
+    """
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.books = []
+        for i in range(5):
+            book = Book.objects.create(
+                title=f"Book {i}",
+                author="Author",
+                description="Description",
+                publish_date=timezone.now(),
+            )
+            for j in range(i % 3):
+                reviewer = UserModel.objects.create(username=f"user-{i}-{j}")
+                Review.objects.create(
+                    user=reviewer, book=book, review_text="Good", rating=j + 3
+                )
+            self.books.append(book)
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.force_authenticate(user=self.user)
+
+    def async_request(self, method, url, data=None, **headers):
+        headers.setdefault("Authorization", f"Bearer {self.token}")
+
+        async def request():
+            handler = getattr(self.async_client, method)
+            kwargs = {"headers": headers}
+            if data is not None:
+                kwargs.update(data=data, content_type="application/json")
+            response = await handler(url, **kwargs)
+            if response.streaming:
+                content = b"".join([c async for c in response.streaming_content])
+            else:
+                content = response.content
+            return response, json.loads(content) if content else None
+
+        return async_to_sync(request)()
+
+    def test_book_list(self):
+        url = reverse("books-list") + "?page_size=2&ordering=-average_rating"
+        async_url = (
+            reverse("async-books-list") + "?page_size=2&ordering=-average_rating"
+        )
+        pages, async_pages = [], []
+        while url:
+            data = self.client.get(url).data
+            pages.append(data["results"])
+            url = data["next"]
+        while async_url:
+            response, data = self.async_request("get", async_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Content-Type"], "application/json")
+            async_pages.append(data["results"])
+            async_url = data["next"]
+        self.assertEqual(json.loads(json.dumps(pages)), async_pages)
+        self.assertEqual(len(pages), 3)
+
+    def test_previous_pages(self):
+        url = reverse("async-books-list") + "?page_size=2"
+        _, first = self.async_request("get", url)
+        _, second = self.async_request("get", first["next"])
+        _, back = self.async_request("get", second["previous"])
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(first["previous"])
+
+    def test_cached_book_list(self):
+        url = reverse("async-books-list")
+        response, data = self.async_request("get", url)
+        cached, cached_data = self.async_request("get", url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached_data, data)
+        not_modified, _ = self.async_request(
+            "get", url, **{"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_cursor(self):
+        url = reverse("async-books-list") + "?cursor=cD14eXo="
+        response, _ = self.async_request("get", url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_book_detail(self):
+        book = self.books[2]
+        data = self.client.get(reverse("books-detail", args=[book.id])).data
+        response, async_data = self.async_request(
+            "get", reverse("async-books-detail", args=[book.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(json.dumps(data)), async_data)
+
+        response, _ = self.async_request("get", reverse("async-books-detail", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_add_review(self):
+        book = self.books[0]
+        url = reverse("async-books-add-review", args=[book.id])
+        response, data = self.async_request(
+            "post", url, {"review_text": "Nice", "rating": 4}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(data["user"], self.user.id)
+        book.refresh_from_db()
+        self.assertEqual((book.review_count, book.rating_sum), (1, 4))
+
+        response, data = self.async_request("post", url, {"rating": 9})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("rating", data)
+
+        response, data = self.async_request(
+            "post", url, {"review_text": "Again", "rating": 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", data)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_authentication(self):
+        url = reverse("async-books-list")
+        with self.assertNumQueries(2):
+            response, _ = self.async_request("get", url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_authentication_required(self):
+        for headers in ({"Authorization": ""}, {"Authorization": "Bearer nope"}):
+            response, _ = self.async_request(
+                "get", reverse("async-books-list"), **headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertIn("WWW-Authenticate", response)
+
+    def test_method_not_allowed(self):
+        response, _ = self.async_request("post", reverse("async-books-list"), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_blocking_calls_run_off_the_event_loop(self):
+        on_loop = []
+
+        def record(method):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(method.__name__)
+                except RuntimeError:
+                    pass
+                return method(*args, **kwargs)
+
+            return wrapper
+
+        cache_class = type(get_cache())
+        store_class = type(throttling.get_counter_store())
+        patches = [
+            mock.patch.object(cls, name, autospec=True, side_effect=record(method))
+            for cls in (cache_class, store_class)
+            for name, method in vars(cls).items()
+            if name in ("get", "get_many", "set", "add", "incr")
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        book = self.books[0]
+        for url in (
+            reverse("async-books-list"),
+            reverse("async-books-detail", args=[book.id]),
+        ):
+            response, _ = self.async_request("get", url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(on_loop, [])
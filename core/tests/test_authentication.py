@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import StatelessJWTAuthentication, get_user_cache
+from core.models import Book, Review
+from core.views import BookViewSet
+
+
+UserModel = get_user_model()
+
+
+class TokenClaimsTests(APITestCase):
+
+    def test_login_tokens_carry_user_claims(self):
+        UserModel.objects.create_user(
+            username="reader", password="passw0rd", is_staff=True
+        )
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "reader", "password": "passw0rd"},
+            format="json",
+        )
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["username"], "reader")
+        self.assertIs(token["is_staff"], True)
+        self.assertIs(token["is_active"], True)
+
+
+@mock.patch.object(BookViewSet, "authentication_classes", [StatelessJWTAuthentication])
+class StatelessAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="passw0rd"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.authorize(self.user)
+        cache.clear()
+
+    def authorize(self, user, **claims):
+        token = AccessToken.for_user(user)
+        token["username"] = user.username
+        token["is_active"] = user.is_active
+        for claim, value in claims.items():
+            token[claim] = value
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def add_review(self, book):
+        return self.client.post(
+            reverse("books-add-review", args=[book.id]),
+            {"review_text": "Nice", "rating": 4},
+            format="json",
+        )
+
+    def test_reads_skip_the_user_lookup(self):
+        # The book page and its reviews, without a query on auth_user.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("books-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_inactive_claim_is_rejected(self):
+        self.authorize(self.user, is_active=False)
+        response = self.client.get(reverse("books-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_add_review_loads_the_user_once(self):
+        other = Book.objects.create(
+            title="Other Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        get_user_cache().discard(self.user.pk)
+        self.assertEqual(self.add_review(self.book).status_code, 201)
+        with self.assertNumQueries(6):
+            response = self.add_review(other)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Review.objects.filter(user=self.user).count(), 2)
+
+    def test_add_review_rechecks_the_account(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.add_review(self.book)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Review.objects.exists())
@@ -1,7 +1,9 @@
+import tempfile
+
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from core.models import Book, Review
 from django.utils import timezone
@@ -53,10 +55,11 @@ class BookStoreTests(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Test Book")
-        self.assertEqual(len(response.data[0]["reviews"]), 1)
-        self.assertEqual(response.data[0]["reviews"][0]["review_text"], "Great book!")
+        results = response.data["results"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["title"], "Test Book")
+        self.assertEqual(len(results[0]["reviews"]), 1)
+        self.assertEqual(results[0]["reviews"][0]["review_text"], "Great book!")
 
     def test_view_book_detail_unauthenticated(self):
         url = reverse("books-detail", args=[self.book.id])
@@ -96,6 +99,14 @@ class BookStoreTests(APITestCase):
         else:
             self.fail("IntegrityError not raised for duplicate review")
 
+    def test_add_duplicate_review(self):
+        url = reverse("books-add-review", args=[self.book.id])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        response = self.client.post(url, {"review_text": "Again", "rating": 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+        self.assertEqual(Review.objects.count(), 1)
+
     def test_review_rating_validation(self):
         url = reverse("books-add-review", args=[self.book.id])
         data = {
@@ -113,6 +124,13 @@ class BookStoreTests(APITestCase):
 
 class BookModelTests(TestCase):
 
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
     def test_upload_invalid_file_extension(self):
         invalid_file = SimpleUploadedFile(
             "test.txt", b"This is a test file.", content_type="text/plain"
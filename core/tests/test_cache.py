@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.cache import detail_cache_key
+from core.models import Book, Review
+from core.routers import PrimaryReplicaRouter, replica_reads
+
+
+UserModel = get_user_model()
+
+
+class BookResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create(username="reader")
+        self.client.force_authenticate(user=self.user)
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.list_url = reverse("books-list")
+        self.detail_url = reverse("books-detail", args=[self.book.id])
+
+    def test_responses_are_served_from_cache(self):
+        for url in (self.list_url, self.detail_url):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.data, first.data)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url + "?q=nothing")
+        self.assertEqual(response.data["results"], [])
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_add_review_invalidates_list_and_detail(self):
+        list_etag = self.client.get(self.list_url)["ETag"]
+        detail_etag = self.client.get(self.detail_url)["ETag"]
+        url = reverse("books-add-review", args=[self.book.id])
+        self.client.post(url, {"review_text": "Good", "rating": 4})
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["review_count"], 1)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["reviews"]), 1)
+
+    def test_review_delete_and_book_save_invalidate(self):
+        review = Review.objects.create(
+            user=self.user, book=self.book, review_text="Good", rating=4
+        )
+        self.client.get(self.detail_url)
+        review.delete()
+        self.assertEqual(self.client.get(self.detail_url).data["reviews"], [])
+
+        self.book.title = "New Title"
+        self.book.save()
+        self.assertEqual(self.client.get(self.detail_url).data["title"], "New Title")
+        self.assertEqual(
+            self.client.get(self.list_url).data["results"][0]["title"], "New Title"
+        )
+
+    def test_other_books_detail_stays_cached(self):
+        self.client.get(self.detail_url)
+        Book.objects.create(
+            title="Other Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], DATABASE_REPLICA_PIN_SECONDS=60)
+@mock.patch.object(PrimaryReplicaRouter, "db_for_read", return_value="default")
+class ReplicaResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = UserModel.objects.create(username="reader")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.detail_url = reverse("books-detail", args=[self.book.id])
+
+    def test_writers_are_not_served_responses_read_from_replicas(self, db_for_read):
+        self.client.post(
+            reverse("books-add-review", args=[self.book.id]),
+            {"review_text": "Good", "rating": 4},
+        )
+        # What a lagging replica read right after the write would cache.
+        request = APIRequestFactory().get(self.detail_url)
+        token = replica_reads.set(True)
+        try:
+            key = detail_cache_key(request, self.book.id)
+        finally:
+            replica_reads.reset(token)
+        cache.set(key, {"reviews": []})
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(len(response.data["reviews"]), 1)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+UserModel = get_user_model()
+
+
+class BookDownloadTests(APITestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings.enable()
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = b"%PDF-1.4 " + bytes(range(256)) * 40
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.book.file.save("test.pdf", ContentFile(self.content))
+        self.url = reverse("books-download", args=[self.book.id])
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+
+    def download(self, headers=None):
+        response = self.client.get(self.url, headers=headers)
+        content = b"".join(getattr(response, "streaming_content", []))
+        return response, content
+
+    def test_download(self):
+        response, content = self.download({"Accept": "application/pdf"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content, self.content)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    def test_content_digest_and_book_title(self):
+        response, _ = self.download()
+        self.assertEqual(
+            response["ETag"], f'"{hashlib.sha256(self.content).hexdigest()}"'
+        )
+        self.assertEqual(
+            response["Content-Disposition"], 'inline; filename="Test Book.pdf"'
+        )
+
+    def test_byte_ranges(self):
+        size = len(self.content)
+        for header, start, end in (
+            ("bytes=0-99", 0, 99),
+            ("bytes=100-", 100, size - 1),
+            ("bytes=-50", size - 50, size - 1),
+            ("bytes=10-1000000", 10, size - 1),
+        ):
+            with self.subTest(header):
+                response, content = self.download({"Range": header})
+                self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+                self.assertEqual(content, self.content[start:][: end - start + 1])
+                self.assertEqual(
+                    response["Content-Range"], f"bytes {start}-{end}/{size}"
+                )
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.download({"Range": f"bytes={len(self.content)}-"})
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_multiple_ranges_get_the_whole_file(self):
+        response, content = self.download({"Range": "bytes=0-10,20-30"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content, self.content)
+
+    def test_conditional_requests(self):
+        response, _ = self.download()
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response, _ = self.download({"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        response, _ = self.download({"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response, _ = self.download({"Range": "bytes=0-9", "If-Range": etag})
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        response, content = self.download({"Range": "bytes=0-9", "If-Range": '"stale"'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content, self.content)
+
+    def test_book_without_file(self):
+        self.book.file.delete()
+        response, _ = self.download()
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(BOOK_DOWNLOAD_SENDFILE="x-accel-redirect")
+    def test_x_accel_redirect(self):
+        response, content = self.download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{self.book.file.name}"
+        )
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(content, b"")
+
+    @override_settings(BOOK_DOWNLOAD_SENDFILE="x-sendfile")
+    def test_x_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], self.book.file.path)
+
+    @skipUnless(resource, "needs getrusage()")
+    def test_memory_is_constant(self):
+        # A sparse file, so that the test doesn't need the disk space.
+        size = 512 * 1024 * 1024
+        self.book.file.save("large.pdf", ContentFile(b""))
+        with open(self.book.file.path, "wb") as f:
+            f.truncate(size)
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for headers in ({}, {"Range": "bytes=1000-"}):
+            response = self.client.get(self.url, headers=headers)
+            received = sum(len(chunk) for chunk in response.streaming_content)
+            self.assertGreater(received, size - 1001)
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        if os.uname().sysname == "Darwin":
+            growth //= 1024
+        self.assertLess(growth, 32 * 1024)
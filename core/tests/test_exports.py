@@ -0,0 +1,127 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.exports import EXPORT_FIELDS
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+class BookExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.books = []
+        for i in range(5):
+            book = Book.objects.create(
+                title=f'Book {i}, "quoted"',
+                author="Author",
+                description="Line one\nline two",
+                publish_date=now,
+            )
+            Book.objects.filter(pk=book.pk).update(
+                created_at=now - timedelta(days=5 - i)
+            )
+            self.books.append(book)
+        Review.objects.create(
+            user=self.user, book=self.books[0], review_text="Good", rating=4
+        )
+        self.url = reverse("books-export")
+
+    def export(self, headers=None, **params):
+        response = self.client.get(self.url, params, headers=headers)
+        content = b"".join(getattr(response, "streaming_content", []))
+        return response, content
+
+    def test_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [b.id for b in self.books])
+        self.assertEqual(list(rows[0]), EXPORT_FIELDS)
+        self.assertEqual(rows[0]["title"], self.books[0].title)
+        self.assertEqual((rows[0]["review_count"], rows[0]["average_rating"]), (1, 4))
+
+    def test_csv(self):
+        response, content = self.export(format="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), len(self.books))
+        self.assertEqual(rows[0]["title"], self.books[0].title)
+        self.assertEqual(rows[0]["description"], "Line one\nline two")
+
+    def test_since(self):
+        since = Book.objects.get(pk=self.books[3].pk).created_at
+        _, content = self.export(since=since.isoformat())
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows], [self.books[3].id, self.books[4].id]
+        )
+
+    def test_invalid_parameters(self):
+        for params in ({"format": "xml"}, {"since": "yesterday"}):
+            response, _ = self.export(**params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
+
+    def test_gzip(self):
+        _, plain = self.export()
+        response, content = self.export({"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(content), plain)
+
+    @override_settings(BOOK_EXPORT_CHUNK_SIZE=2)
+    def test_rows_are_read_with_a_server_side_cursor(self):
+        with mock.patch.object(
+            connection, "chunked_cursor", wraps=connection.chunked_cursor
+        ) as chunked_cursor:
+            _, content = self.export()
+        chunked_cursor.assert_called_once()
+        self.assertEqual(len(content.splitlines()), len(self.books))
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(user=None)
+        response, _ = self.export()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_command(self):
+        _, expected = self.export(format="csv")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "books.csv.gz")
+            call_command(
+                "export_books",
+                format="csv",
+                gzip=True,
+                output=path,
+                stderr=io.StringIO(),
+            )
+            with gzip.open(path) as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_command_to_a_text_stream(self):
+        _, expected = self.export()
+        stdout = io.StringIO()
+        call_command("export_books", stdout=stdout)
+        self.assertEqual(stdout.getvalue(), expected.decode())
+        with self.assertRaises(CommandError):
+            call_command("export_books", gzip=True, stdout=io.StringIO())
@@ -0,0 +1,151 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+class ImportBooksTests(APITestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.publish_date = datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)
+        self.book = Book.objects.create(
+            title="Existing Book",
+            author="Author",
+            description="Old description",
+            publish_date=self.publish_date,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def write_ndjson(self, records, name="books.ndjson"):
+        return self.write(name, "".join(json.dumps(r) + "\n" for r in records))
+
+    def record(self, i, **fields):
+        return {
+            "title": f"Book {i}",
+            "author": "Author",
+            "description": f"Description {i}",
+            "publish_date": "2024-05-01T12:00:00+00:00",
+            **fields,
+        }
+
+    def import_books(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_books", path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import(self):
+        for method in ("bulk", "copy"):
+            with self.subTest(method=method):
+                Book.objects.exclude(pk=self.book.pk).delete()
+                path = self.write_ndjson(self.record(i) for i in range(25))
+                out, _ = self.import_books(path, method=method, batch_size=10)
+                self.assertIn("Batch 3: 5 rows", out)
+                self.assertEqual(Book.objects.count(), 26)
+                book = Book.objects.get(title="Book 7")
+                self.assertEqual(book.description, "Description 7")
+                self.assertEqual(book.publish_date, self.publish_date)
+                self.assertIsNotNone(book.created_at)
+                self.assertEqual((book.review_count, book.average_rating), (0, 0))
+
+    def test_existing_books_are_updated(self):
+        user = UserModel.objects.create_user(username="reader", password="pw")
+        Review.objects.create(user=user, book=self.book, review_text="", rating=5)
+        for method in ("bulk", "copy"):
+            with self.subTest(method=method):
+                path = self.write_ndjson(
+                    [
+                        self.record(0, title="Existing Book", description="First"),
+                        self.record(0, title="Existing Book", description=method),
+                    ]
+                )
+                self.import_books(path, method=method)
+                self.assertEqual(Book.objects.count(), 1)
+                self.book.refresh_from_db()
+                self.assertEqual(self.book.description, method)
+                self.assertEqual(self.book.review_count, 1)
+
+    def test_invalid_rows_are_skipped(self):
+        path = self.write(
+            "books.jsonl",
+            "\n".join(
+                [
+                    json.dumps(self.record(1)),
+                    json.dumps(self.record(2, title="")),
+                    json.dumps(self.record(3, publish_date="someday")),
+                    json.dumps(self.record(4, author="A" * 300)),
+                    "{not json",
+                    json.dumps(self.record(5)),
+                ]
+            ),
+        )
+        out, err = self.import_books(path)
+        self.assertIn("skipped 4 invalid rows", out)
+        self.assertIn("Line 2: title:", err)
+        self.assertIn("Line 3: publish_date:", err)
+        self.assertIn("Line 4: author:", err)
+        self.assertIn("Line 5: row:", err)
+        self.assertEqual(
+            set(Book.objects.values_list("title", flat=True)),
+            {"Existing Book", "Book 1", "Book 5"},
+        )
+
+    def test_gzipped_csv(self):
+        path = self.write(
+            "books.csv.gz",
+            "title,author,description,publish_date\n"
+            'Book 1,Author,"Multi\nline, with comma",2024-05-01 12:00\n',
+        )
+        self.import_books(path)
+        book = Book.objects.get(title="Book 1")
+        self.assertEqual(book.description, "Multi\nline, with comma")
+
+    def test_export_can_be_imported(self):
+        user = UserModel.objects.create_user(username="reader", password="pw")
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse("books-export"), {"format": "csv"})
+        path = self.write("export.csv", b"".join(response.streaming_content).decode())
+        Book.objects.all().delete()
+        self.import_books(path)
+        book = Book.objects.get()
+        self.assertEqual(
+            (book.title, book.description, book.publish_date),
+            ("Existing Book", "Old description", self.publish_date),
+        )
+
+    def test_imported_books_are_listed_and_searchable(self):
+        user = UserModel.objects.create_user(username="reader", password="pw")
+        self.client.force_authenticate(user=user)
+        url = reverse("books-list")
+        self.client.get(url)  # cache the first page
+        path = self.write_ndjson([self.record(1, title="Dune Messiah")])
+        self.import_books(path)
+        titles = [b["title"] for b in self.client.get(url).data["results"]]
+        self.assertIn("Dune Messiah", titles)
+        response = self.client.get(url, {"q": "messiah"})
+        self.assertEqual(response.data["results"][0]["title"], "Dune Messiah")
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.import_books(self.write("books.txt", ""))
@@ -0,0 +1,78 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is PostgreSQL's")
+class IndexUsageTests(APITestCase):
+    """
+    Every query an endpoint runs against the books and reviews tables must be
+    able to use an index. Sequential scans are disabled for the EXPLAIN, so
+    the planner only falls back to one when no index matches.
+    """
+
+    def setUp(self):
+        self.user = UserModel.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="Great book!", rating=5
+        )
+
+    def assertIndexScans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in context.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT") or "core_" not in sql:
+                    continue
+                cursor.execute(f"EXPLAIN {sql}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertNotIn("Seq Scan", plan, f"{url}\n{sql}\n{plan}")
+
+    def test_book_list(self):
+        self.client.force_authenticate(user=self.user)
+        for ordering in ("-publish_date", "created_at", "-average_rating"):
+            self.assertIndexScans(reverse("books-list") + f"?ordering={ordering}")
+
+    def test_book_detail(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertIndexScans(reverse("books-detail", args=[self.book.id]))
+
+    def test_book_reviews(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertIndexScans(reverse("books-reviews", args=[self.book.id]))
+
+    def test_user_reviews(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertIndexScans(reverse("user-reviews"))
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.user)
+        books = reverse("admin:core_book_changelist")
+        reviews = reverse("admin:core_review_changelist")
+        year = self.book.publish_date.year
+        self.assertIndexScans(books + "?author=Author")
+        self.assertIndexScans(books + "?q=Author")
+        self.assertIndexScans(books + f"?publish_date__year={year}")
+        self.assertIndexScans(reviews + "?rating__exact=5")
+        self.assertIndexScans(reviews + f"?created_at__year={year}")
@@ -0,0 +1,149 @@
+import os
+import runpy
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core import metrics
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+def timings(response):
+    return {
+        entry.split(";")[0]: entry for entry in response["Server-Timing"].split(", ")
+    }
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_SERVER_TIMING=True, METRICS_TOKEN="")
+class MetricsMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="Great", rating=5
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.addCleanup(cache.clear)
+
+    def test_server_timing(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(timings(response)),
+            {"app", "db", "auth", "throttle", "serialize", "render", "queries"},
+        )
+        self.assertEqual(timings(response)["queries"], 'queries;desc="3"')
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_only_timed(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertEqual(set(timings(response)), {"app"})
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_async_views(self):
+        async def request():
+            return await self.async_client.get(
+                reverse("async-books-detail", args=[self.book.pk]),
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+
+        response = async_to_sync(request)()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual({"app", "db", "auth", "throttle"}, set(timings(response)))
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics(self):
+        self.client.get(reverse("books-detail", args=[self.book.pk]))
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer scraper")
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        content = response.content.decode()
+        for line in (
+            'bookstore_responses_total{view="books-detail",method="GET",status="200"}',
+            'bookstore_request_duration_seconds_count{view="books-detail",',
+            'bookstore_request_phase_seconds_count{view="books-detail",phase="db"}',
+            'bookstore_request_queries_bucket{view="books-detail",le="+Inf"}',
+            'bookstore_response_size_bytes_sum{view="books-detail"}',
+        ):
+            self.assertIn(line, content)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_token(self):
+        self.client.credentials()
+        self.assertEqual(
+            self.client.get(reverse("metrics")).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metrics_without_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(DEBUG=True):
+            response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metrics_without_token_with_debug_false_in_env(self):
+        path = os.path.join(settings.BASE_DIR, "bookstore", "settings.py")
+        for value, expected in [("False", False), ("", False), ("true", True)]:
+            with mock.patch.dict(os.environ, {"DEBUG": value}):
+                debug = runpy.run_path(path)["DEBUG"]
+            self.assertIs(debug, expected)
+            with override_settings(DEBUG=debug):
+                response = self.client.get(reverse("metrics"))
+            self.assertEqual(response.status_code, 200 if expected else 404)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertNotIn("Server-Timing", response)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_render(self):
+        histogram = metrics.Histogram("latency", "Latency.", ("view",), (1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value, 'a "view"')
+        self.assertEqual(
+            [*histogram.render()],
+            [
+                "# HELP latency Latency.",
+                "# TYPE latency histogram",
+                'latency_bucket{view="a \\"view\\"",le="1"} 2',
+                'latency_bucket{view="a \\"view\\"",le="5"} 3',
+                'latency_bucket{view="a \\"view\\"",le="+Inf"} 4',
+                'latency_sum{view="a \\"view\\""} 14.5',
+                'latency_count{view="a \\"view\\""} 4',
+            ],
+        )
@@ -0,0 +1,147 @@
+import base64
+import json
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+class BookPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        # Pairs of books share a publish date to exercise the id tie-breaker.
+        self.books = [
+            Book.objects.create(
+                title=f"Book {i}",
+                author="Author",
+                description="Description",
+                publish_date=now - timedelta(days=i // 2),
+            )
+            for i in range(7)
+        ]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [book["id"] for book in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_list_is_paginated_by_publish_date_then_id(self):
+        url = reverse("books-list") + "?page_size=2"
+        expected = [
+            book.id
+            for book in sorted(
+                self.books, key=lambda b: (b.publish_date, b.id), reverse=True
+            )
+        ]
+        self.assertEqual(self.walk(url), expected)
+
+    def test_list_ordering_by_created_at(self):
+        url = reverse("books-list") + "?page_size=3&ordering=created_at"
+        self.assertEqual(self.walk(url), [book.id for book in self.books])
+
+    def test_previous_link_returns_previous_page(self):
+        url = reverse("books-list") + "?page_size=3"
+        first = self.client.get(url).data
+        second = self.client.get(first["next"]).data
+        previous = self.client.get(second["previous"]).data
+        self.assertEqual(previous["results"], first["results"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("books-list") + "?cursor=cD14eXo=")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        for position in (
+            ["not a date", 1],
+            ["2024-01-01T00:00:00+00:00", "one"],
+            ["2024-01-01T00:00:00+00:00", None],
+            [{"a": 1}, [1]],
+        ):
+            cursor = base64.b64encode(
+                urlencode({"p": json.dumps(position)}).encode()
+            ).decode()
+            response = self.client.get(
+                reverse("books-list"),
+                {"ordering": "-publish_date", "cursor": cursor},
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, position
+            )
+
+    @override_settings(BOOK_LIST_REVIEWS_LIMIT=2)
+    def test_list_embeds_latest_reviews_only(self):
+        book = self.books[0]
+        for i in range(4):
+            user = UserModel.objects.create(username=f"user{i}")
+            Review.objects.create(
+                user=user, book=book, review_text=f"Review {i}", rating=i
+            )
+        response = self.client.get(reverse("books-list"))
+        data = next(b for b in response.data["results"] if b["id"] == book.id)
+        self.assertEqual(
+            [review["review_text"] for review in data["reviews"]],
+            ["Review 3", "Review 2"],
+        )
+        self.assertEqual(data["review_count"], 4)
+        self.assertTrue(
+            data["reviews_url"].endswith(reverse("books-reviews", args=[book.id]))
+        )
+
+    def test_book_reviews_are_paginated(self):
+        book = self.books[0]
+        for i in range(5):
+            user = UserModel.objects.create(username=f"user{i}")
+            Review.objects.create(
+                user=user, book=book, review_text=f"Review {i}", rating=i
+            )
+        url = reverse("books-reviews", args=[book.id]) + "?page_size=2"
+        texts = []
+        while url:
+            response = self.client.get(url)
+            texts += [review["review_text"] for review in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(texts, [f"Review {i}" for i in reversed(range(5))])
+
+    def test_user_reviews_are_paginated(self):
+        other = UserModel.objects.create(username="other")
+        for i, book in enumerate(self.books[:5]):
+            Review.objects.create(
+                user=self.user, book=book, review_text=f"Review {i}", rating=i
+            )
+            Review.objects.create(user=other, book=book, review_text="Other", rating=i)
+        url = reverse("user-reviews") + "?page_size=2"
+        reviews = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            reviews += response.data["results"]
+            url = response.data["next"]
+        self.assertEqual(
+            [review["review_text"] for review in reviews],
+            [f"Review {i}" for i in reversed(range(5))],
+        )
+        self.assertEqual(reviews[0]["book"], self.books[4].id)
+        self.assertNotIn("user", reviews[0])
+
+    def test_user_reviews_require_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse("user-reviews"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,134 @@
+import os
+import runpy
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import passwords
+
+
+UserModel = get_user_model()
+
+SCRYPT_FIRST = [
+    "core.passwords.ScryptPasswordHasher",
+    "core.passwords.PBKDF2PasswordHasher",
+]
+
+
+class HashingPoolTests(SimpleTestCase):
+
+    def test_hashes_run_on_the_pool(self):
+        thread = passwords.get_pool().run(threading.current_thread)
+        self.assertTrue(thread.name.startswith("password-hashing"))
+
+    def test_nested_calls_run_inline(self):
+        pool = passwords.get_pool()
+        thread = pool.run(pool.run, threading.current_thread)
+        self.assertTrue(thread.name.startswith("password-hashing"))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=1)
+    def test_full_queue(self):
+        pool = passwords.get_pool()
+        release = threading.Event()
+        threads = [
+            threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        self.addCleanup(release.set)
+        while pool.slots._value:
+            release.wait(0.001)
+        with self.assertRaises(passwords.HashingUnavailable):
+            with passwords.rejecting():
+                pool.run(int)
+
+        # Outside rejecting(), callers wait for room in the queue.
+        waiting = threading.Thread(target=pool.run, args=(int,))
+        waiting.start()
+        waiting.join(0.05)
+        self.assertTrue(waiting.is_alive())
+        release.set()
+        waiting.join()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(pool.run(int), 0)
+
+
+class PasswordHashingAPITests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="passw0rd"
+        )
+
+    def login(self, password="passw0rd"):
+        return self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "reader", "password": password},
+            format="json",
+        )
+
+    @override_settings(
+        PASSWORD_HASHING_WORKERS=1,
+        PASSWORD_HASHING_QUEUE_SIZE=0,
+        PASSWORD_HASHING_RETRY_AFTER=2,
+    )
+    def test_saturated_pool_returns_503(self):
+        pool = passwords.get_pool()
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hash_slowly():
+            started.set()
+            release.wait()
+
+        thread = threading.Thread(target=pool.run, args=(hash_slowly,))
+        thread.start()
+        started.wait()
+
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "2")
+        response = self.client.post(
+            reverse("register"),
+            {"username": "new", "email": "new@example.com", "password": "passw0rd"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(UserModel.objects.filter(username="new").exists())
+
+        release.set()
+        thread.join()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_rehash_on_login(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertEqual(self.login("wr0ng").status_code, 401)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith("scrypt$"))
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_sha1_is_only_upgraded_from(self):
+        path = os.path.join(settings.BASE_DIR, "bookstore", "settings.py")
+        with mock.patch.dict(os.environ, {"PASSWORD_HASHER": "pbkdf2_sha1"}):
+            with self.assertRaises(ImproperlyConfigured):
+                runpy.run_path(path)
+
+        self.user.password = make_password("passw0rd", hasher="pbkdf2_sha1")
+        self.user.save(update_fields=["password"])
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
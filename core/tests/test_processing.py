@@ -0,0 +1,201 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from core import extractors, processing
+from core.models import Book, BookProcessingJob
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+Status = BookProcessingJob.Status
+
+RESULT = {"page_count": 12, "text": "Chapter one", "preview": b"\x89PNG preview"}
+
+
+class MediaRootMixin:
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media = media.name
+
+    def create_book(self, content=b"%PDF-1.4 content", name="book.pdf"):
+        book = Book.objects.create(
+            title="Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        book.file.save(name, ContentFile(content))
+        return book
+
+
+@mock.patch("core.processing.extractors.extract", return_value=RESULT)
+class ProcessingTests(MediaRootMixin, TestCase):
+
+    def process(self, *args):
+        out = StringIO()
+        call_command(
+            "process_books", "--workers", "0", *args, stdout=out, stderr=StringIO()
+        )
+        return out.getvalue()
+
+    def test_saving_a_file_queues_a_job(self, extract):
+        book = self.create_book()
+        job = BookProcessingJob.objects.get()
+        self.assertEqual((job.book, job.file), (book, book.file.name))
+        self.assertEqual(job.status, Status.PENDING)
+
+        book.title = "Renamed"
+        book.save()
+        book.file.save("copy.pdf", ContentFile(b"%PDF-1.4 content"))
+        self.assertEqual(BookProcessingJob.objects.count(), 1)
+
+        book.file.save("other.pdf", ContentFile(b"%PDF-1.4 other"))
+        self.assertEqual(BookProcessingJob.objects.count(), 2)
+
+    def test_process_books(self, extract):
+        book = self.create_book()
+        output = self.process()
+        self.assertIn("Processed 1 books, 0 failed", output)
+        extract.assert_called_once_with(
+            book.file.path,
+            processing.settings.BOOK_PROCESSING_MAX_PAGES,
+            processing.settings.BOOK_PROCESSING_MAX_TEXT,
+            processing.settings.BOOK_PREVIEW_WIDTH,
+        )
+
+        book.refresh_from_db()
+        self.assertEqual(book.page_count, 12)
+        self.assertEqual(book.text.text, "Chapter one")
+        self.assertTrue(book.preview.name.startswith("previews/"))
+        with book.preview.open("rb") as f:
+            self.assertEqual(f.read(), b"\x89PNG preview")
+        job = BookProcessingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (Status.DONE, 1))
+
+        self.assertIn("Processed 0 books", self.process())
+        extract.assert_called_once()
+
+    @override_settings(BOOK_PROCESSING_MAX_ATTEMPTS=2, BOOK_PROCESSING_RETRY_DELAY=60)
+    def test_failed_jobs_are_retried(self, extract):
+        extract.side_effect = extractors.ExtractionError("Unreadable PDF")
+        self.create_book()
+        self.process()
+        job = BookProcessingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (Status.PENDING, 1))
+        self.assertEqual(job.error, "Unreadable PDF")
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+
+        self.process()
+        self.assertEqual(extract.call_count, 1)
+
+        BookProcessingJob.objects.update(run_after=timezone.now())
+        self.assertIn("Processed 0 books, 1 failed", self.process())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Status.FAILED, 2))
+
+    def test_replaced_file_is_left_alone(self, extract):
+        book = self.create_book()
+        # Replaced without queueing its own job yet.
+        Book.objects.filter(pk=book.pk).update(file="books/other.pdf")
+        self.process()
+        book.refresh_from_db()
+        self.assertIsNone(book.page_count)
+        self.assertFalse(book.preview)
+        self.assertEqual(BookProcessingJob.objects.get().status, Status.DONE)
+
+    def test_backfill(self, extract):
+        book = self.create_book()
+        BookProcessingJob.objects.all().delete()
+        self.create_book(content=b"%PDF-1.4 queued")
+        Book.objects.create(
+            title="No file",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        output = self.process("--backfill")
+        self.assertIn("Queued 1 books", output)
+        self.assertIn("Processed 2 books, 0 failed", output)
+        book.refresh_from_db()
+        self.assertEqual(book.page_count, 12)
+
+    def test_enqueue_counts_new_jobs_only(self, extract):
+        books = [self.create_book(), self.create_book(content=b"%PDF-1.4 other")]
+        BookProcessingJob.objects.filter(book=books[0]).delete()
+        self.assertEqual(processing.enqueue(books), 1)
+        self.assertEqual(processing.enqueue(books), 0)
+        self.assertEqual(BookProcessingJob.objects.count(), 2)
+
+    @override_settings(BOOK_PROCESSING_MAX_ATTEMPTS=2, BOOK_PROCESSING_LEASE=60)
+    def test_expired_leases_are_claimed_again(self, extract):
+        self.create_book()
+        [job] = processing.claim(5)
+        self.assertEqual(processing.claim(5), [])
+
+        BookProcessingJob.objects.update(locked_until=timezone.now())
+        [job] = processing.claim(5)
+        self.assertEqual(job.attempts, 2)
+
+        BookProcessingJob.objects.update(locked_until=timezone.now())
+        self.assertEqual(processing.claim(5), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.FAILED)
+
+    def test_gc_book_files_collects_previews(self, extract):
+        book = self.create_book()
+        self.process()
+        book.refresh_from_db()
+        preview = book.preview.path
+        Book.objects.filter(pk=book.pk).update(preview=None)
+        past = time.time() - 7200
+        os.utime(preview, (past, past))
+
+        call_command("gc_book_files", stdout=StringIO())
+        self.assertFalse(os.path.exists(preview))
+        self.assertTrue(os.path.exists(book.file.path))
+
+
+class WorkerPoolTests(MediaRootMixin, TransactionTestCase):
+
+    @override_settings(BOOK_PROCESSING_MAX_ATTEMPTS=1)
+    def test_jobs_run_in_worker_processes(self):
+        # Not a readable PDF, with or without pypdf installed.
+        book = self.create_book(content=b"%PDF-1.4 truncated")
+        done = []
+        processing.process(1, on_job=done.append)
+        [job] = done
+        self.assertEqual((job.book_id, job.status), (book.pk, Status.FAILED))
+        self.assertTrue(job.error)
+
+
+class ExtractorTests(TestCase):
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(extractors.ExtractionError):
+            extractors.extract("book.epub", 10, 100, 400)
+
+    @skipUnless(pypdf, "pypdf is not installed")
+    def test_extract_pdf(self):
+        writer = pypdf.PdfWriter()
+        for _ in range(3):
+            writer.add_blank_page(width=200, height=200)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+            writer.write(f)
+            f.flush()
+            result = extractors.extract(f.name, 2, 100, 400)
+        self.assertEqual(result["page_count"], 3)
+        self.assertEqual(result["text"], "\n\n")
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book, Review
+
+
+UserModel = get_user_model()
+
+
+class QueryCountTestCase(APITestCase):
+    """
+    Base class for asserting that an endpoint runs a fixed number of queries
+    whatever the amount of data behind it.
+    """
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.book = self.create_books(1)[0]
+
+    def create_books(self, count, reviews_per_book=3):
+        books = []
+        for _ in range(count):
+            n = Book.objects.count()
+            book = Book.objects.create(
+                title=f"Book {n}",
+                author=f"Author {n}",
+                description="Description",
+                publish_date=timezone.now(),
+            )
+            for i in range(reviews_per_book):
+                user = UserModel.objects.create(username=f"user-{n}-{i}")
+                Review.objects.create(
+                    user=user, book=book, review_text="Review", rating=i % 6
+                )
+            books.append(book)
+        return books
+
+    def assertConstantQueries(self, num, request):
+        """
+        Run `request` against a small and a larger data set, expecting `num`
+        queries both times. The response cache is cleared first, so this
+        measures the uncached path.
+        """
+        cache.clear()
+        with self.assertNumQueries(num):
+            response = request()
+            self.assertLess(response.status_code, 400)
+        self.create_books(5, reviews_per_book=4)
+        cache.clear()
+        with self.assertNumQueries(num):
+            response = request()
+            self.assertLess(response.status_code, 400)
+
+
+class BookQueryCountTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
+
+    def test_book_list(self):
+        url = reverse("books-list")
+        self.assertConstantQueries(2, lambda: self.client.get(url))
+
+    def test_book_detail(self):
+        url = reverse("books-detail", args=[self.book.id])
+        self.assertConstantQueries(2, lambda: self.client.get(url))
+
+    def test_book_reviews(self):
+        url = reverse("books-reviews", args=[self.book.id])
+        self.assertConstantQueries(2, lambda: self.client.get(url))
+
+    def test_user_reviews(self):
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="Mine", rating=3
+        )
+        url = reverse("user-reviews")
+        self.assertConstantQueries(1, lambda: self.client.get(url))
+
+    def test_add_review(self):
+        url = reverse("books-add-review", args=[self.book.id])
+        # Book lookup, then insert, rating totals update and rating stats upsert
+        # inside a savepoint.
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                url, {"review_text": "Nice", "rating": 4}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = UserModel.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.client.force_login(self.admin)
+
+    def test_book_changelist(self):
+        url = reverse("admin:core_book_changelist")
+        self.assertConstantQueries(7, lambda: self.client.get(url))
+
+    def test_review_changelist(self):
+        url = reverse("admin:core_review_changelist")
+        self.assertConstantQueries(7, lambda: self.client.get(url))
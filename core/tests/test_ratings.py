@@ -0,0 +1,264 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import ratings
+from core.models import Book, BookRatingStats, Review
+
+
+UserModel = get_user_model()
+
+
+class BookRatingTotalsTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create(username="reader")
+        self.other = UserModel.objects.create(username="other")
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+
+    def assertTotals(self, review_count, rating_sum, average_rating):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.review_count, review_count)
+        self.assertEqual(self.book.rating_sum, rating_sum)
+        self.assertAlmostEqual(self.book.average_rating, average_rating)
+
+    def test_add_review_updates_totals(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("books-add-review", args=[self.book.id])
+        response = self.client.post(url, {"review_text": "Good", "rating": 4})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        Review.objects.create(
+            user=self.other, book=self.book, review_text="Meh", rating=1
+        )
+        self.assertTotals(2, 5, 2.5)
+
+    def test_rating_change_and_delete_update_totals(self):
+        review = Review.objects.create(
+            user=self.user, book=self.book, review_text="Good", rating=4
+        )
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 2
+        review.save()
+        self.assertTotals(1, 2, 2.0)
+        review.delete()
+        self.assertTotals(0, 0, 0.0)
+
+    def test_admin_inline_delete_updates_totals(self):
+        review = Review.objects.create(
+            user=self.user, book=self.book, review_text="Good", rating=4
+        )
+        Review.objects.create(
+            user=self.other, book=self.book, review_text="Bad", rating=1
+        )
+        admin = UserModel.objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(admin)
+        publish_date = timezone.localtime(self.book.publish_date)
+        data = {
+            "title": self.book.title,
+            "author": self.book.author,
+            "description": self.book.description,
+            "publish_date_0": publish_date.strftime("%Y-%m-%d"),
+            "publish_date_1": publish_date.strftime("%H:%M:%S"),
+            "reviews-TOTAL_FORMS": "1",
+            "reviews-INITIAL_FORMS": "1",
+            "reviews-MIN_NUM_FORMS": "0",
+            "reviews-MAX_NUM_FORMS": "1000",
+            "reviews-0-id": review.id,
+            "reviews-0-book": self.book.id,
+            "reviews-0-user": self.user.id,
+            "reviews-0-review_text": review.review_text,
+            "reviews-0-rating": review.rating,
+            "reviews-0-DELETE": "on",
+        }
+        url = reverse("admin:core_book_change", args=[self.book.id])
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertTotals(1, 1, 1.0)
+
+    def test_rebuild_book_ratings_command(self):
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="Good", rating=5
+        )
+        Review.objects.create(
+            user=self.other, book=self.book, review_text="Okay", rating=3
+        )
+        Book.objects.update(review_count=0, rating_sum=0)
+        call_command("rebuild_book_ratings", batch_size=1, stdout=StringIO())
+        self.assertTotals(2, 8, 4.0)
+
+    def test_list_can_be_ordered_by_average_rating(self):
+        better = Book.objects.create(
+            title="Better Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        Review.objects.create(user=self.user, book=better, review_text="", rating=5)
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="", rating=2
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("books-list") + "?ordering=-average_rating")
+        results = response.data["results"]
+        self.assertEqual([book["id"] for book in results], [better.id, self.book.id])
+        self.assertEqual(results[0]["average_rating"], 5.0)
+
+
+@override_settings(BOOK_RATING_PRIOR_MEAN=2.5, BOOK_RATING_PRIOR_WEIGHT=10)
+class BookRatingStatsTests(APITestCase):
+
+    def setUp(self):
+        self.users = [UserModel.objects.create(username=f"user{i}") for i in range(4)]
+        self.books = [
+            Book.objects.create(
+                title=f"Book {i}",
+                author="Author",
+                description="Description",
+                publish_date=timezone.now(),
+            )
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.users[0])
+
+    def review(self, user, book, rating):
+        return Review.objects.create(
+            user=self.users[user], book=self.books[book], review_text="", rating=rating
+        )
+
+    def assertStats(self, book, histogram):
+        stats = BookRatingStats.objects.get(book=self.books[book])
+        review_count = sum(histogram)
+        rating_sum = sum(rating * count for rating, count in enumerate(histogram))
+        self.assertEqual(stats.histogram, histogram)
+        self.assertEqual(
+            (stats.review_count, stats.rating_sum), (review_count, rating_sum)
+        )
+        self.assertAlmostEqual(
+            stats.bayesian_average, (25 + rating_sum) / (10 + review_count)
+        )
+
+    def test_stats_follow_reviews(self):
+        self.assertFalse(BookRatingStats.objects.exists())
+        review = self.review(0, 0, 4)
+        self.review(1, 0, 4)
+        self.assertStats(0, [0, 0, 0, 0, 2, 0])
+
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 1
+        review.save()
+        self.assertStats(0, [0, 1, 0, 0, 1, 0])
+
+        review.book = self.books[1]
+        review.save()
+        self.assertStats(0, [0, 0, 0, 0, 1, 0])
+        self.assertStats(1, [0, 1, 0, 0, 0, 0])
+
+        review.delete()
+        self.assertStats(1, [0, 0, 0, 0, 0, 0])
+
+    def test_batch_reviews_update_stats(self):
+        self.review(0, 0, 1)
+        response = self.client.post(
+            reverse("reviews-batch"),
+            {
+                "items": [
+                    {"book": self.books[0].id, "rating": 5, "review_text": "Yes"},
+                    {"book": self.books[1].id, "rating": 3, "review_text": "Okay"},
+                ],
+                "upsert": True,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertStats(0, [0, 0, 0, 0, 0, 1])
+        self.assertStats(1, [0, 0, 0, 1, 0, 0])
+
+    def test_rebuild_book_ratings_command(self):
+        self.review(0, 0, 5)
+        self.review(1, 0, 0)
+        self.review(0, 1, 2)
+        BookRatingStats.objects.all().delete()
+        BookRatingStats.objects.create(book=self.books[2], rating_3=1)
+        with override_settings(BOOK_RATING_PRIOR_MEAN=4, BOOK_RATING_PRIOR_WEIGHT=1):
+            call_command("rebuild_book_ratings", batch_size=2, stdout=StringIO())
+            self.assertAlmostEqual(
+                BookRatingStats.objects.get(book=self.books[1]).bayesian_average, 3.0
+            )
+        self.assertFalse(BookRatingStats.objects.filter(book=self.books[2]).exists())
+        call_command("rebuild_book_ratings", stdout=StringIO())
+        self.assertStats(0, [1, 0, 0, 0, 0, 1])
+        self.assertStats(1, [0, 0, 1, 0, 0, 0])
+
+    def test_top(self):
+        # One 5 ranks below many 4s.
+        self.review(0, 0, 5)
+        for user in range(4):
+            self.review(user, 1, 4)
+        self.review(0, 2, 1)
+        url = reverse("books-top")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [book["id"] for book in results],
+            [self.books[1].id, self.books[0].id, self.books[2].id],
+        )
+        self.assertEqual(results[0]["rating_stats"]["histogram"], [0, 0, 0, 0, 4, 0])
+        self.assertEqual(results[0]["title"], "Book 1")
+
+        response = self.client.get(url, {"limit": 1, "fields": "id,rating_stats"})
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "id": self.books[1].id,
+                    "rating_stats": {
+                        "histogram": [0, 0, 0, 0, 4, 0],
+                        "review_count": 4,
+                        "bayesian_average": ratings.bayesian_average(4, 16),
+                    },
+                }
+            ],
+        )
+
+        # The cached leaderboard is refreshed.
+        Review.objects.filter(book=self.books[1]).delete()
+        response = self.client.get(url)
+        self.assertEqual(
+            [book["id"] for book in response.json()["results"]],
+            [self.books[0].id, self.books[2].id],
+        )
+
+    def test_top_limit(self):
+        url = reverse("books-top")
+        for limit in ("0", "-1", "ten"):
+            response = self.client.get(url, {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(BOOK_TOP_MAX_LIMIT=1):
+            self.review(0, 0, 5)
+            self.review(0, 1, 5)
+            response = self.client.get(url, {"limit": 50})
+            self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_ratings(self):
+        self.review(0, 0, 3)
+        response = self.client.get(reverse("books-ratings", args=[self.books[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["histogram"], [0, 0, 0, 1, 0, 0])
+
+        response = self.client.get(reverse("books-ratings", args=[self.books[1].id]))
+        self.assertEqual(
+            response.json(),
+            {"histogram": [0] * 6, "review_count": 0, "bayesian_average": 2.5},
+        )
@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book, Review
+from core.serializers import ReviewSerializer
+
+
+UserModel = get_user_model()
+
+
+class ReviewBatchTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.books = [
+            Book.objects.create(
+                title=f"Book {i}",
+                author="Author",
+                description="Description",
+                publish_date=timezone.now(),
+            )
+            for i in range(3)
+        ]
+        self.existing = Review.objects.create(
+            user=self.user, book=self.books[2], review_text="Meh", rating=2
+        )
+        self.url = reverse("reviews-batch")
+
+    def submit(self, items, **data):
+        return self.client.post(self.url, {"items": items, **data}, format="json")
+
+    def item(self, book, rating=4, review_text="Nice"):
+        return {"book": book.id, "rating": rating, "review_text": review_text}
+
+    def assertTotals(self, book, review_count, rating_sum):
+        book.refresh_from_db()
+        self.assertEqual(
+            (book.review_count, book.rating_sum), (review_count, rating_sum)
+        )
+
+    def test_batch(self):
+        response = self.submit(
+            [
+                self.item(self.books[0], rating=5),
+                self.item(self.books[1], rating=9),
+                {"book": 0, "rating": 3, "review_text": "Gone"},
+                self.item(self.books[1], rating=3),
+                self.item(self.books[1], rating=4),
+                self.item(self.books[2]),
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["created", "invalid", "invalid", "created", "invalid", "invalid"],
+        )
+        self.assertEqual(results[0]["review"]["book"], self.books[0].id)
+        self.assertEqual(results[0]["review"]["user"], self.user.id)
+        self.assertIsNotNone(results[0]["review"]["id"])
+        self.assertIn("rating", results[1]["errors"])
+        self.assertIn("book", results[2]["errors"])
+        self.assertIn("book", results[4]["errors"])
+        self.assertIn("non_field_errors", results[5]["errors"])
+
+        self.assertEqual(Review.objects.count(), 3)
+        self.assertTotals(self.books[0], 1, 5)
+        self.assertTotals(self.books[1], 1, 3)
+        self.assertTotals(self.books[2], 1, 2)
+
+    def test_upsert(self):
+        response = self.submit(
+            [self.item(self.books[2], rating=5, review_text="Grew on me")],
+            upsert=True,
+        )
+        result = response.data["results"][0]
+        self.assertEqual(result["status"], "updated")
+        self.assertEqual(result["review"]["id"], self.existing.id)
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            result["review"]["created_at"],
+            ReviewSerializer(self.existing).data["created_at"],
+        )
+        self.assertEqual(
+            (self.existing.review_text, self.existing.rating), ("Grew on me", 5)
+        )
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertTotals(self.books[2], 1, 5)
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Extra {i}",
+                author="Author",
+                description="Description",
+                publish_date=timezone.now(),
+            )
+            for i in range(20)
+        )
+        # Savepoint, books, existing reviews, insert, totals, stats, release.
+        with self.assertNumQueries(7):
+            response = self.submit([self.item(book) for book in books])
+        self.assertEqual({r["status"] for r in response.data["results"]}, {"created"})
+
+    def test_cached_book_is_refreshed(self):
+        url = reverse("books-detail", args=[self.books[0].id])
+        self.assertEqual(self.client.get(url).data["reviews"], [])
+        self.submit([self.item(self.books[0])])
+        self.assertEqual(len(self.client.get(url).data["reviews"]), 1)
+
+    @override_settings(REVIEW_BATCH_MAX_ITEMS=2)
+    def test_batch_size_limit(self):
+        response = self.submit([self.item(book) for book in self.books])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("items", response.data)
+        self.assertFalse(Review.objects.exclude(pk=self.existing.pk).exists())
+
+    def test_invalid_request(self):
+        for data in ({"items": []}, {"items": "nope"}, {}):
+            response = self.client.post(self.url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(user=None)
+        response = self.submit([self.item(self.books[0])])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
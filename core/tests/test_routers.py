@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import Book, BookUpload, Review
+from core.routers import PrimaryReplicaRouter, replica_reads
+
+
+UserModel = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.connections = {
+            alias: mock.Mock(in_atomic_block=False)
+            for alias in ("default", "replica_0", "replica_1")
+        }
+        for patcher in (
+            mock.patch("core.routers.connections", self.connections),
+            mock.patch("core.routers.unavailable", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(replica_reads.reset, replica_reads.set(False))
+
+    def test_reads_use_the_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Book), "default")
+
+    def test_replica_reads(self):
+        replica_reads.set(True)
+        self.assertIn(self.router.db_for_read(Book), ["replica_0", "replica_1"])
+        self.assertEqual(self.router.db_for_write(Book), "default")
+
+    def test_reads_in_transactions_use_the_primary(self):
+        replica_reads.set(True)
+        self.connections["default"].in_atomic_block = True
+        self.assertEqual(self.router.db_for_read(Book), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        replica_reads.set(True)
+        self.assertEqual(self.router.db_for_read(Book), "default")
+
+    @override_settings(DATABASE_REPLICA_RETRY_SECONDS=30)
+    def test_unavailable_replicas_are_skipped(self):
+        replica_reads.set(True)
+        broken = self.connections["replica_0"].ensure_connection
+        broken.side_effect = OperationalError("connection refused")
+        with self.assertLogs("core.routers", "WARNING"):
+            for _ in range(5):
+                self.assertEqual(self.router.db_for_read(Book), "replica_1")
+        broken.assert_called_once()
+
+        replica = self.connections["replica_1"]
+        replica.ensure_connection.side_effect = OperationalError("connection refused")
+        with self.assertLogs("core.routers", "WARNING"):
+            self.assertEqual(self.router.db_for_read(Book), "default")
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "core"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "core"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaReadsMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.other = UserModel.objects.create_user(
+            username="other", password="testpassword"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.authenticate(self.user)
+        self.addCleanup(cache.clear)
+
+    def authenticate(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def replica_reads_of(self, method, url, **kwargs):
+        seen = []
+
+        def db_for_read(router, model, **hints):
+            seen.append(replica_reads.get())
+            return "default"
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", db_for_read):
+            getattr(self.client, method)(url, **kwargs)
+        return set(seen)
+
+    def test_book_reads(self):
+        url = reverse("books-detail", args=[self.book.id])
+        self.assertEqual(self.replica_reads_of("get", url), {True})
+
+    def test_writes_read_from_the_primary(self):
+        url = reverse("books-add-review", args=[self.book.id])
+        data = {"review_text": "Nice", "rating": 4}
+        self.assertEqual(self.replica_reads_of("post", url, data=data), {False})
+        self.assertTrue(Review.objects.exists())
+
+    @override_settings(DATABASE_REPLICA_PIN_SECONDS=60)
+    def test_writers_are_pinned_to_the_primary(self):
+        self.client.post(
+            reverse("books-add-review", args=[self.book.id]),
+            {"review_text": "Nice", "rating": 4},
+        )
+        # Pins are shared by the workers of the host, not kept in LocMemCache.
+        cache.clear()
+        url = reverse("books-detail", args=[self.book.id])
+        self.assertEqual(self.replica_reads_of("get", url), {False})
+        self.authenticate(self.other)
+        self.assertEqual(self.replica_reads_of("get", url), {True})
+
+    def test_failed_writes_do_not_pin(self):
+        self.client.post(
+            reverse("books-add-review", args=[self.book.id]), {"rating": 9}
+        )
+        url = reverse("books-detail", args=[self.book.id])
+        self.assertEqual(self.replica_reads_of("get", url), {True})
+
+    def test_other_views_read_from_the_primary(self):
+        self.user.is_staff = True
+        self.user.save()
+        upload = BookUpload.objects.create(
+            book=self.book, user=self.user, filename="book.pdf", size=1
+        )
+        url = reverse("uploads-detail", args=[upload.pk])
+        self.assertEqual(self.replica_reads_of("get", url), {False})
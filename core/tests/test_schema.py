@@ -0,0 +1,70 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from core import schema
+
+
+@override_settings(SCHEMA_VERSION="test")
+class SchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_dir = Path(directory.name)
+        settings = override_settings(SCHEMA_DIR=self.schema_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_json(self):
+        response = self.client.get(reverse("schema-json"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        document = json.loads(response.content)
+        self.assertEqual(document["info"]["title"], "BookStore API")
+        self.assertIn("/books/", document["paths"])
+
+    def test_yaml(self):
+        response = self.client.get(reverse("schema-yaml"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/yaml")
+        self.assertIn(b"/books/:", response.content)
+
+    def test_etag(self):
+        url = reverse("schema-json")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_generated_once_per_version(self):
+        with mock.patch("core.schema.generate", wraps=schema.generate) as generate:
+            for url in (reverse("schema-json"), reverse("schema-yaml")) * 2:
+                self.client.get(url)
+            generate.assert_called_once()
+            with override_settings(SCHEMA_VERSION="next"):
+                self.client.get(reverse("schema-json"))
+            self.assertEqual(generate.call_count, 2)
+
+    def test_generate_schema_command(self):
+        out = StringIO()
+        call_command("generate_schema", stdout=out)
+        path = self.schema_dir / "schema-test.json"
+        self.assertIn(str(path), out.getvalue())
+        self.assertTrue((self.schema_dir / "schema-test.yaml").exists())
+
+        with mock.patch("core.schema.generate", side_effect=AssertionError):
+            response = self.client.get(reverse("schema-json"))
+        self.assertEqual(response.content, path.read_bytes())
+
+    def test_ui(self):
+        response = self.client.get(reverse("schema-swagger-ui"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, reverse("schema-json"))
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book
+
+
+UserModel = get_user_model()
+
+
+class BookSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.in_description = self.create_book(
+            "Gardening", "Jane Doe", "A chapter about dragons."
+        )
+        self.in_title = self.create_book("Dragons", "John Roe", "Fantasy.")
+        self.in_author = self.create_book("Fables", "Dragon Smith", "Stories.")
+        self.unrelated = self.create_book("Cooking", "Ann Poe", "Recipes.")
+
+    def create_book(self, title, author, description):
+        return Book.objects.create(
+            title=title,
+            author=author,
+            description=description,
+            publish_date=timezone.now(),
+        )
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_results_are_ranked_title_author_description(self):
+        data = self.search(reverse("books-list") + "?q=dragon")
+        self.assertEqual(
+            [book["id"] for book in data["results"]],
+            [self.in_title.id, self.in_author.id, self.in_description.id],
+        )
+        self.assertNotIn("search_vector", data["results"][0])
+
+    def test_web_search_syntax(self):
+        data = self.search(reverse("books-list") + "?q=dragon -fantasy")
+        self.assertEqual(
+            {book["id"] for book in data["results"]},
+            {self.in_author.id, self.in_description.id},
+        )
+
+    def test_search_results_are_paginated(self):
+        url = reverse("books-list") + "?q=dragon&page_size=1"
+        ids = []
+        while url:
+            data = self.search(url)
+            ids += [book["id"] for book in data["results"]]
+            url = data["next"]
+        self.assertEqual(
+            ids, [self.in_title.id, self.in_author.id, self.in_description.id]
+        )
+
+    def test_search_with_explicit_ordering(self):
+        data = self.search(reverse("books-list") + "?q=dragon&ordering=created_at")
+        self.assertEqual(
+            [book["id"] for book in data["results"]],
+            [self.in_description.id, self.in_title.id, self.in_author.id],
+        )
+
+    def test_search_vector_follows_updates(self):
+        self.unrelated.title = "Cooking for dragons"
+        self.unrelated.save()
+        data = self.search(reverse("books-list") + "?q=dragon")
+        self.assertIn(self.unrelated.id, [book["id"] for book in data["results"]])
+
+    def test_admin_search(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("admin:core_book_changelist") + "?q=dragon")
+        self.assertEqual(
+            {book.id for book in response.context["cl"].result_list},
+            {self.in_title.id, self.in_author.id, self.in_description.id},
+        )
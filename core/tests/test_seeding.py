@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Sum
+from django.test import TestCase
+from core import factories, ratings
+from core.models import RATINGS, Book, BookRatingStats, Review
+
+
+UserModel = get_user_model()
+
+
+class SeedBookstoreTests(TestCase):
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command(
+            "seed_bookstore",
+            "--books",
+            "30",
+            "--users",
+            "10",
+            "--reviews-per-book",
+            "3",
+            "--batch-size",
+            "7",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def snapshot(self):
+        books = Book.objects.order_by("pk").values_list(
+            "title", "author", "publish_date", "description"
+        )
+        reviews = Review.objects.order_by("book", "user__username").values_list(
+            "user__username", "rating", "review_text"
+        )
+        return list(books), list(reviews)
+
+    def test_seed_bookstore(self):
+        output = self.seed()
+        self.assertIn("Created 10 users, 30 books and 90 reviews", output)
+        self.assertEqual(UserModel.objects.count(), 10)
+        self.assertEqual(Book.objects.count(), 30)
+        self.assertEqual(Review.objects.count(), 90)
+        self.assertEqual(Review.objects.values("book", "user").distinct().count(), 90)
+        user = UserModel.objects.get(username="reader0")
+        self.assertTrue(user.check_password(factories.PASSWORD))
+
+    def test_rating_totals_and_stats(self):
+        self.seed()
+        books = Book.objects.annotate(
+            reviews_count=Count("reviews"), reviews_sum=Sum("reviews__rating")
+        )
+        for book in books:
+            self.assertEqual(book.review_count, book.reviews_count)
+            self.assertEqual(book.rating_sum, book.reviews_sum)
+        stats = list(BookRatingStats.objects.order_by("pk").values())
+        ratings.rebuild_rating_stats(Book.objects.all())
+        self.assertEqual(stats, list(BookRatingStats.objects.order_by("pk").values()))
+
+    def test_same_seed_same_data(self):
+        self.seed("--seed", "7")
+        first = self.snapshot()
+        Book.objects.all().delete()
+        UserModel.objects.all().delete()
+        self.seed("--seed", "7")
+        self.assertEqual(self.snapshot(), first)
+
+        Book.objects.all().delete()
+        UserModel.objects.all().delete()
+        self.seed("--seed", "8")
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_seeding_again_adds_rows(self):
+        self.seed()
+        self.seed()
+        self.assertEqual(UserModel.objects.count(), 20)
+        self.assertEqual(Book.objects.count(), 60)
+
+    def test_seeding_again_after_deleting_users(self):
+        self.seed()
+        UserModel.objects.filter(username="reader3").delete()
+        self.seed()
+        self.assertEqual(UserModel.objects.count(), 19)
+        self.assertTrue(UserModel.objects.filter(username="reader19").exists())
+
+    def test_more_reviews_than_users(self):
+        with self.assertRaises(CommandError):
+            self.seed("--reviews-per-book", "11")
+
+
+class FactoryTests(TestCase):
+
+    def test_review_factory(self):
+        review = factories.ReviewFactory()
+        self.assertEqual(Review.objects.get(), review)
+        self.assertIn(review.rating, RATINGS)
+        self.assertTrue(review.user.check_password(factories.PASSWORD))
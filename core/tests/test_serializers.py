@@ -0,0 +1,148 @@
+import datetime
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from core.models import Book, Review
+from core.serializers import (
+    BookListReadSerializer,
+    BookListSerializer,
+    BookReadSerializer,
+    BookSerializer,
+)
+from core.views import BookViewSet
+
+try:
+    from core.renderers import ORJSONRenderer
+except ImportError:  # orjson is optional
+    ORJSONRenderer = None
+
+
+UserModel = get_user_model()
+
+
+class BookReadSerializerTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            username="reader", password="testpassword"
+        )
+        self.other = UserModel.objects.create_user(
+            username="other", password="testpassword"
+        )
+        self.book = Book.objects.create(
+            title='Ünïcode \u2028 "quoted"',
+            author="Author",
+            description="Line\nbreak",
+            file="books/book.pdf",
+            file_sha256="0" * 64,
+            publish_date=datetime.datetime(
+                2024, 6, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+        )
+        Review.objects.create(
+            user=self.user, book=self.book, review_text="Great", rating=5
+        )
+        Review.objects.create(
+            user=self.other, book=self.book, review_text="Fine", rating=2
+        )
+        Book.objects.create(
+            title="Unreviewed",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def view(self, action, query=None, **kwargs):
+        request = Request(APIRequestFactory().get("/books/", query))
+        request.user = self.user
+        return BookViewSet(
+            request=request, action=action, args=(), kwargs=kwargs, format_kwarg=None
+        )
+
+    def assertSameJSON(self, view, serializer_class, reference, many):
+        books = view.get_queryset()
+        instance = books if many else books.get(pk=self.book.pk)
+        context = view.get_serializer_context()
+        render = JSONRenderer().render
+        self.assertEqual(
+            render(serializer_class(instance, many=many, context=context).data),
+            render(reference(instance, many=many, context=context).data),
+        )
+
+    def test_list_matches_model_serializer(self):
+        self.assertSameJSON(
+            self.view("list"), BookListReadSerializer, BookListSerializer, many=True
+        )
+
+    def test_detail_matches_model_serializer(self):
+        self.assertSameJSON(
+            self.view("retrieve", pk=self.book.pk),
+            BookReadSerializer,
+            BookSerializer,
+            many=False,
+        )
+
+    def test_sparse_fields(self):
+        url = reverse("books-detail", args=[self.book.pk])
+        response = self.client.get(url, {"fields": "author,id, title"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {"id": self.book.pk, "title": self.book.title, "author": "Author"},
+        )
+
+        response = self.client.get(reverse("books-list"), {"fields": "id,reviews_url"})
+        self.assertEqual([*response.json()["results"][0]], ["id", "reviews_url"])
+
+    def test_sparse_fields_skip_reviews_query(self):
+        with self.assertNumQueries(1):
+            view = self.view("retrieve", {"fields": "id,title"}, pk=self.book.pk)
+            [*view.get_queryset()]
+
+    def test_unknown_fields(self):
+        url = reverse("books-detail", args=[self.book.pk])
+        for fields in ("id,search_vector", "reviews_url", ""):
+            response = self.client.get(url, {"fields": fields})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("fields", response.data)
+
+
+@skipIf(ORJSONRenderer is None, "orjson is not installed")
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_same_output_as_json_renderer(self):
+        data = {
+            "text": 'Ünïcode \u2028\u2029 "quoted"',
+            "numbers": [1, 2.5, 0.1, None, True],
+            "date": datetime.datetime(
+                2024, 6, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            "nested": {"tuple": (1, 2)},
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_fallback(self):
+        for data in ({1: "non-string key"}, {"big": 2**70}):
+            self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render({"a": 1}, "application/json; indent=2"),
+            b'{\n  "a": 1\n}',
+        )
+
+    @override_settings(
+        REST_FRAMEWORK={
+            "DEFAULT_RENDERER_CLASSES": ["core.renderers.ORJSONRenderer"],
+        }
+    )
+    def test_async_views_use_the_configured_renderer(self):
+        from core.async_views import json_renderer
+
+        self.assertIsInstance(json_renderer(), ORJSONRenderer)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core import storage
+from core.models import Book
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media = media.name
+        self.content = b"%PDF-1.4 " + os.urandom(3 * storage.CHUNK_SIZE)
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def create_book(self, title, content=None, name="book.pdf"):
+        book = Book.objects.create(
+            title=title,
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        book.file.save(name, ContentFile(content or self.content))
+        return book
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, filename), self.media)
+            for root, _, filenames in os.walk(self.media)
+            for filename in filenames
+        )
+
+    def test_files_are_named_after_their_content(self):
+        book = self.create_book("Book", name="Some Title.PDF")
+        name = f"books/{self.sha256[:2]}/{self.sha256}.pdf"
+        self.assertEqual(book.file.name, name)
+        self.assertEqual(storage.digest(book.file.name), self.sha256)
+        with book.file.open("rb") as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_equal_content_is_stored_once(self):
+        first = self.create_book("First")
+        second = self.create_book("Second", name="other.pdf")
+        third = self.create_book("Third", content=b"%PDF-1.4 other")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.file.name, third.file.name)
+        self.assertEqual(
+            self.stored_files(), sorted([first.file.name, third.file.name])
+        )
+
+    def test_expected_digest(self):
+        content = ContentFile(self.content, name="book.pdf")
+        content.sha256 = "0" * 64
+        files = Book._meta.get_field("file").storage
+        with self.assertRaises(storage.DigestMismatch) as context:
+            files.save("books/book.pdf", content)
+        self.assertEqual(context.exception.digest, self.sha256)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_legacy_names(self):
+        self.assertIsNone(storage.digest("books/book_a1B2c3D.pdf"))
+
+    def test_gc_book_files(self):
+        kept = self.create_book("Kept")
+        orphan = self.create_book("Orphan", content=b"%PDF-1.4 orphan")
+        shared = self.create_book("Shared", content=b"%PDF-1.4 shared")
+        self.create_book("Sharing", content=b"%PDF-1.4 shared")
+        Book.objects.filter(pk__in=[orphan.pk, shared.pk]).delete()
+        stale = os.path.join(self.media, "books", ".interrupted.part")
+        with open(stale, "wb") as f:
+            f.write(b"partial")
+        past = time.time() - 7200
+        for name in self.stored_files():
+            os.utime(os.path.join(self.media, name), (past, past))
+
+        out = StringIO()
+        call_command("gc_book_files", "--dry-run", stdout=out)
+        self.assertIn(orphan.file.name, out.getvalue())
+        self.assertEqual(len(self.stored_files()), 4)
+
+        call_command("gc_book_files", "--batch-size", "1", stdout=StringIO())
+        self.assertEqual(
+            self.stored_files(), sorted([kept.file.name, shared.file.name])
+        )
+
+    def test_gc_book_files_keeps_recent_files(self):
+        book = self.create_book("Book")
+        book.delete()
+        call_command("gc_book_files", stdout=StringIO())
+        self.assertEqual(self.stored_files(), [book.file.name])
+        call_command("gc_book_files", "--min-age", "0", stdout=StringIO())
+        self.assertEqual(self.stored_files(), [])
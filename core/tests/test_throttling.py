@@ -0,0 +1,117 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from core.throttling import SQLiteCounterStore, UserRateThrottle
+
+
+UserModel = get_user_model()
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            THROTTLE_STORE="sqlite",
+            THROTTLE_SQLITE_PATH=os.path.join(self.tmp.name, "throttle.db"),
+        )
+        self.settings.enable()
+        self.user = UserModel(pk=1, username="reader")
+        self.now = 1000 * 60.0
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tmp.cleanup()
+
+    def allow(self, rate="10/min"):
+        throttle = UserRateThrottle()
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+        throttle.timer = lambda: self.now
+        request = APIRequestFactory().get("/books/")
+        request.user = self.user
+        return throttle, throttle.allow_request(request, None)
+
+    def test_limit_within_a_window(self):
+        results = [self.allow()[1] for _ in range(11)]
+        self.assertEqual(results, [True] * 10 + [False])
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(10):
+            self.allow()
+        # A quarter into the next window, 75% of the previous one still counts.
+        self.now += 75
+        results = [self.allow()[1] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        # Rejected requests don't count, so with 2 requests in this window,
+        # one more fits once the previous window's weight is down to 70%,
+        # i.e. 3 seconds from now.
+        throttle, allowed = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 3.0)
+        self.now += 3
+        self.assertTrue(self.allow()[1])
+
+    def test_rate_limit_headers_state(self):
+        throttle, allowed = self.allow()
+        self.assertTrue(allowed)
+        self.assertEqual(throttle.remaining, 9)
+        self.assertEqual(throttle.reset, self.now + 60)
+
+
+class SQLiteCounterStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteCounterStore(os.path.join(self.tmp.name, "throttle.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_incr_and_expiry(self):
+        self.assertEqual(self.store.get("a"), 0)
+        self.assertEqual(self.store.incr("a", 60), 1)
+        self.assertEqual(self.store.incr("a", 60), 2)
+        self.assertEqual(self.store.get("a"), 2)
+        with mock.patch("core.throttling.time.time", return_value=10**12):
+            self.assertEqual(self.store.get("a"), 0)
+            self.assertEqual(self.store.incr("a", 60), 1)
+
+    def test_decr(self):
+        self.store.incr("a", 60)
+        self.store.incr("a", 60)
+        self.store.decr("a")
+        self.assertEqual(self.store.get("a"), 1)
+        # Expired and missing counters are left alone.
+        self.store.decr("b")
+        self.assertEqual(self.store.get("b"), 0)
+
+
+class RateLimitHeadersTests(APITestCase):
+
+    def setUp(self):
+        self.user = UserModel.objects.create(username="reader")
+        self.client.force_authenticate(user=self.user)
+
+    def test_headers(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertEqual(response["X-RateLimit-Limit"], "1000")
+        self.assertEqual(response["X-RateLimit-Remaining"], "999")
+        self.assertIn("X-RateLimit-Reset", response)
+
+    def test_throttled_request(self):
+        rates = {"user": "2/min", "anon": "2/min"}
+        with mock.patch.object(UserRateThrottle, "THROTTLE_RATES", rates):
+            for _ in range(2):
+                response = self.client.get(reverse("books-list"))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse("books-list"))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["X-RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", response)
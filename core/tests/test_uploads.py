@@ -0,0 +1,204 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Book, BookUpload
+from core.uploads import temporary_path, write_chunk
+
+
+UserModel = get_user_model()
+
+
+class BookUploadTests(APITestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp.name, "media"),
+            BOOK_UPLOAD_TEMP_DIR=os.path.join(self.tmp.name, "uploads"),
+        )
+        self.settings.enable()
+        self.admin = UserModel.objects.create_superuser(
+            username="admin", password="adminpassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+        )
+        self.content = b"%PDF-1.4 " + os.urandom(300 * 1024)
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tmp.cleanup()
+
+    def initiate(self, filename="book.pdf", size=None, **data):
+        size = len(self.content) if size is None else size
+        return self.client.post(
+            reverse("uploads-list"),
+            {"book": self.book.id, "filename": filename, "size": size, **data},
+            format="json",
+        )
+
+    def put_chunk(self, upload_id, offset, chunk):
+        url = reverse("uploads-detail", args=[upload_id]) + f"?offset={offset}"
+        return self.client.put(url, chunk, content_type="application/octet-stream")
+
+    def finalize(self, upload_id):
+        return self.client.post(reverse("uploads-finalize", args=[upload_id]))
+
+    def upload(self, chunk_size=100 * 1024, **data):
+        upload_id = self.initiate(**data).data["id"]
+        for offset in range(0, len(self.content), chunk_size):
+            chunk = self.content[offset:][:chunk_size]
+            response = self.put_chunk(upload_id, offset, chunk)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return upload_id
+
+    def test_chunked_upload(self):
+        upload_id = self.upload()
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], BookUpload.Status.COMPLETE)
+
+        self.book.refresh_from_db()
+        with self.book.file.open("rb") as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(
+            self.book.file_sha256, hashlib.sha256(self.content).hexdigest()
+        )
+        self.assertFalse(os.path.exists(temporary_path(BookUpload(pk=upload_id))))
+
+    def test_resume(self):
+        upload_id = self.initiate().data["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+
+        response = self.client.get(reverse("uploads-detail", args=[upload_id]))
+        self.assertEqual(response.data["offset"], 1000)
+        response = self.put_chunk(upload_id, 500, self.content[500:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.put_chunk(upload_id, 1000, self.content[1000:])
+        self.assertEqual(response.data["offset"], len(self.content))
+        self.assertEqual(self.finalize(upload_id).status_code, status.HTTP_200_OK)
+
+    def test_chunk_is_received_before_the_upload_is_locked(self):
+        upload = BookUpload.objects.get(pk=self.initiate().data["id"])
+        queries = CaptureQueriesContext(connection)
+        locked = []
+
+        class Stream(io.BytesIO):
+            def read(stream, size=-1):
+                locked.append(
+                    any("FOR UPDATE" in q["sql"] for q in queries.captured_queries)
+                )
+                return super().read(size)
+
+        with queries:
+            upload = write_chunk(upload, Stream(self.content[:1000]), 0)
+        self.assertEqual(upload.offset, 1000)
+        self.assertTrue(locked)
+        self.assertNotIn(True, locked)
+        self.assertEqual(
+            os.listdir(os.path.join(self.tmp.name, "uploads")),
+            [os.path.basename(temporary_path(upload))],
+        )
+
+    def test_content_is_checked_from_the_first_bytes(self):
+        upload_id = self.initiate().data["id"]
+        response = self.put_chunk(upload_id, 0, b"%PD")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.put_chunk(upload_id, 3, b"X-1.4 not a pdf")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+
+        upload = BookUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, BookUpload.Status.ABORTED)
+        self.assertFalse(os.path.exists(temporary_path(upload)))
+        response = self.put_chunk(upload_id, 0, self.content)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_doc_signature(self):
+        self.content = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 1000
+        upload_id = self.upload(filename="book.doc")
+        self.assertEqual(self.finalize(upload_id).status_code, status.HTTP_200_OK)
+
+    def test_declared_size_is_enforced(self):
+        upload_id = self.initiate(size=1000).data["id"]
+        response = self.put_chunk(upload_id, 0, self.content)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        upload = BookUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, BookUpload.Status.ABORTED)
+
+    @override_settings(BOOK_FILE_SIZE_LIMIT_MB=0.1)
+    def test_size_limit(self):
+        response = self.initiate()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("size", response.data)
+
+    def test_invalid_extension(self):
+        response = self.initiate(filename="book.exe")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("filename", response.data)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        upload_id = self.initiate().data["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hash_mismatch(self):
+        upload_id = self.upload(sha256="0" * 64)
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.file)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "media", "books")), [])
+
+    def test_abort(self):
+        upload_id = self.initiate().data["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+        response = self.client.delete(reverse("uploads-detail", args=[upload_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        upload = BookUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, BookUpload.Status.ABORTED)
+        self.assertFalse(os.path.exists(temporary_path(upload)))
+
+    def test_staff_only(self):
+        user = UserModel.objects.create_user(username="reader", password="password")
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.initiate().status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_uploads_are_private(self):
+        upload_id = self.initiate().data["id"]
+        other = UserModel.objects.create_superuser(username="other", password="pw")
+        self.client.force_authenticate(user=other)
+        response = self.put_chunk(upload_id, 0, self.content)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FileContentValidationTests(APITestCase):
+
+    def test_model_rejects_mismatched_content(self):
+        book = Book(
+            title="Test Book",
+            author="Author",
+            description="Description",
+            publish_date=timezone.now(),
+            file=SimpleUploadedFile("test.pdf", b"MZ\x90\x00 not a pdf"),
+        )
+        with self.assertRaises(ValidationError) as context:
+            book.full_clean()
+        self.assertIn("file", context.exception.message_dict)
@@ -0,0 +1,189 @@
+import math
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import throttling
+
+
+class CacheCounterStore:
+    """
+    Counters kept in a Django cache. Increments are atomic, and shared by
+    every worker, with the Redis and Memcached backends.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def incr(self, key, timeout):
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The counter expired between add() and incr().
+            self.cache.add(key, 1, timeout)
+            return 1
+
+    def decr(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            # The counter expired, there is nothing left to take back.
+            pass
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class SQLiteCounterStore:
+    """
+    Counters kept in a SQLite file, shared by the worker processes of a host
+    when no shared cache is configured. Each increment is a single atomic
+    upsert.
+    """
+
+    # Share of increments that also purge expired counters.
+    purge_probability = 0.001
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_counter ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires REAL NOT NULL)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def incr(self, key, timeout):
+        now = time.time()
+        if random.random() < self.purge_probability:
+            self.connection.execute(
+                "DELETE FROM throttle_counter WHERE expires < ?", (now,)
+            )
+        (value,) = self.connection.execute(
+            "INSERT INTO throttle_counter (key, value, expires) VALUES (?, 1, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "value = CASE WHEN expires < ? THEN 1 ELSE value + 1 END, "
+            "expires = CASE WHEN expires < ? THEN excluded.expires ELSE expires END "
+            "RETURNING value",
+            (key, now + timeout, now, now),
+        ).fetchone()
+        return value
+
+    def decr(self, key):
+        self.connection.execute(
+            "UPDATE throttle_counter SET value = value - 1 "
+            "WHERE key = ? AND expires >= ?",
+            (key, time.time()),
+        )
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT value FROM throttle_counter WHERE key = ? AND expires >= ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+
+_store = None
+
+
+def get_counter_store():
+    global _store
+    if _store is None:
+        if settings.THROTTLE_STORE == "sqlite":
+            _store = SQLiteCounterStore(settings.THROTTLE_SQLITE_PATH)
+        else:
+            _store = CacheCounterStore(settings.THROTTLE_CACHE_ALIAS)
+    return _store
+
+
+@receiver(setting_changed)
+def reset_counter_store(setting, **kwargs):
+    global _store
+    if setting.startswith("THROTTLE_"):
+        _store = None
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Sliding window counter throttling.
+
+    Each client has one counter per fixed window. A request is allowed while
+    the current window's count, plus the previous window's count weighted by
+    how much of it the sliding window still covers, stays within the rate.
+    That is two integers per client, instead of DRF's list of timestamps.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        self.reset = (window + 1) * self.duration
+
+        store = get_counter_store()
+        self.previous = store.get(f"{self.key}:{window - 1}")
+        self.current = store.incr(f"{self.key}:{window}", 2 * self.duration)
+        weight = 1 - self.elapsed / self.duration
+        count = self.previous * weight + self.current
+        allowed = count <= self.num_requests
+        if not allowed:
+            # Rejected requests don't use up the quota. Incrementing first
+            # and taking it back keeps concurrent requests from all passing.
+            store.decr(f"{self.key}:{window}")
+            self.current -= 1
+        self.remaining = max(0, math.floor(self.num_requests - count))
+        self.record_rate_limit(request)
+        return allowed
+
+    def record_rate_limit(self, request):
+        # Exposed as X-RateLimit-* headers by RateLimitHeadersMiddleware.
+        http_request = getattr(request, "_request", request)
+        rate_limit = getattr(http_request, "rate_limit", None)
+        if rate_limit is None or self.remaining < rate_limit["remaining"]:
+            http_request.rate_limit = {
+                "limit": self.num_requests,
+                "remaining": self.remaining,
+                "reset": int(self.reset),
+            }
+
+    def wait(self):
+        # Time until one more request fits under the weighted count, counting
+        # from the next window if the current one alone is already full.
+        if self.current < self.num_requests:
+            previous, current, elapsed = (self.previous, self.current, self.elapsed)
+        else:
+            previous, current, elapsed = (self.current, 0, self.elapsed - self.duration)
+        if not previous:
+            return None
+        weight = (self.num_requests - current - 1) / previous
+        return max(0, self.duration * (1 - weight) - elapsed)
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -0,0 +1,176 @@
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from . import storage
+from .models import BookUpload
+from .validators import FILE_SIGNATURES, validate_file_signature
+
+# Bytes read from the request body at a time.
+CHUNK_SIZE = 64 * 1024
+
+SIGNATURE_LENGTH = max(map(len, FILE_SIGNATURES.values()))
+
+
+def size_limit():
+    return int(settings.BOOK_FILE_SIZE_LIMIT_MB * 1024 * 1024)
+
+
+def temporary_path(upload):
+    return os.path.join(settings.BOOK_UPLOAD_TEMP_DIR, f"{upload.pk}.part")
+
+
+def abort(upload):
+    """
+    Give up on `upload` and drop the data received so far.
+    """
+    upload.status = BookUpload.Status.ABORTED
+    upload.save(update_fields=["status", "updated_at"])
+    try:
+        os.remove(temporary_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+class OffsetConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The chunk does not start at the upload's current offset."
+    default_code = "offset_conflict"
+
+
+def check_uploading(upload):
+    if upload.status != BookUpload.Status.UPLOADING:
+        raise ValidationError({"status": f"The upload is {upload.status}."})
+
+
+def write_chunk(upload, stream, offset):
+    """
+    Append the content of `stream` to `upload` at `offset`. The running size
+    and the file signature are checked as the data arrives, and the upload
+    is aborted at the first invalid byte. Return the updated upload.
+
+    The chunk is received into a file of its own first, so that the upload's
+    row is only locked to append it, not for as long as the client sends it.
+    """
+    check_chunk(upload, offset)
+    chunk_path = f"{temporary_path(upload)}.{uuid.uuid4().hex}"
+    try:
+        try:
+            size = _receive(upload, stream, offset, chunk_path)
+        except DjangoValidationError as e:
+            error = e
+        else:
+            with transaction.atomic():
+                upload = BookUpload.objects.select_for_update().get(pk=upload.pk)
+                check_chunk(upload, offset)
+                _append(upload, chunk_path)
+                upload.offset += size
+                upload.save(update_fields=["offset", "updated_at"])
+                return upload
+    finally:
+        try:
+            os.remove(chunk_path)
+        except FileNotFoundError:
+            pass
+    with transaction.atomic():
+        upload = BookUpload.objects.select_for_update().get(pk=upload.pk)
+        # Invalid data sent at a stale offset is not the upload's to abort.
+        check_chunk(upload, offset)
+        abort(upload)
+    raise ValidationError({"file": error.messages})
+
+
+def check_chunk(upload, offset):
+    check_uploading(upload)
+    if offset != upload.offset:
+        # Resuming clients read the current offset from the upload.
+        raise OffsetConflict(f"Expected offset {upload.offset}, got {offset}.")
+
+
+def _receive(upload, stream, offset, chunk_path):
+    limit = min(upload.size, size_limit())
+    os.makedirs(settings.BOOK_UPLOAD_TEMP_DIR, exist_ok=True)
+    path = temporary_path(upload)
+    head = b""
+    if offset:
+        try:
+            with open(path, "rb") as f:
+                head = f.read(min(offset, SIGNATURE_LENGTH))
+        except FileNotFoundError:
+            raise DjangoValidationError("The data received so far has been lost.")
+    with open(chunk_path, "wb") as f:
+        position = offset
+        while data := stream.read(CHUNK_SIZE):
+            if position + len(data) > limit:
+                raise DjangoValidationError(
+                    f"The upload exceeds its declared size of {upload.size} bytes "
+                    f"or the {settings.BOOK_FILE_SIZE_LIMIT_MB}MB limit."
+                )
+            if position < SIGNATURE_LENGTH:
+                head = (head + data)[:SIGNATURE_LENGTH]
+                validate_file_signature(head, upload.filename, partial=True)
+            f.write(data)
+            position += len(data)
+    return position - offset
+
+
+def _append(upload, chunk_path):
+    path = temporary_path(upload)
+    with open(path, "r+b" if upload.offset else "wb") as f:
+        # Drop whatever an interrupted request left past the offset.
+        f.truncate(upload.offset)
+        f.seek(upload.offset)
+        with open(chunk_path, "rb") as chunk:
+            shutil.copyfileobj(chunk, f)
+
+
+def finalize(upload):
+    """
+    Move a fully received `upload` to its book's file, hashing it on the way.
+    Return the updated upload.
+    """
+    with transaction.atomic():
+        upload = (
+            BookUpload.objects.select_for_update()
+            .select_related("book")
+            .get(pk=upload.pk)
+        )
+        check_uploading(upload)
+        if upload.offset != upload.size:
+            raise ValidationError(
+                {"offset": f"Received {upload.offset} of {upload.size} bytes."}
+            )
+        try:
+            _store(upload)
+        except DjangoValidationError as e:
+            abort(upload)
+            error = e
+        else:
+            upload.status = BookUpload.Status.COMPLETE
+            upload.save(update_fields=["status", "updated_at"])
+            os.remove(temporary_path(upload))
+            return upload
+    raise ValidationError({"file": error.messages})
+
+
+def _store(upload):
+    book = upload.book
+    with open(temporary_path(upload), "rb") as f:
+        validate_file_signature(f.read(SIGNATURE_LENGTH), upload.filename)
+        content = File(f)
+        # Checked by the storage as it hashes the content, before storing it.
+        content.sha256 = upload.sha256
+        try:
+            book.file.save(upload.filename, content, save=False)
+        except storage.DigestMismatch as e:
+            raise DjangoValidationError(
+                f"The content's SHA-256 is {e.digest}, not {upload.sha256}."
+            )
+    book.file_sha256 = storage.digest(book.file.name)
+    book.save(update_fields=["file", "file_sha256"])
@@ -4,7 +4,9 @@ import os
 
 
 def validate_file_extension(value):
-    ext = os.path.splitext(value.name)[1].lower()
+    # Accepts a file or, for uploads not received yet, a file name.
+    name = getattr(value, "name", value)
+    ext = os.path.splitext(name)[1].lower()
     valid_extensions = getattr(settings, "BOOK_FILE_VALID_EXTENSIONS")
     if ext not in valid_extensions:
         raise ValidationError(
@@ -18,3 +20,36 @@ def validate_file_size(value):
     megabyte_limit = getattr(settings, "BOOK_FILE_SIZE_LIMIT_MB")
     if filesize > megabyte_limit * 1024 * 1024:
         raise ValidationError(f"Max file size is {megabyte_limit}MB")
+
+
+# Leading bytes of each accepted file type.
+FILE_SIGNATURES = {
+    ".pdf": b"%PDF-",
+    ".doc": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",  # OLE2 compound document
+}
+
+
+def validate_file_signature(head, name, partial=False):
+    """
+    Check the first bytes of a file against the signature of its extension.
+    With `partial`, `head` may stop short of the end of the signature, as
+    happens while an upload is in progress.
+    """
+    ext = os.path.splitext(name)[1].lower()
+    signature = FILE_SIGNATURES.get(ext)
+    if signature is None:
+        return
+    if partial:
+        head = head[: len(signature)]
+        valid = signature.startswith(head)
+    else:
+        valid = head.startswith(signature)
+    if not valid:
+        raise ValidationError(f"File content does not match its {ext} extension.")
+
+
+def validate_file_content(value):
+    value.seek(0)
+    head = value.read(max(map(len, FILE_SIGNATURES.values())))
+    value.seek(0)
+    validate_file_signature(head, value.name)
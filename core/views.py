@@ -1,16 +1,61 @@
-from rest_framework import generics, viewsets, status
+import os
+
+from rest_framework import generics, mixins, viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt import views as jwt_views
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .serializers import RegisterSerializer, BookSerializer, ReviewSerializer
-from .models import Book
-from drf_yasg.utils import swagger_auto_schema
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from . import exports, metrics, passwords, uploads
+from . import ratings as rating_stats
+from . import reviews as review_batches
+from .authentication import full_user
+from .cache import cached_response, detail_cache_key, list_cache_key
+from .downloads import IgnoreClientContentNegotiation, serve_file
+from .filters import BookSearchFilter
+from .pagination import KeysetCursorPagination, KeysetOrderingFilter
+from .serializers import (
+    RegisterSerializer,
+    BookSerializer,
+    BookListSerializer,
+    BookListReadSerializer,
+    BookRatingStatsSerializer,
+    BookReadSerializer,
+    BookUploadSerializer,
+    ReviewBatchItemSerializer,
+    ReviewBatchSerializer,
+    ReviewSerializer,
+    TopBookReadSerializer,
+    TopBookSerializer,
+    UserReviewSerializer,
+    serializer_columns,
+    serializer_sources,
+)
+from .models import Book, BookRatingStats, BookUpload, Review
+from drf_yasg import openapi
+from drf_yasg.utils import no_body, swagger_auto_schema
 
 UserModel = get_user_model()
 
+FIELDS_PARAMETER = openapi.Parameter(
+    "fields",
+    openapi.IN_QUERY,
+    description=(
+        "Comma-separated fields to include, e.g. `id,title,author` to leave out "
+        "`description` and `reviews`."
+    ),
+    type=openapi.TYPE_STRING,
+)
+
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(
+    metrics.MetricsMixin, passwords.RejectWhenBusyMixin, generics.CreateAPIView
+):
     """
     Register a new user.
     """
@@ -20,7 +65,25 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
 
 
-class BookViewSet(viewsets.ReadOnlyModelViewSet):
+class TokenObtainPairView(
+    metrics.MetricsMixin,
+    passwords.RejectWhenBusyMixin,
+    jwt_views.TokenObtainPairView,
+):
+    """
+    Takes a set of user credentials and returns an access and refresh JSON web
+    token pair to prove the authentication of those credentials.
+    """
+
+
+class TokenRefreshView(metrics.MetricsMixin, jwt_views.TokenRefreshView):
+    """
+    Takes a refresh type JSON web token and returns an access type JSON web
+    token if the refresh token is valid.
+    """
+
+
+class BookViewSet(metrics.MetricsMixin, viewsets.ReadOnlyModelViewSet):
     """
     Retrieve a list of books or a specific book.
     """
@@ -28,6 +91,271 @@ class BookViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [BookSearchFilter, KeysetOrderingFilter]
+    ordering_fields = ["publish_date", "created_at", "average_rating", "review_count"]
+    # GET requests may read from the replicas; see core.routers.
+    replica_reads = True
+
+    @property
+    def ordering(self):
+        # Search results are ranked unless another ordering is requested.
+        request = getattr(self, "request", None)
+        if request is not None and BookSearchFilter.get_search_terms(request):
+            return ["-search_rank"]
+        return ["-publish_date"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "download":
+            return queryset.only("pk", "title", "file")
+        if self.action not in ("list", "retrieve", "top"):
+            # Other actions only need the book's primary key.
+            return queryset.only("pk")
+
+        fields = self.requested_fields()
+        queryset = queryset.only(
+            *serializer_columns(self.get_reference_serializer_class(), fields)
+        )
+        if self.action == "top":
+            queryset = rating_stats.leaderboard(queryset).select_related("rating_stats")
+        if fields is not None and "reviews" not in fields:
+            return queryset
+        reviews = Review.objects.only(
+            "book", *serializer_columns(ReviewSerializer)
+        ).order_by("-created_at", "-id")
+        if self.action in ("list", "top"):
+            return queryset.prefetch_related(
+                Prefetch(
+                    "reviews",
+                    queryset=reviews[: settings.BOOK_LIST_REVIEWS_LIMIT],
+                    to_attr="latest_reviews",
+                )
+            )
+        return queryset.prefetch_related(Prefetch("reviews", queryset=reviews))
+
+    def requested_fields(self):
+        """
+        The fields selected with `?fields=` for list, retrieve and top, or
+        None for all of them.
+        """
+        request = getattr(self, "request", None)
+        if request is None or self.action not in ("list", "retrieve", "top"):
+            return None
+        value = request.query_params.get("fields")
+        if value is None:
+            return None
+        fields = frozenset(name.strip() for name in value.split(",") if name.strip())
+        available = serializer_sources(self.get_reference_serializer_class())
+        if not fields or fields - available.keys():
+            raise ValidationError({"fields": f"Choose from {', '.join(available)}."})
+        return fields
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "fields": self.requested_fields()}
+
+    @swagger_auto_schema(manual_parameters=[FIELDS_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            list_cache_key(request),
+            settings.BOOK_CACHE_LIST_TIMEOUT,
+            lambda: super(BookViewSet, self).list(request, *args, **kwargs),
+        )
+
+    @swagger_auto_schema(manual_parameters=[FIELDS_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            detail_cache_key(request, kwargs[self.lookup_field]),
+            settings.BOOK_CACHE_DETAIL_TIMEOUT,
+            lambda: super(BookViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    def get_serializer_class(self):
+        if getattr(self, "swagger_fake_view", False):
+            # Document the ModelSerializers the read serializers reproduce.
+            return {"list": BookListSerializer, "top": TopBookSerializer}.get(
+                self.action, BookSerializer
+            )
+        if self.action == "list":
+            return BookListReadSerializer
+        if self.action == "retrieve":
+            return BookReadSerializer
+        if self.action == "top":
+            return TopBookReadSerializer
+        return super().get_serializer_class()
+
+    def get_reference_serializer_class(self):
+        # The ModelSerializer that the read serializers reproduce.
+        serializer_class = self.get_serializer_class()
+        return getattr(serializer_class, "reference", serializer_class)
+
+    @swagger_auto_schema(
+        operation_description="List the reviews of a book, newest first.",
+        responses={status.HTTP_200_OK: ReviewSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def reviews(self, request, pk=None):
+        """
+        List all reviews of a specific book, one page at a time.
+        """
+        book = self.get_object()
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(Review.objects.filter(book=book), request)
+        serializer = ReviewSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "List the top-rated books, ranked by the Bayesian average of their "
+            "ratings, with their rating histograms. Books without reviews are "
+            "left out."
+        ),
+        manual_parameters=[
+            FIELDS_PARAMETER,
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description="Number of books, at most `BOOK_TOP_MAX_LIMIT`.",
+                type=openapi.TYPE_INTEGER,
+                default=10,
+            ),
+        ],
+        responses={status.HTTP_200_OK: TopBookSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def top(self, request):
+        """
+        List the top-rated books.
+        """
+        try:
+            limit = int(request.query_params.get("limit", settings.BOOK_TOP_LIMIT))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        limit = min(limit, settings.BOOK_TOP_MAX_LIMIT)
+
+        def get_response():
+            books = self.get_queryset()[:limit]
+            return Response({"results": self.get_serializer(books, many=True).data})
+
+        return cached_response(
+            request,
+            list_cache_key(request),
+            settings.BOOK_CACHE_LIST_TIMEOUT,
+            get_response,
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Show how many reviews gave the book each rating, and its Bayesian "
+            "average."
+        ),
+        responses={status.HTTP_200_OK: BookRatingStatsSerializer},
+    )
+    @action(detail=True, methods=["get"])
+    def ratings(self, request, pk=None):
+        """
+        Show the rating distribution of a specific book.
+        """
+        book = self.get_object()
+        try:
+            stats = book.rating_stats
+        except BookRatingStats.DoesNotExist:
+            stats = BookRatingStats(
+                book=book, bayesian_average=rating_stats.bayesian_average(0, 0)
+            )
+        return Response(BookRatingStatsSerializer(stats).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Download the book's file. Supports `Range` requests and conditional "
+            "requests with `If-None-Match` / `If-Modified-Since`."
+        ),
+        responses={
+            status.HTTP_200_OK: "File content",
+            status.HTTP_206_PARTIAL_CONTENT: "Requested byte range",
+            status.HTTP_304_NOT_MODIFIED: "Not Modified",
+            status.HTTP_404_NOT_FOUND: "The book has no file",
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: "Invalid range",
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def download(self, request, pk=None):
+        """
+        Stream the file of a specific book.
+        """
+        book = self.get_object()
+        if not book.file:
+            raise Http404
+        # Stored files are named after their content; name them after the book.
+        extension = os.path.splitext(book.file.name)[1]
+        filename = book.title.replace("/", "_") + extension
+        return serve_file(request, book.file, filename)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Stream the whole catalogue, oldest first, as NDJSON or CSV. The "
+            "response is gzip-compressed when the client accepts it."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "format",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[*exports.CONTENT_TYPES],
+                default="ndjson",
+            ),
+            openapi.Parameter(
+                "since",
+                openapi.IN_QUERY,
+                description="Only books created at or after this ISO 8601 date.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME,
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: "NDJSON or CSV rows",
+            status.HTTP_400_BAD_REQUEST: "Invalid format or since",
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request):
+        """
+        Stream every book in a flat format for bulk consumers.
+        """
+        format = request.query_params.get("format", "ndjson")
+        if format not in exports.CONTENT_TYPES:
+            raise ValidationError(
+                {"format": f"Choose one of {', '.join(exports.CONTENT_TYPES)}."}
+            )
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = exports.parse_since(since)
+            except ValueError as e:
+                raise ValidationError({"since": str(e)})
+
+        compress = exports.accepts_gzip(request)
+        response = StreamingHttpResponse(
+            exports.export_chunks(format, since, compress),
+            content_type=exports.CONTENT_TYPES[format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="books.{format}"'
+        response["Vary"] = "Accept-Encoding"
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
 
     @swagger_auto_schema(
         operation_description="Add a review to a book.",
@@ -43,11 +371,157 @@ class BookViewSet(viewsets.ReadOnlyModelViewSet):
         Add a review to a specific book.
         """
         book = self.get_object()
-        data = request.data
-        data["book"] = book.id
-        data["user"] = request.user.id
-        serializer = ReviewSerializer(data=data)
+        serializer = ReviewSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user, book=book)
+            try:
+                with transaction.atomic():
+                    serializer.save(user=full_user(request.user), book=book)
+            except IntegrityError:
+                return Response(
+                    {"non_field_errors": [review_batches.ALREADY_REVIEWED]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReviewBatchView(metrics.MetricsMixin, generics.GenericAPIView):
+    """
+    Submit reviews of several books in one request.
+    """
+
+    serializer_class = ReviewBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Submit up to `REVIEW_BATCH_MAX_ITEMS` reviews, each with a `book`, "
+            "`rating` and `review_text`. Valid reviews are saved together; the "
+            "response has a result per item, in order, with a `status` of "
+            "`created`, `updated` (with `upsert`) or `invalid` and either the "
+            "saved `review` or its `errors`."
+        ),
+        responses={
+            status.HTTP_200_OK: "Results of each review",
+            status.HTTP_400_BAD_REQUEST: "Validation Error",
+            status.HTTP_409_CONFLICT: "A review was submitted concurrently",
+        },
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["items"]
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            item_serializer = ReviewBatchItemSerializer(data=item)
+            if item_serializer.is_valid():
+                valid.append((index, item_serializer.validated_data))
+            else:
+                results[index] = {
+                    "status": review_batches.INVALID,
+                    "errors": item_serializer.errors,
+                }
+        if valid:
+            saved = review_batches.submit_reviews(
+                full_user(request.user),
+                [data for _, data in valid],
+                upsert=serializer.validated_data["upsert"],
+            )
+            for (index, _), (result, value) in zip(valid, saved):
+                if result == review_batches.INVALID:
+                    results[index] = {"status": result, "errors": value}
+                else:
+                    results[index] = {
+                        "status": result,
+                        "review": ReviewBatchItemSerializer(value).data,
+                    }
+        return Response({"results": results})
+
+
+class UserReviewListView(metrics.MetricsMixin, generics.ListAPIView):
+    """
+    List the authenticated user's reviews, newest first.
+    """
+
+    serializer_class = UserReviewSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    replica_reads = True
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Review.objects.none()
+        return Review.objects.filter(user_id=self.request.user.pk).only(
+            *serializer_columns(UserReviewSerializer)
+        )
+
+
+class BookUploadViewSet(
+    metrics.MetricsMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Upload a book's file in chunks: create an upload, PUT its content in one or
+    more chunks, then finalize it. An interrupted upload resumes from the
+    `offset` returned by GET.
+    """
+
+    serializer_class = BookUploadSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            # The schema is generated without a request.
+            return BookUpload.objects.none()
+        return BookUpload.objects.filter(user_id=self.request.user.pk)
+
+    def perform_create(self, serializer):
+        serializer.save(user=full_user(self.request.user))
+
+    def perform_destroy(self, instance):
+        uploads.abort(instance)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Append a chunk, sent as the raw request body, at `offset`. "
+            "Responds 409 when `offset` is not the upload's current offset."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "offset", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True
+            )
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY
+        ),
+        responses={status.HTTP_200_OK: BookUploadSerializer},
+    )
+    def update(self, request, *args, **kwargs):
+        """
+        Append a chunk to an upload.
+        """
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params["offset"])
+        except (KeyError, ValueError):
+            raise ValidationError({"offset": "An integer offset is required."})
+        if request.stream is None:
+            raise ValidationError({"file": "The chunk is empty."})
+        upload = uploads.write_chunk(upload, request.stream, offset)
+        return Response(self.get_serializer(upload).data)
+
+    @swagger_auto_schema(
+        request_body=no_body, responses={status.HTTP_200_OK: BookUploadSerializer}
+    )
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        """
+        Store a fully received upload as its book's file.
+        """
+        upload = uploads.finalize(self.get_object())
+        return Response(self.get_serializer(upload).data)